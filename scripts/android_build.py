@@ -14,6 +14,9 @@ import shutil
 from pathlib import Path
 from datetime import datetime
 
+from build_telemetry import run_instrumented_build
+from toolchain_probe import get_toolchain_probe
+
 class AndroidBuilder:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
@@ -28,6 +31,12 @@ class AndroidBuilder:
         """检查Android构建环境"""
         print("🔍 检查Android构建环境...")
         
+        probe = get_toolchain_probe(self.project_root)
+        probes = [['flutter', '--version'], ['java', '-version']]
+        if (self.android_dir / "gradlew").exists() or (self.android_dir / "gradlew.bat").exists():
+            probes.append(("gradlew.bat --version" if os.name == 'nt' else "./gradlew --version", self.android_dir))
+        probe.prefetch(probes)
+        
         # 检查Flutter - 修复编码问题
         flutter_found = False
         
@@ -40,9 +49,7 @@ class AndroidBuilder:
             
             for cmd in flutter_commands:
                 try:
-                    result = subprocess.run(cmd, 
-                                          capture_output=True, text=True, timeout=10,
-                                          encoding='utf-8', errors='ignore')
+                    result = probe.run(cmd, timeout=10)
                     if result.returncode == 0 and 'Flutter' in result.stdout:
                         lines = result.stdout.split('\n')
                         for line in lines:
@@ -66,9 +73,7 @@ class AndroidBuilder:
             
             # 如果还没找到，尝试shell方式
             if not flutter_found:
-                result = subprocess.run('flutter --version', 
-                                      capture_output=True, text=True, timeout=10,
-                                      encoding='utf-8', errors='ignore', shell=True)
+                result = probe.run('flutter --version', timeout=10)
                 if result.returncode == 0 and 'Flutter' in result.stdout:
                     lines = result.stdout.split('\n')
                     for line in lines:
@@ -142,9 +147,7 @@ class AndroidBuilder:
             
         # 检查Java - 使用编码修复
         try:
-            result = subprocess.run(['java', '-version'], 
-                                  capture_output=True, text=True, timeout=5,
-                                  encoding='utf-8', errors='ignore')
+            result = probe.run(['java', '-version'], timeout=5)
             if result.returncode == 0:
                 # Java版本信息通常在stderr中
                 java_output = result.stderr if result.stderr else result.stdout
@@ -163,9 +166,7 @@ class AndroidBuilder:
         try:
             if (self.android_dir / "gradlew").exists() or (self.android_dir / "gradlew.bat").exists():
                 gradlew_cmd = "gradlew.bat" if os.name == 'nt' else "./gradlew"
-                result = subprocess.run([gradlew_cmd, '--version'], 
-                                      cwd=self.android_dir, capture_output=True, text=True, timeout=30,
-                                      encoding='utf-8', errors='ignore', shell=True)
+                result = probe.run(f"{gradlew_cmd} --version", cwd=self.android_dir, timeout=30)
                 if result.returncode == 0:
                     gradle_lines = [line for line in result.stdout.split('\n') if 'Gradle' in line]
                     if gradle_lines:
@@ -247,20 +248,14 @@ class AndroidBuilder:
         if split_per_abi:
             cmd.append('--split-per-abi')
             
-        # 执行构建 - 优先使用shell方式
-        try:
-            # 在Windows上使用shell方式更可靠
-            cmd_str = ' '.join(cmd)
-            result = subprocess.run(cmd_str, cwd=self.project_root, check=True,
-                                  encoding='utf-8', errors='ignore', shell=True)
+        # 执行构建 - 优先使用shell方式（在Windows上更可靠）；输出同时写入 build_logs/，各阶段耗时记入构建遥测
+        cmd_str = ' '.join(cmd)
+        variant = '-'.join(part for part in (flavor, build_type, "apk") if part)
+        if run_instrumented_build(cmd_str, "android", variant, self.project_root):
             print("✅ APK构建成功")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ APK构建失败: {e}")
-            return False
-        except FileNotFoundError:
-            print("❌ Flutter命令未找到，请确保Flutter已正确安装并在PATH中")
-            return False
+        print("❌ APK构建失败（如提示命令未找到，请确保Flutter已正确安装并在PATH中）")
+        return False
             
     def build_aab(self, flavor="", build_type="release"):
         """构建AAB (Android App Bundle)"""
@@ -280,20 +275,14 @@ class AndroidBuilder:
         if flavor:
             cmd.extend(['--flavor', flavor])
             
-        # 执行构建 - 优先使用shell方式
-        try:
-            # 在Windows上使用shell方式更可靠
-            cmd_str = ' '.join(cmd)
-            result = subprocess.run(cmd_str, cwd=self.project_root, check=True,
-                                  encoding='utf-8', errors='ignore', shell=True)
+        # 执行构建 - 优先使用shell方式（在Windows上更可靠）；输出同时写入 build_logs/，各阶段耗时记入构建遥测
+        cmd_str = ' '.join(cmd)
+        variant = '-'.join(part for part in (flavor, build_type, "aab") if part)
+        if run_instrumented_build(cmd_str, "android", variant, self.project_root):
             print("✅ AAB构建成功")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ AAB构建失败: {e}")
-            return False
-        except FileNotFoundError:
-            print("❌ Flutter命令未找到，请确保Flutter已正确安装并在PATH中")
-            return False
+        print("❌ AAB构建失败（如提示命令未找到，请确保Flutter已正确安装并在PATH中）")
+        return False
             
     def organize_outputs(self, flavor="", build_type="release"):
         """整理构建产物"""
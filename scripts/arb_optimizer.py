@@ -12,14 +12,26 @@ import subprocess
 from collections import OrderedDict, defaultdict
 from difflib import SequenceMatcher
 from datetime import datetime
-import shutil
+
+from backup_store import BackupStore
+from dart_source_index import DartSourceIndex
+from text_similarity import similar_pair_candidates
 
 class ARBOptimizer:
     def __init__(self, l10n_dir="lib/l10n"):
         self.l10n_dir = l10n_dir
         self.zh_arb_path = os.path.join(l10n_dir, "app_zh.arb")
         self.en_arb_path = os.path.join(l10n_dir, "app_en.arb")
-        self.backup_dir = f"arb_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.backup_id = None
+        self._source_index = None
+    
+    @property
+    def source_index(self):
+        """共享的Dart源码索引（首次访问时增量刷新）"""
+        if self._source_index is None:
+            self._source_index = DartSourceIndex(roots=["lib"])
+            self._source_index.refresh()
+        return self._source_index
         
     def load_arb_files(self):
         """加载ARB文件"""
@@ -37,66 +49,47 @@ class ARBOptimizer:
     
     def find_dart_files(self):
         """查找所有Dart文件"""
-        dart_files = []
-        for root, dirs, files in os.walk("lib"):
-            for file in files:
-                if file.endswith('.dart'):
-                    dart_files.append(os.path.join(root, file))
-        return dart_files
+        return self.source_index.files()
     
     def find_used_keys(self):
-        """查找代码中使用的ARB键值"""
-        used_keys = set()
-        dart_files = self.find_dart_files()
-        
-        # 常见的本地化引用模式
-        patterns = [
-            r'AppLocalizations\.of\(context\)\.(\w+)',
-            r'l10n\.(\w+)',
-            r'localizations\.(\w+)',
-            r'_localizations\.(\w+)',
-        ]
-        
-        for file_path in dart_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                for pattern in patterns:
-                    matches = re.findall(pattern, content)
-                    used_keys.update(matches)
-                    
-            except Exception as e:
-                print(f"⚠️  读取文件失败 {file_path}: {e}")
-                
-        return used_keys
+        """查找代码中使用的ARB键值（从增量源码索引中查询）"""
+        return self.source_index.l10n_keys()
     
     def calculate_similarity(self, text1, text2):
         """计算两个文本的相似度"""
         return SequenceMatcher(None, text1, text2).ratio()
     
-    def find_duplicate_keys(self, zh_data, en_data):
-        """查找重复或相似的键值"""
+    def find_duplicate_keys(self, zh_data, en_data, threshold=0.85):
+        """查找重复或相似的键值
+        
+        先用字符前缀过滤生成候选键对，只对相似度可能超过阈值的键对计算精确相似度，
+        结果与两两比较完全一致。
+        """
         duplicates = []
         keys = [k for k in zh_data.keys() if not k.startswith('@')]
+        zh_texts = [zh_data[k] for k in keys]
+        en_texts = [en_data.get(k, '') for k in keys]
         
-        for i, key1 in enumerate(keys):
-            for key2 in keys[i+1:]:
-                zh_sim = self.calculate_similarity(zh_data[key1], zh_data[key2])
-                en_sim = self.calculate_similarity(en_data.get(key2, ''), en_data.get(key1, ''))
-                
-                # 如果中文或英文相似度很高，认为是重复
-                if zh_sim > 0.85 or en_sim > 0.85:
-                    duplicates.append({
-                        'key1': key1,
-                        'key2': key2,
-                        'zh_text1': zh_data[key1],
-                        'zh_text2': zh_data[key2],
-                        'en_text1': en_data.get(key1, ''),
-                        'en_text2': en_data.get(key2, ''),
-                        'zh_similarity': zh_sim,
-                        'en_similarity': en_sim
-                    })
+        candidates = similar_pair_candidates(zh_texts, threshold)
+        candidates |= similar_pair_candidates(en_texts, threshold)
+        
+        for i, j in sorted(candidates):
+            key1, key2 = keys[i], keys[j]
+            zh_sim = self.calculate_similarity(zh_texts[i], zh_texts[j])
+            en_sim = self.calculate_similarity(en_texts[j], en_texts[i])
+            
+            # 如果中文或英文相似度很高，认为是重复
+            if zh_sim > threshold or en_sim > threshold:
+                duplicates.append({
+                    'key1': key1,
+                    'key2': key2,
+                    'zh_text1': zh_texts[i],
+                    'zh_text2': zh_texts[j],
+                    'en_text1': en_texts[i],
+                    'en_text2': en_texts[j],
+                    'zh_similarity': zh_sim,
+                    'en_similarity': en_sim
+                })
         
         return duplicates
     
@@ -215,14 +208,11 @@ class ARBOptimizer:
         print(f"✅ 分析报告已生成: {report_file}")
     
     def create_backup(self):
-        """创建ARB文件备份"""
-        if not os.path.exists(self.backup_dir):
-            os.makedirs(self.backup_dir)
-        
-        shutil.copy2(self.zh_arb_path, os.path.join(self.backup_dir, "app_zh.arb"))
-        shutil.copy2(self.en_arb_path, os.path.join(self.backup_dir, "app_en.arb"))
+        """创建ARB文件备份（内容寻址，未变化的文件不重复存储）"""
+        self.backup_id = BackupStore().snapshot([self.zh_arb_path, self.en_arb_path], "arb_optimizer")
         
-        print(f"✅ 备份已创建: {self.backup_dir}")
+        print(f"✅ 备份已创建: {self.backup_id}")
+        print(f"   恢复命令: python scripts/backup_store.py restore {self.backup_id}")
     
     def generate_key_mapping(self, duplicates, unused_keys):
         """生成键值映射表"""
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+内容寻址备份库
+文件内容按 SHA-256 存为对象（相同内容只存一份），每次备份只写一个记录 路径 -> 哈希 的小清单；
+按 mtime、大小、ctime、inode 复用上次计算的哈希，未变化的文件既不重新读取也不重新存储；
+记录哈希时刚修改过的文件（同一时间戳内可能再次被改写）下次仍会重新读取（与 git 处理 racy 条目的方式相同）。
+恢复只需一条命令: python scripts/backup_store.py restore latest
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_STORE_DIR = os.path.join("tools", "backups")
+
+CHUNK_SIZE = 1 << 20
+
+# 记录哈希时文件的 mtime/ctime 距当时不足该值，则该条目不可信：文件可能在同一时间戳内再次被改写
+# 而 mtime 和大小不变（文件系统时间戳精度可低至 2 秒）
+RACY_WINDOW_NS = 2 * 10**9
+
+# 本进程中上一次备份的创建时间（纳秒），保证同一进程内的创建时间严格递增
+_last_created_ns = 0
+_created_ns_lock = threading.Lock()
+
+
+def _next_created_ns() -> int:
+    """当前时间（纳秒）；时钟精度不足（如 Windows）时在上一次的基础上加一"""
+    global _last_created_ns
+    with _created_ns_lock:
+        _last_created_ns = max(time.time_ns(), _last_created_ns + 1)
+        return _last_created_ns
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """先写临时文件再原子重命名，避免中断时留下半截文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.backup-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _atomic_copy(source: str, path: str) -> None:
+    """把 source 复制到 path（同样经临时文件原子替换，按块复制不整体读入内存）"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.backup-', suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def stat_cache_entry(stat: os.stat_result, digest: str) -> list:
+    """按文件统计信息缓存哈希的条目：[mtime_ns, 大小, 哈希, ctime_ns, inode, 记录时间_ns]"""
+    return [stat.st_mtime_ns, stat.st_size, digest, stat.st_ctime_ns, stat.st_ino, time.time_ns()]
+
+
+def cached_digest(entry: Optional[list], stat: os.stat_result) -> Optional[str]:
+    """条目仍可信时返回其哈希，否则返回 None（需要重新读取文件）
+
+    统计信息必须完全一致，且记录时文件已至少 RACY_WINDOW_NS 未被修改；旧格式的条目一律不可信。
+    """
+    if not entry or len(entry) != 6:
+        return None
+    mtime_ns, size, digest, ctime_ns, inode, recorded_ns = entry
+    if (mtime_ns, size, ctime_ns, inode) != (stat.st_mtime_ns, stat.st_size, stat.st_ctime_ns, stat.st_ino):
+        return None
+    if recorded_ns - max(mtime_ns, ctime_ns) < RACY_WINDOW_NS:
+        return None
+    return digest
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BackupStore:
+    """备份库：objects/ 存放按哈希命名的文件内容，manifests/ 存放每次备份的清单
+
+    清单中的路径相对于备份时的工作目录（项目根目录）记录，恢复时按同样的相对路径写回。
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifests_dir = os.path.join(root, "manifests")
+        self.stat_cache_path = os.path.join(root, "stat_cache.json")
+        self._stat_cache: Optional[Dict[str, list]] = None
+
+    # 对象
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def has_object(self, digest: str) -> bool:
+        return os.path.exists(self._object_path(digest))
+
+    def put_bytes(self, data: bytes) -> str:
+        """存入一段内容，返回其哈希（已存在时不重复写入）"""
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.has_object(digest):
+            _atomic_write(self._object_path(digest), data)
+        return digest
+
+    def put_file(self, path: str) -> str:
+        """存入一个文件，返回其哈希；统计信息未变（见 cached_digest）且对象已存在时直接复用缓存的哈希"""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        cache = self._load_stat_cache()
+        cached = cached_digest(cache.get(key), stat)
+        if cached and self.has_object(cached):
+            return cached
+
+        digest = _hash_file(path)
+        if not self.has_object(digest):
+            _atomic_copy(path, self._object_path(digest))
+        cache[key] = stat_cache_entry(stat, digest)
+        return digest
+
+    def read_object(self, digest: str) -> bytes:
+        with open(self._object_path(digest), 'rb') as f:
+            return f.read()
+
+    def _load_stat_cache(self) -> Dict[str, list]:
+        if self._stat_cache is None:
+            try:
+                with open(self.stat_cache_path, 'r', encoding='utf-8') as f:
+                    self._stat_cache = json.load(f)
+            except (OSError, ValueError):
+                self._stat_cache = {}
+        return self._stat_cache
+
+    def _save_stat_cache(self) -> None:
+        if self._stat_cache is not None:
+            _atomic_write(self.stat_cache_path, json.dumps(self._stat_cache).encode('utf-8'))
+
+    # 清单
+
+    def begin(self, operation: str, root: Optional[str] = None) -> 'Backup':
+        """开始一次备份，逐个加入文件后调用 save() 写出清单；root 为记录相对路径的基准目录（默认当前目录）"""
+        return Backup(self, operation, root)
+
+    def snapshot(self, paths: Iterable[str], operation: str) -> str:
+        """备份一组文件（不存在的路径会被忽略），返回清单编号"""
+        backup = self.begin(operation)
+        for path in paths:
+            if os.path.isfile(path):
+                backup.add(path)
+        return backup.save()
+
+    def manifest_ids(self) -> List[str]:
+        """所有清单编号，按清单中记录的创建时间升序（同一秒内的多个备份也按实际先后排列）"""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        ids = [name[:-len('.json')] for name in os.listdir(self.manifests_dir) if name.endswith('.json')]
+        return sorted(ids, key=self._order_key)
+
+    def _order_key(self, manifest_id: str) -> tuple:
+        """排序键 (创建时间纳秒, 编号)；旧清单没有 created_ns 时按 created_at（精确到秒）计"""
+        try:
+            with open(os.path.join(self.manifests_dir, f"{manifest_id}.json"), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            created_ns = manifest.get('created_ns')
+            if created_ns is None:
+                created_ns = int(datetime.fromisoformat(manifest['created_at']).timestamp()) * 10**9
+        except (OSError, ValueError, KeyError, TypeError):
+            created_ns = 0
+        return created_ns, manifest_id
+
+    def resolve(self, manifest_id: str) -> str:
+        """把 latest 或唯一前缀解析为完整的清单编号"""
+        ids = self.manifest_ids()
+        if manifest_id == 'latest':
+            if not ids:
+                raise KeyError("备份库中没有任何备份")
+            return ids[-1]
+        if manifest_id in ids:
+            return manifest_id
+        matches = [candidate for candidate in ids if candidate.startswith(manifest_id)]
+        if len(matches) != 1:
+            raise KeyError(f"找不到唯一匹配的备份: {manifest_id}（匹配 {len(matches)} 个）")
+        return matches[0]
+
+    def load_manifest(self, manifest_id: str) -> dict:
+        manifest_id = self.resolve(manifest_id)
+        with open(os.path.join(self.manifests_dir, f"{manifest_id}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def restore(self, manifest_id: str, paths: Optional[Iterable[str]] = None, dry_run: bool = False,
+                root: Optional[str] = None) -> List[str]:
+        """把文件恢复为清单中记录的内容，返回实际写回的路径（内容已一致的文件跳过）
+
+        相对路径默认相对于备份时的目录恢复；传入 root 时改为相对于 root（例如项目目录被移动或重命名后）。
+        """
+        manifest = self.load_manifest(manifest_id)
+        base = root if root is not None else manifest['root']
+        wanted = {os.path.normpath(path) for path in paths} if paths else None
+        restored = []
+        for rel_path, entry in manifest['files'].items():
+            if wanted is not None and os.path.normpath(rel_path) not in wanted:
+                continue
+            target = os.path.join(base, rel_path) if not os.path.isabs(rel_path) else rel_path
+            if os.path.isfile(target) and _hash_file(target) == entry['sha256']:
+                continue
+            restored.append(rel_path)
+            if dry_run:
+                continue
+            _atomic_copy(self._object_path(entry['sha256']), target)
+            os.chmod(target, entry['mode'])
+            os.utime(target, ns=(entry['mtime_ns'], entry['mtime_ns']))
+        return restored
+
+    def gc(self, keep: Optional[int] = None) -> int:
+        """删除多余的旧清单（keep 为保留的最新清单数）及不再被任何清单引用的对象，返回删除的对象数"""
+        ids = self.manifest_ids()
+        if keep is not None and len(ids) > keep:
+            for manifest_id in ids[:len(ids) - keep]:
+                os.remove(os.path.join(self.manifests_dir, f"{manifest_id}.json"))
+
+        referenced = set()
+        for manifest_id in self.manifest_ids():
+            referenced.update(entry['sha256'] for entry in self.load_manifest(manifest_id)['files'].values())
+
+        removed = 0
+        if os.path.isdir(self.objects_dir):
+            for prefix in os.listdir(self.objects_dir):
+                prefix_dir = os.path.join(self.objects_dir, prefix)
+                for digest in os.listdir(prefix_dir):
+                    if digest not in referenced:
+                        os.remove(os.path.join(prefix_dir, digest))
+                        removed += 1
+        return removed
+
+
+class Backup:
+    """一次备份操作：收集 路径 -> 对象哈希，save() 时写出清单"""
+
+    def __init__(self, store: BackupStore, operation: str, root: Optional[str] = None):
+        self.store = store
+        self.operation = operation
+        self.root = os.path.abspath(root) if root else os.getcwd()
+        self.created_ns = _next_created_ns()
+        self.created_at = datetime.fromtimestamp(self.created_ns / 10**9)
+        self.files: Dict[str, dict] = {}
+        self.manifest_id: Optional[str] = None
+
+    def _rel_path(self, path: str) -> str:
+        abs_path = os.path.abspath(path)
+        rel_path = os.path.relpath(abs_path, self.root)
+        return abs_path if rel_path.startswith(os.pardir) else rel_path
+
+    def add(self, path: str, content: Optional[str] = None, encoding: str = 'utf-8') -> str:
+        """加入一个文件；传入 content 时备份该内容（如改写前已读入内存的原文）而不是重新读取文件"""
+        stat = os.stat(path)
+        if content is None:
+            digest = self.store.put_file(path)
+        else:
+            digest = self.store.put_bytes(content.encode(encoding))
+        self.files[self._rel_path(path)] = {
+            'sha256': digest,
+            'size': stat.st_size,
+            'mode': stat.st_mode & 0o7777,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        return digest
+
+    def save(self) -> str:
+        """写出（或覆盖）本次备份的清单，返回清单编号；可在加入更多文件后再次调用"""
+        if self.manifest_id is None:
+            base_id = f"{self.created_at.strftime('%Y%m%d_%H%M%S')}_{self.operation}"
+            manifest_id = base_id
+            suffix = 1
+            while os.path.exists(os.path.join(self.store.manifests_dir, f"{manifest_id}.json")):
+                suffix += 1
+                manifest_id = f"{base_id}_{suffix}"
+            self.manifest_id = manifest_id
+
+        manifest = {
+            'id': self.manifest_id,
+            'operation': self.operation,
+            'created_at': self.created_at.isoformat(timespec='seconds'),
+            'created_ns': self.created_ns,
+            'root': self.root,
+            'files': self.files,
+        }
+        data = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        _atomic_write(os.path.join(self.store.manifests_dir, f"{self.manifest_id}.json"), data)
+        self.store._save_stat_cache()
+        return self.manifest_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description='内容寻址备份库')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help='备份库目录')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help='列出所有备份')
+
+    show_parser = subparsers.add_parser('show', help='显示备份中的文件')
+    show_parser.add_argument('backup', help='备份编号（或唯一前缀、latest）')
+
+    restore_parser = subparsers.add_parser('restore', help='恢复备份')
+    restore_parser.add_argument('backup', help='备份编号（或唯一前缀、latest）')
+    restore_parser.add_argument('paths', nargs='*', help='只恢复这些文件（默认全部）')
+    restore_parser.add_argument('--dry-run', action='store_true', help='只列出将被恢复的文件')
+
+    gc_parser = subparsers.add_parser('gc', help='清理不再被引用的对象')
+    gc_parser.add_argument('--keep', type=int, help='只保留最新的 N 个备份')
+
+    args = parser.parse_args()
+    store = BackupStore(args.store)
+
+    try:
+        if args.command == 'list':
+            ids = store.manifest_ids()
+            if not ids:
+                print("📭 备份库为空")
+            for manifest_id in ids:
+                manifest = store.load_manifest(manifest_id)
+                total = sum(entry['size'] for entry in manifest['files'].values())
+                print(f"{manifest_id}  {len(manifest['files'])} 个文件  {total} 字节")
+
+        elif args.command == 'show':
+            manifest = store.load_manifest(args.backup)
+            print(f"📦 {manifest['id']}（{manifest['operation']}，{manifest['created_at']}）")
+            for rel_path, entry in manifest['files'].items():
+                print(f"  {entry['sha256'][:12]}  {entry['size']:>10}  {rel_path}")
+
+        elif args.command == 'restore':
+            restored = store.restore(args.backup, args.paths, dry_run=args.dry_run)
+            action = "将恢复" if args.dry_run else "已恢复"
+            for rel_path in restored:
+                print(f"  ↩️  {rel_path}")
+            print(f"✅ {action} {len(restored)} 个文件")
+
+        elif args.command == 'gc':
+            removed = store.gc(keep=args.keep)
+            print(f"🧹 删除了 {removed} 个未引用的对象")
+
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,62 @@
 
 import os
 import sys
-import subprocess
 import json
 import platform
 import threading
 import time
+import sqlite3
 import yaml
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from build_scheduler import BuildScheduler, BuildStep, DurationHistory, StepStatus, detect_capacity
+from build_cache import BuildCache
+from build_log import PHASE_LABELS, BuildPhaseTracker, run_streamed_command
+from build_telemetry import DEFAULT_DB_PATH, TelemetryStore
+from toolchain_probe import NO_CACHE_ENV
+
+# 默认资源权重（可在 config/build_environments.yaml 的 build_scripts.resource_weights 中覆盖）
+DEFAULT_RESOURCE_WEIGHTS = {
+    "prerequisites": {"cpu": 1, "memory_gb": 1},
+    "android": {"cpu": 4, "memory_gb": 6},
+    "ios": {"cpu": 4, "memory_gb": 4},
+    "harmonyos": {"cpu": 2, "memory_gb": 4},
+    "web": {"cpu": 2, "memory_gb": 3},
+    "windows": {"cpu": 4, "memory_gb": 4},
+    "macos": {"cpu": 4, "memory_gb": 4},
+    "linux": {"cpu": 2, "memory_gb": 2},
+}
+
+# 各平台除共享输入（lib/、assets/、pubspec 等）外计入构建指纹的目录
+PLATFORM_INPUTS = {
+    "android": ["android"],
+    "ios": ["ios"],
+    "harmonyos": ["harmonyos", "ohos"],
+    "web": ["web"],
+    "windows": ["windows"],
+    "macos": ["macos"],
+    "linux": ["linux"],
+}
+
+# 构建失败时在结果和报告中保留的输出行数
+ERROR_TAIL_LINES = 30
+
+def run_logged_command(command: str, log_file: Path, cwd: Path,
+                       tracker: Optional[BuildPhaseTracker] = None) -> Tuple[bool, str]:
+    """运行命令并把输出逐行写入日志文件，返回 (是否成功, 最后若干行输出)"""
+    try:
+        success, tail = run_streamed_command(command, log_file, cwd, tracker)
+        return success, "\n".join(tail)
+    except Exception as e:
+        error_msg = f"命令执行异常: {e}"
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write(f"\n错误: {error_msg}\n")
+        return False, error_msg
+
 class PlatformType(Enum):
     ANDROID = "android"
     IOS = "ios"
@@ -50,10 +93,16 @@ class BuildResult:
     artifacts: List[str] = None
     error_message: Optional[str] = None
     log_file: Optional[str] = None
+    phase: Optional[str] = None  # 最后到达的构建阶段（pub_get / dart_compile / gradle / native_link / packaging / signing）
+    phase_durations: Dict[str, float] = None
+    output_tail: Optional[str] = None  # 失败时的最后若干行输出
+    cache_status: Optional[str] = None  # "hit"：从构建缓存恢复；"miss"：实际执行了构建
     
     def __post_init__(self):
         if self.artifacts is None:
             self.artifacts = []
+        if self.phase_durations is None:
+            self.phase_durations = {}
     
     @property
     def is_success(self) -> bool:
@@ -64,10 +113,12 @@ class BuildResult:
         return self.status == BuildStatus.FAILED
 
 class PlatformBuilder:
-    def __init__(self, platform: PlatformType, build_type: BuildType, project_root: Path):
+    def __init__(self, platform: PlatformType, build_type: BuildType, project_root: Path,
+                 cache: Optional[BuildCache] = None):
         self.platform = platform
         self.build_type = build_type
         self.project_root = project_root
+        self.cache = cache
         import platform as py_platform
         self.current_os = py_platform.system().lower()
         
@@ -164,32 +215,10 @@ class PlatformBuilder:
         
         return artifacts.get(self.platform, {}).get(self.build_type, [])
     
-    def run_command(self, command: str, log_file: Path) -> Tuple[bool, str]:
+    def run_command(self, command: str, log_file: Path,
+                    tracker: Optional[BuildPhaseTracker] = None) -> Tuple[bool, str]:
         """运行构建命令并记录日志"""
-        try:
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.write(f"构建命令: {command}\n")
-                f.write(f"开始时间: {datetime.now()}\n")
-                f.write("=" * 60 + "\n")
-                
-                result = subprocess.run(
-                    command, shell=True, cwd=self.project_root,
-                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                    text=True, encoding='utf-8', errors='ignore'
-                )
-                
-                f.write(result.stdout)
-                f.write("\n" + "=" * 60 + "\n")
-                f.write(f"结束时间: {datetime.now()}\n")
-                f.write(f"返回码: {result.returncode}\n")
-                
-                return result.returncode == 0, result.stdout
-                
-        except Exception as e:
-            error_msg = f"命令执行异常: {e}"
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(f"\n错误: {error_msg}\n")
-            return False, error_msg
+        return run_logged_command(command, log_file, self.project_root, tracker)
     
     def verify_artifacts(self) -> List[str]:
         """验证构建产物是否存在"""
@@ -227,30 +256,68 @@ class PlatformBuilder:
         log_file = logs_dir / f"{self.platform.value}_{self.build_type.value}_{int(time.time())}.log"
         result.log_file = str(log_file)
         
+        command = self.get_build_command()
+        
+        # 输入指纹命中构建缓存时直接恢复产物
+        cache_key = f"{self.platform.value}_{self.build_type.value}"
+        fingerprint = None
+        if self.cache is not None:
+            fingerprint = self.cache.fingerprint(PLATFORM_INPUTS.get(self.platform.value, []), command)
+            entry = self.cache.lookup(cache_key, fingerprint)
+            artifacts = []
+            if entry is not None:
+                try:
+                    self.cache.restore(entry)
+                    artifacts = self.verify_artifacts()
+                except (OSError, KeyError) as e:
+                    print(f"⚠️ {self.platform.value} 构建缓存恢复失败，重新构建: {e}")
+            # 恢复后找不到任何产物（缓存损坏或不完整）时视为未命中，重新构建
+            if artifacts:
+                result.status = BuildStatus.SUCCESS
+                result.cache_status = "hit"
+                result.artifacts = artifacts
+                result.end_time = datetime.now()
+                result.duration = (result.end_time - result.start_time).total_seconds()
+                with open(log_file, 'w', encoding='utf-8') as f:
+                    f.write(f"命令: {command}\n构建缓存命中（指纹 {fingerprint[:12]}），已恢复 {len(entry['artifacts'])} 个产物\n")
+                return result
+            result.cache_status = "miss"
+        
         # 开始构建
         result.status = BuildStatus.BUILDING
-        command = self.get_build_command()
         
-        success, output = self.run_command(command, log_file)
+        tracker = BuildPhaseTracker(self.platform.value.upper())
+        success, output = self.run_command(command, log_file, tracker)
         
         # 更新结果
         result.end_time = datetime.now()
         result.duration = (result.end_time - result.start_time).total_seconds()
+        result.phase = tracker.phase
+        result.phase_durations = tracker.finish()
         
         if success:
             result.status = BuildStatus.SUCCESS
             result.artifacts = self.verify_artifacts()
+            if fingerprint is not None and result.artifacts:
+                self.cache.save(cache_key, fingerprint, result.artifacts)
         else:
             result.status = BuildStatus.FAILED
-            result.error_message = "构建失败，查看日志文件获取详细信息"
+            if tracker.first_error:
+                result.error_message = f"构建失败（{PHASE_LABELS.get(tracker.phase, tracker.phase)}阶段）: {tracker.first_error}"
+            else:
+                result.error_message = "构建失败，查看日志文件获取详细信息"
+            result.output_tail = "\n".join(output.splitlines()[-ERROR_TAIL_LINES:])
         
         return result
 
 class MultiPlatformBuilder:
-    def __init__(self, project_root: Optional[Path] = None):
+    def __init__(self, project_root: Optional[Path] = None, use_cache: bool = True):
         self.project_root = project_root or Path.cwd()
         self.config = self.load_config()
         self.results: Dict[str, BuildResult] = {}
+        self.shared_steps: Dict[str, BuildStep] = {}
+        self.cache = BuildCache(self.project_root) if use_cache else None
+        self.telemetry = TelemetryStore(self.project_root / DEFAULT_DB_PATH)
         
     def load_config(self) -> Dict[str, Any]:
         """加载构建配置"""
@@ -281,63 +348,161 @@ class MultiPlatformBuilder:
     
     def build_platform(self, platform: PlatformType, build_type: BuildType) -> BuildResult:
         """构建单个平台"""
-        builder = PlatformBuilder(platform, build_type, self.project_root)
-        return builder.build()
+        builder = PlatformBuilder(platform, build_type, self.project_root, cache=self.cache)
+        result = builder.build()
+        # 只记录实际执行的构建（缓存命中和跳过的构建不反映构建耗时）
+        if result.status in (BuildStatus.SUCCESS, BuildStatus.FAILED) and result.cache_status != "hit":
+            try:
+                self.telemetry.record_build(platform.value, build_type.value, result.start_time,
+                                            result.duration or 0.0, result.is_success,
+                                            result.phase_durations, builder.get_build_command())
+            except sqlite3.Error as e:
+                print(f"⚠️ 无法记录构建遥测: {e}")
+        return result
+    
+    def get_resource_capacity(self) -> Dict[str, float]:
+        """调度容量：配置中为 auto 或未配置的资源按本机检测结果"""
+        detected = detect_capacity()
+        configured = self.config.get('build_scripts', {}).get('resources', {}) or {}
+        capacity = {}
+        for resource in set(detected) | set(configured):
+            value = configured.get(resource, 'auto')
+            if value == 'auto':
+                if resource in detected:
+                    capacity[resource] = detected[resource]
+            else:
+                capacity[resource] = float(value)
+        return capacity
+    
+    def get_resource_weights(self, name: str) -> Dict[str, float]:
+        """构建步骤（平台名或 prerequisites）的资源权重"""
+        configured = self.config.get('build_scripts', {}).get('resource_weights', {}) or {}
+        weights = dict(DEFAULT_RESOURCE_WEIGHTS.get(name, {}))
+        weights.update(configured.get(name, {}) or {})
+        return {resource: float(amount) for resource, amount in weights.items()}
+    
+    def get_shared_steps(self) -> List[Tuple[str, str, List[str]]]:
+        """所有平台共享、只需执行一次的前置步骤：(步骤名, 命令, 依赖)"""
+        steps = []
+        version_script = self.project_root / "scripts" / "generate_version_info.py"
+        if version_script.exists():
+            steps.append(("version_info", f'"{sys.executable}" "{version_script}"', []))
+        
+        # 版本信息会改写 pubspec.yaml，依赖获取需在其后执行
+        steps.append(("pub_get", "flutter pub get", [name for name, _, _ in steps]))
+        
+        if (self.project_root / "l10n.yaml").exists():
+            steps.append(("gen_l10n", "flutter gen-l10n", ["pub_get"]))
+        
+        return steps
+    
+    def run_shared_step(self, name: str, command: str) -> bool:
+        """执行一个共享前置步骤"""
+        logs_dir = self.project_root / "build_logs"
+        logs_dir.mkdir(exist_ok=True)
+        log_file = logs_dir / f"{name}_{int(time.time())}.log"
+        success, _ = run_logged_command(command, log_file, self.project_root)
+        self.shared_steps[name].error_message = None if success else f"执行失败，日志: {log_file}"
+        return success
     
     def build_platforms_parallel(self, platforms: List[PlatformType], 
-                                build_type: BuildType, max_workers: int = 3) -> Dict[str, BuildResult]:
-        """并行构建多个平台"""
+                                build_type: BuildType, max_workers: int = 3,
+                                run_prerequisites: bool = True) -> Dict[str, BuildResult]:
+        """按依赖关系和资源权重并行构建多个平台
+        
+        共享前置步骤只执行一次，全部成功后才开始平台构建；
+        平台构建按历史耗时关键路径优先，并受 CPU/内存容量和最大并行数限制。
+        """
         results = {}
+        capacity = self.get_resource_capacity()
+        history = DurationHistory(self.project_root / "build_logs" / "step_durations.json")
         
         print(f"🔨 开始并行构建 {len(platforms)} 个平台...")
         print(f"📦 构建类型: {build_type.value}")
         print(f"⚡ 最大并行数: {max_workers}")
+        print("🧮 资源容量: " + ", ".join(f"{k}={v:g}" for k, v in sorted(capacity.items())))
         print("=" * 60)
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交构建任务
-            future_to_platform = {
-                executor.submit(self.build_platform, platform, build_type): platform
-                for platform in platforms
-            }
+        steps = []
+        shared_names = []
+        if run_prerequisites:
+            for name, command, depends_on in self.get_shared_steps():
+                step = BuildStep(
+                    name=name,
+                    action=lambda name=name, command=command: self.run_shared_step(name, command),
+                    depends_on=depends_on,
+                    weights=self.get_resource_weights("prerequisites"),
+                )
+                self.shared_steps[name] = step
+                steps.append(step)
+                shared_names.append(name)
+        
+        platform_of = {}
+        for platform_type in platforms:
+            key = f"{platform_type.value}_{build_type.value}"
+            platform_of[key] = platform_type
             
-            # 收集结果
-            for future in as_completed(future_to_platform):
-                platform = future_to_platform[future]
-                try:
-                    result = future.result()
-                    results[f"{platform.value}_{build_type.value}"] = result
-                    
-                    # 显示构建结果
-                    status_icon = {
-                        BuildStatus.SUCCESS: "✅",
-                        BuildStatus.FAILED: "❌",
-                        BuildStatus.SKIPPED: "⏭️"
-                    }.get(result.status, "❓")
-                    
-                    duration_str = f"({result.duration:.1f}s)" if result.duration else ""
-                    print(f"{status_icon} {platform.value.upper()} {build_type.value}: {result.status.value} {duration_str}")
-                    
-                    if result.error_message:
-                        print(f"   💬 {result.error_message}")
-                    
-                    if result.artifacts:
-                        print(f"   📁 产物: {len(result.artifacts)} 个文件")
-                    
-                except Exception as e:
-                    print(f"❌ {platform.value.upper()} 构建异常: {e}")
-                    results[f"{platform.value}_{build_type.value}"] = BuildResult(
-                        platform=platform,
-                        build_type=build_type,
-                        status=BuildStatus.FAILED,
-                        error_message=str(e)
-                    )
+            def build_action(platform_type=platform_type, key=key):
+                result = self.build_platform(platform_type, build_type)
+                results[key] = result
+                return result.status != BuildStatus.FAILED
+            
+            steps.append(BuildStep(
+                name=key,
+                action=build_action,
+                depends_on=list(shared_names),
+                weights=self.get_resource_weights(platform_type.value),
+            ))
+        
+        def on_finish(step: BuildStep):
+            if step.name in self.shared_steps:
+                icon = {StepStatus.SUCCESS: "✅", StepStatus.FAILED: "❌"}.get(step.status, "⏭️")
+                duration_str = f"({step.duration:.1f}s)" if step.duration else ""
+                print(f"{icon} 前置步骤 {step.name}: {step.status.value} {duration_str}")
+                if step.error_message:
+                    print(f"   💬 {step.error_message}")
+                return
+            
+            platform_type = platform_of[step.name]
+            result = results.get(step.name)
+            if result is None:
+                # 构建未执行（前置步骤失败）或执行时抛出异常
+                result = BuildResult(
+                    platform=platform_type,
+                    build_type=build_type,
+                    status=BuildStatus.SKIPPED if step.status == StepStatus.SKIPPED else BuildStatus.FAILED,
+                    error_message=step.error_message
+                )
+                results[step.name] = result
+            
+            # 显示构建结果
+            status_icon = {
+                BuildStatus.SUCCESS: "✅",
+                BuildStatus.FAILED: "❌",
+                BuildStatus.SKIPPED: "⏭️"
+            }.get(result.status, "❓")
+            
+            duration_str = f"({result.duration:.1f}s)" if result.duration else ""
+            cache_str = " [缓存命中]" if result.cache_status == "hit" else ""
+            print(f"{status_icon} {platform_type.value.upper()} {build_type.value}: {result.status.value} {duration_str}{cache_str}")
+            
+            if result.error_message:
+                print(f"   💬 {result.error_message}")
+            
+            if result.artifacts:
+                print(f"   📁 产物: {len(result.artifacts)} 个文件")
         
-        return results
+        scheduler = BuildScheduler(steps, capacity=capacity, max_parallel=max_workers,
+                                   history=history, on_finish=on_finish)
+        scheduler.run()
+        
+        # 按平台顺序返回结果
+        return {key: results[key] for key in platform_of if key in results}
     
     def build_all(self, build_type: BuildType = BuildType.DEBUG, 
                   platforms: Optional[List[str]] = None,
-                  max_workers: int = 3) -> Dict[str, BuildResult]:
+                  max_workers: Optional[int] = None,
+                  run_prerequisites: bool = True) -> Dict[str, BuildResult]:
         """构建所有或指定平台"""
         
         # 确定要构建的平台
@@ -352,8 +517,13 @@ class MultiPlatformBuilder:
         
         print(f"🎯 目标平台: {[p.value for p in target_platforms]}")
         
+        # 最大并行数默认取配置 build_scripts.max_parallel
+        if max_workers is None:
+            build_scripts = self.config.get('build_scripts', {})
+            max_workers = build_scripts.get('max_parallel', 3) if build_scripts.get('parallel_builds', True) else 1
+        
         # 执行并行构建
-        results = self.build_platforms_parallel(target_platforms, build_type, max_workers)
+        results = self.build_platforms_parallel(target_platforms, build_type, max_workers, run_prerequisites)
         
         # 保存结果
         self.results.update(results)
@@ -378,8 +548,22 @@ class MultiPlatformBuilder:
         report.append(f"- 成功: {successful_builds}")
         report.append(f"- 失败: {failed_builds}")
         report.append(f"- 跳过: {skipped_builds}")
+        cache_hits = sum(1 for r in results.values() if r.cache_status == "hit")
+        cache_misses = sum(1 for r in results.values() if r.cache_status == "miss")
+        if cache_hits or cache_misses:
+            report.append(f"- 构建缓存: 命中 {cache_hits}，未命中 {cache_misses}")
         report.append("")
         
+        # 共享前置步骤
+        if self.shared_steps:
+            report.append("## 🧱 前置步骤")
+            for name, step in self.shared_steps.items():
+                duration_str = f" ({step.duration:.1f}秒)" if step.duration else ""
+                report.append(f"- {name}: {step.status.value}{duration_str}")
+                if step.error_message:
+                    report.append(f"  - {step.error_message}")
+            report.append("")
+        
         # 详细结果
         report.append("## 📋 构建详情")
         for key, result in results.items():
@@ -395,6 +579,13 @@ class MultiPlatformBuilder:
             if result.duration:
                 report.append(f"- 构建时间: {result.duration:.1f}秒")
             
+            if result.cache_status:
+                report.append(f"- 构建缓存: {'命中' if result.cache_status == 'hit' else '未命中'}")
+            
+            if result.phase_durations:
+                phases = ", ".join(f"{PHASE_LABELS.get(phase, phase)} {seconds:.1f}秒" for phase, seconds in result.phase_durations.items())
+                report.append(f"- 阶段耗时: {phases}")
+            
             if result.artifacts:
                 report.append(f"- 构建产物:")
                 for artifact in result.artifacts:
@@ -406,6 +597,12 @@ class MultiPlatformBuilder:
             if result.log_file:
                 report.append(f"- 日志文件: {result.log_file}")
             
+            if result.output_tail:
+                report.append("- 输出末尾:")
+                report.append("```")
+                report.append(result.output_tail)
+                report.append("```")
+            
             report.append("")
         
         # 构建产物汇总
@@ -471,8 +668,23 @@ def main():
     parser.add_argument(
         "--max-workers", "-w",
         type=int,
-        default=3,
-        help="最大并行构建数（默认：3）"
+        default=None,
+        help="最大并行构建数（默认：配置中的 build_scripts.max_parallel，未配置时为 3）"
+    )
+    parser.add_argument(
+        "--skip-prerequisites",
+        action="store_true",
+        help="跳过共享前置步骤（版本信息、flutter pub get、本地化生成）"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不使用构建缓存（总是重新构建，也不保存产物到 .build_cache/）"
+    )
+    parser.add_argument(
+        "--no-probe-cache",
+        action="store_true",
+        help="忽略工具链探测缓存，重新执行环境检查中的所有探测命令"
     )
     parser.add_argument(
         "--report", "-r",
@@ -487,7 +699,11 @@ def main():
     
     args = parser.parse_args()
     
-    builder = MultiPlatformBuilder()
+    if args.no_probe_cache:
+        # 通过环境变量传递，各平台构建器（包括子进程）都不再使用磁盘上的探测结果
+        os.environ[NO_CACHE_ENV] = "1"
+    
+    builder = MultiPlatformBuilder(use_cache=not args.no_cache)
     
     try:
         # 清理旧日志
@@ -499,7 +715,8 @@ def main():
         results = builder.build_all(
             build_type=build_type,
             platforms=args.platforms,
-            max_workers=args.max_workers
+            max_workers=args.max_workers,
+            run_prerequisites=not args.skip_prerequisites
         )
         
         if not results:
@@ -521,7 +738,11 @@ def main():
         print(f"❌ 失败: {failed_count}")
         print(f"⏭️ 跳过: {skipped_count}")
         
-        if failed_count > 0:
+        failed_steps = [name for name, step in builder.shared_steps.items() if step.status == StepStatus.FAILED]
+        if failed_steps:
+            print(f"\n⚠️ 前置步骤失败: {', '.join(failed_steps)}，请查看构建报告和日志文件")
+            sys.exit(1)
+        elif failed_count > 0:
             print(f"\n⚠️ {failed_count} 个平台构建失败，请查看构建报告和日志文件")
             sys.exit(1)
         else:
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+平台构建缓存
+对影响构建结果的输入（lib/、assets/、pubspec、平台目录、版本文件、Flutter 版本、构建命令）计算指纹，
+构建成功后把构建产物按 平台_构建类型 + 指纹 存入内容寻址存储；再次构建时指纹命中则直接恢复产物，
+无需重新执行 flutter build（例如只修改了文档时）
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from backup_store import BackupStore, cached_digest, stat_cache_entry
+
+DEFAULT_CACHE_DIR = ".build_cache"
+
+# 指纹格式版本，计算方式变化时递增以使旧缓存失效
+FINGERPRINT_VERSION = 2
+
+# 所有平台共享的构建输入（相对项目根目录，目录会递归计入）；
+# version.json 不计入：每次构建前的 version_info 步骤都会重写其中的 build_time，
+# 而其中的版本号已由 version.yaml 和 pubspec.yaml 体现
+SHARED_INPUTS = [
+    "lib",
+    "assets",
+    "pubspec.yaml",
+    "pubspec.lock",
+    "l10n.yaml",
+    "version.yaml",
+]
+
+# 平台目录中属于构建输出或工具缓存的子目录，不计入指纹
+IGNORED_DIR_NAMES = {
+    "build", ".gradle", ".cxx", ".dart_tool", "Pods", "ephemeral",
+    ".symlinks", "DerivedData", "node_modules", "oh_modules", ".hvigor",
+}
+
+
+class BuildCache:
+    """按输入指纹缓存平台构建产物
+
+    缓存目录结构：objects/ 与 manifests/ 为内容寻址存储（相同文件只存一份），
+    index.json 记录 缓存键 -> {指纹: {manifest, artifacts}}，每个缓存键保留最近 keep 个指纹。
+    """
+
+    def __init__(self, project_root: Path, cache_dir: Optional[Path] = None, keep: int = 3):
+        self.project_root = Path(project_root)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.project_root / DEFAULT_CACHE_DIR
+        self.keep = keep
+        self.store = BackupStore(str(self.cache_dir))
+        self.index_path = self.cache_dir / "index.json"
+        self.hash_cache_path = self.cache_dir / "input_hashes.json"
+        self._lock = threading.RLock()
+        self._flutter_version: Optional[str] = None
+        self._hash_cache: Optional[Dict[str, list]] = None
+
+    # 指纹
+
+    def flutter_version(self) -> str:
+        """Flutter 框架与 Dart SDK 版本（每个进程只查询一次）"""
+        with self._lock:
+            if self._flutter_version is None:
+                try:
+                    result = subprocess.run(
+                        "flutter --version --machine", shell=True, cwd=self.project_root,
+                        capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=120
+                    )
+                    info = json.loads(result.stdout[result.stdout.index('{'):])
+                    self._flutter_version = "{}/{}/{}".format(
+                        info.get('frameworkVersion'), info.get('frameworkRevision'), info.get('dartSdkVersion')
+                    )
+                except (OSError, ValueError, subprocess.SubprocessError):
+                    self._flutter_version = "unknown"
+            return self._flutter_version
+
+    def _load_hash_cache(self) -> Dict[str, list]:
+        if self._hash_cache is None:
+            try:
+                with open(self.hash_cache_path, 'r', encoding='utf-8') as f:
+                    self._hash_cache = json.load(f)
+            except (OSError, ValueError):
+                self._hash_cache = {}
+        return self._hash_cache
+
+    def _file_hash(self, path: Path) -> str:
+        """文件内容哈希；统计信息未变且记录时文件已稳定（见 backup_store.cached_digest）时复用上次的结果"""
+        stat = path.stat()
+        key = str(path)
+        cache = self._load_hash_cache()
+        cached = cached_digest(cache.get(key), stat)
+        if cached:
+            return cached
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        cache[key] = stat_cache_entry(stat, digest.hexdigest())
+        return cache[key][2]
+
+    def _input_files(self, inputs: Iterable[str], skip_ignored: bool = True) -> List[Path]:
+        """展开文件与目录（递归）为文件列表，顺序固定"""
+        files = []
+        for relative in inputs:
+            path = self.project_root / relative
+            if path.is_file():
+                files.append(path)
+            elif path.is_dir():
+                for directory, dir_names, file_names in os.walk(path):
+                    dir_names[:] = sorted(
+                        name for name in dir_names if not (skip_ignored and name in IGNORED_DIR_NAMES)
+                    )
+                    files.extend(Path(directory) / name for name in sorted(file_names))
+        return files
+
+    def _contains_symlink(self, paths: Iterable[str]) -> bool:
+        """路径本身或其下是否有符号链接（os.walk 不会进入指向目录的链接，需单独检查 dir_names）"""
+        for relative in paths:
+            path = self.project_root / relative
+            if path.is_symlink():
+                return True
+            for directory, dir_names, file_names in os.walk(path):
+                if any(os.path.islink(os.path.join(directory, name)) for name in dir_names + file_names):
+                    return True
+        return False
+
+    def fingerprint(self, platform_inputs: Iterable[str], command: str) -> str:
+        """构建输入指纹：共享输入 + 平台输入的 相对路径与内容哈希，以及 Flutter 版本和构建命令"""
+        digest = hashlib.sha256()
+        digest.update(f"v{FINGERPRINT_VERSION}\0{self.flutter_version()}\0{command}\0".encode('utf-8'))
+        with self._lock:
+            for path in self._input_files(list(SHARED_INPUTS) + list(platform_inputs)):
+                relative = path.relative_to(self.project_root).as_posix()
+                digest.update(f"{relative}\0{self._file_hash(path)}\0".encode('utf-8'))
+            self._save_json(self.hash_cache_path, self._hash_cache or {})
+        return digest.hexdigest()
+
+    # 索引
+
+    def _load_index(self) -> Dict[str, Dict[str, dict]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_json(self, path: Path, data) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # 查找、恢复与存储
+
+    def lookup(self, cache_key: str, fingerprint: str) -> Optional[dict]:
+        with self._lock:
+            return self._load_index().get(cache_key, {}).get(fingerprint)
+
+    def restore(self, entry: dict) -> List[str]:
+        """恢复缓存的构建产物，返回产物路径（目录产物会先清空，避免残留旧文件）
+
+        产物按相对路径恢复到当前项目目录，项目目录被移动或在其他路径检出时也不会写到原来的位置。
+        """
+        with self._lock:
+            for artifact in entry['artifacts']:
+                path = self.project_root / artifact
+                if path.is_dir():
+                    shutil.rmtree(path)
+            self.store.restore(entry['manifest'], root=str(self.project_root))
+            return list(entry['artifacts'])
+
+    def save(self, cache_key: str, fingerprint: str, artifacts: List[str]) -> Optional[str]:
+        """把构建产物（文件或目录）存入缓存，返回清单编号
+
+        没有任何产物文件，或产物中包含符号链接（文件或目录，如 macOS .app 中 framework 的 Versions/Current，
+        恢复后无法保持链接）时不缓存。
+        """
+        with self._lock:
+            if self._contains_symlink(artifacts):
+                return None
+            files = self._input_files(artifacts, skip_ignored=False)
+            if not files:
+                return None
+            backup = self.store.begin(cache_key, root=str(self.project_root))
+            for path in files:
+                backup.add(str(path))
+            manifest_id = backup.save()
+
+            index = self._load_index()
+            entries = index.setdefault(cache_key, {})
+            entries.pop(fingerprint, None)
+            entries[fingerprint] = {'manifest': manifest_id, 'artifacts': list(artifacts)}
+            # 只保留最近的若干个指纹，并清理不再被引用的对象
+            stale = list(entries)[:-self.keep] if len(entries) > self.keep else []
+            for old in stale:
+                old_manifest = entries.pop(old)['manifest']
+                manifest_path = Path(self.store.manifests_dir) / f"{old_manifest}.json"
+                if manifest_path.exists():
+                    manifest_path.unlink()
+            self._save_json(self.index_path, index)
+            if stale:
+                self.store.gc()
+            return manifest_id
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+构建号历史存储
+构建历史保存在项目根目录的 SQLite 数据库中（按日期和序号建立索引），不再每次整体读写 build_history.json：
+分配构建号时在写事务（BEGIN IMMEDIATE）中查询当天最大序号并插入记录，
+多个平台并行构建同时申请构建号也不会拿到相同的 YYYYMMDDXXX；
+最近记录、回滚等查询都走索引，历史增长到多年的 CI 构建也保持 O(log n)。
+数据库不纳入版本控制，历史只记录本机的构建；当天序号同时以 version.yaml 中已提交的构建号为下限，
+拉取了其他机器提交的构建号后不会再分配出相同或更小的序号。
+首次使用时自动导入旧的 build_history.json（如本地仍有）。
+"""
+
+import re
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+DEFAULT_DB_NAME = "build_history.db"
+LEGACY_JSON_NAME = "build_history.json"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build_number TEXT NOT NULL,
+    build_date TEXT,
+    sequence INTEGER,
+    previous_build TEXT,
+    timestamp TEXT NOT NULL,
+    strategy TEXT
+);
+CREATE INDEX IF NOT EXISTS builds_by_date ON builds (build_date, sequence);
+"""
+
+# YYYYMMDDXXX 格式的构建号：日期 + 序号
+DATED_BUILD_NUMBER = re.compile(r'^(\d{8})(\d{3,})$')
+
+
+def split_build_number(build_number: str) -> Tuple[Optional[str], Optional[int]]:
+    """把 YYYYMMDDXXX 构建号拆成 (日期, 序号)；其他格式（如时间戳）返回 (None, None)"""
+    match = DATED_BUILD_NUMBER.match(str(build_number))
+    if not match:
+        return None, None
+    return match.group(1), int(match.group(2))
+
+
+class BuildHistoryStore:
+    """构建号历史（每次操作单独连接；写操作在 SQLite 写锁内完成，可跨进程并发使用）"""
+
+    def __init__(self, db_path: Union[str, Path], legacy_json: Optional[Union[str, Path]] = None):
+        self.db_path = Path(db_path)
+        self.legacy_json = Path(legacy_json) if legacy_json else None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None：事务由下面显式的 BEGIN IMMEDIATE 控制
+        connection = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._initialize(connection)
+        return connection
+
+    def _initialize(self, connection: sqlite3.Connection) -> None:
+        """建表并导入旧的 JSON 历史（在写锁内再次检查，避免多个进程重复导入）"""
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                for statement in SCHEMA.split(';'):
+                    if statement.strip():
+                        connection.execute(statement)
+                if self.legacy_json and self.legacy_json.exists():
+                    self._import_legacy(connection)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _import_legacy(self, connection: sqlite3.Connection) -> None:
+        try:
+            with open(self.legacy_json, 'r', encoding='utf-8') as f:
+                builds = json.load(f).get('builds', [])
+        except (OSError, ValueError) as e:
+            print(f"警告: 无法导入旧的构建历史 {self.legacy_json}: {e}")
+            return
+        for build in builds:
+            build_number = str(build.get('build_number', ''))
+            if build_number:
+                self._insert(connection, build_number, build.get('previous_build'),
+                             build.get('strategy'), build.get('timestamp'))
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, build_number: str, previous_build: Optional[str],
+                strategy: Optional[str], timestamp: Optional[str] = None) -> int:
+        build_date, sequence = split_build_number(build_number)
+        cursor = connection.execute(
+            "INSERT INTO builds (build_number, build_date, sequence, previous_build, timestamp, strategy)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (build_number, build_date, sequence, previous_build,
+             timestamp or datetime.now().isoformat(), strategy)
+        )
+        return cursor.lastrowid
+
+    def _write(self, operation: Callable[[sqlite3.Connection], object]):
+        """在写事务中执行操作（BEGIN IMMEDIATE 立即取得写锁，其他进程的写操作排队等待）"""
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(connection)
+                connection.execute("COMMIT")
+                return result
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        finally:
+            connection.close()
+
+    # 分配与记录
+
+    def allocate_daily(self, date_part: str, previous_build: Optional[str], strategy: str = 'auto') -> Tuple[int, str]:
+        """分配当天下一个构建号 YYYYMMDDXXX 并记录，返回 (记录编号, 构建号)
+
+        序号大于本机历史中当天的最大序号，也大于 previous_build（通常为 version.yaml 中的构建号）当天的序号。
+        """
+        previous_date, previous_sequence = split_build_number(previous_build or '')
+        floor = previous_sequence if previous_date == date_part else 0
+
+        def allocate(connection):
+            row = connection.execute(
+                "SELECT MAX(sequence) FROM builds WHERE build_date = ?", (date_part,)
+            ).fetchone()
+            build_number = f"{date_part}{max(row[0] or 0, floor) + 1:03d}"
+            return self._insert(connection, build_number, previous_build, strategy), build_number
+        return self._write(allocate)
+
+    def allocate_increment(self, previous_build: Optional[str], fallback: Callable[[], str],
+                           strategy: str = 'increment') -> Tuple[int, str]:
+        """在上一条记录的构建号上加一并记录；没有记录或无法解析时使用 fallback() 的结果"""
+        def allocate(connection):
+            row = connection.execute("SELECT build_number FROM builds ORDER BY id DESC LIMIT 1").fetchone()
+            try:
+                build_number = str(int(row['build_number']) + 1) if row else fallback()
+            except ValueError:
+                build_number = fallback()
+            return self._insert(connection, build_number, previous_build, strategy), build_number
+        return self._write(allocate)
+
+    def record(self, build_number: str, previous_build: Optional[str], strategy: Optional[str]) -> int:
+        """记录一个指定的构建号，返回记录编号"""
+        return self._write(lambda connection: self._insert(connection, build_number, previous_build, strategy))
+
+    def discard(self, build_id: int) -> None:
+        """删除一条记录（构建号分配后未能写入版本配置时使用）"""
+        self._write(lambda connection: connection.execute("DELETE FROM builds WHERE id = ?", (build_id,)))
+
+    # 查询
+
+    def recent(self, limit: int = 10) -> List[dict]:
+        """最近的 limit 条记录，按时间先后排列"""
+        connection = self._connect()
+        try:
+            rows = connection.execute("SELECT * FROM builds ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+            return [dict(row) for row in reversed(rows)]
+        finally:
+            connection.close()
+
+    def count(self) -> int:
+        connection = self._connect()
+        try:
+            return connection.execute("SELECT COUNT(*) FROM builds").fetchone()[0]
+        finally:
+            connection.close()
+
+    def rollback_target(self, steps: int = 1) -> Optional[dict]:
+        """回滚 steps 步后的最新记录（不修改历史）；记录不足 steps + 1 条时返回 None"""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT * FROM builds ORDER BY id DESC LIMIT ?", (steps + 1,)
+            ).fetchall()
+            return dict(rows[steps]) if len(rows) == steps + 1 else None
+        finally:
+            connection.close()
+
+    def truncate_after(self, build_id: int) -> int:
+        """删除编号为 build_id 的记录之后的所有记录（回滚），返回删除的条数"""
+        return self._write(
+            lambda connection: connection.execute("DELETE FROM builds WHERE id > ?", (build_id,)).rowcount
+        )
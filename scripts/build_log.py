@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+构建日志流式采集
+逐行读取构建命令输出并立即写入日志文件，只在内存中保留最近若干行（环形缓冲）用于错误摘要；
+同时按输出识别构建阶段（依赖获取、Dart 编译、Gradle、原生编译链接、打包、签名），实时打印阶段变化和第一条错误，
+即使并行构建产生数百 MB 的 Gradle/Xcode 输出，内存占用也保持不变
+"""
+
+import re
+import sys
+import time
+import subprocess
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# 环形缓冲保留的输出行数
+TAIL_LINES = 200
+
+# 构建阶段及识别规则：某行匹配某阶段时进入该阶段（同一行匹配多个阶段时取靠前的）；
+# Gradle/Xcode 会在原生构建过程中调用 Dart 编译，阶段可以来回切换，耗时按阶段累计
+BUILD_PHASES = [
+    ("pub_get", re.compile(
+        r'Running "flutter pub get"|Resolving dependencies|Downloading packages|Got dependencies'
+        r'|npm install|ohpm install'
+    )),
+    ("dart_compile", re.compile(
+        r'Compiling lib/main\.dart|kernel_snapshot|dart2js|dart2wasm|Building App\.framework|gen_snapshot'
+    )),
+    ("gradle", re.compile(
+        r'Running Gradle task|^> Task :'
+    )),
+    ("native_link", re.compile(
+        r'Building (?:Windows|macOS|Linux) application|Running pod install|Running Xcode build|xcodebuild'
+        r'|Linking (?:CXX|C) |\bld: |MSBuild|hvigor'
+    )),
+    ("packaging", re.compile(
+        r'✓ Built |Built build/|Building IPA|Archiving|Exporting|Packaging|appimagetool|dpkg-deb|rpmbuild'
+        r'|makeappx|create-dmg'
+    )),
+    ("signing", re.compile(
+        r'Signing|signtool|codesign|apksigner|jarsigner|hap-sign'
+    )),
+]
+
+PHASE_LABELS = {
+    "start": "启动",
+    "pub_get": "依赖获取",
+    "dart_compile": "Dart 编译",
+    "gradle": "Gradle 任务",
+    "native_link": "原生编译链接",
+    "packaging": "打包",
+    "signing": "签名",
+}
+
+ERROR_PATTERN = re.compile(
+    r'^(?:FAILURE:|BUILD FAILED|Error:|Exception:|Unhandled exception)|: Error: |\berror:|Target \S+ failed'
+)
+
+
+class BuildPhaseTracker:
+    """按输出行跟踪构建阶段和各阶段耗时
+
+    label 为实时输出的前缀（如平台名）；live 为 False 时不打印进度。
+    """
+
+    def __init__(self, label: str = "", live: bool = True):
+        self.label = label
+        self.live = live
+        self.started_at = time.time()
+        self.phase = "start"
+        self._phase_started_at = self.started_at
+        self._phase_durations: Dict[str, float] = {}
+        self.line_count = 0
+        self.first_error: Optional[str] = None
+
+    def _prefix(self) -> str:
+        return f"[{self.label}] " if self.label else ""
+
+    def _enter(self, phase: str) -> None:
+        now = time.time()
+        self._phase_durations[self.phase] = self._phase_durations.get(self.phase, 0.0) + now - self._phase_started_at
+        self.phase = phase
+        self._phase_started_at = now
+        if self.live:
+            print(f"   🔄 {self._prefix()}{PHASE_LABELS.get(phase, phase)}（{now - self.started_at:.1f}s）")
+
+    def feed(self, line: str) -> None:
+        """处理一行输出"""
+        self.line_count += 1
+        for phase, pattern in BUILD_PHASES:
+            if pattern.search(line):
+                if phase != self.phase:
+                    self._enter(phase)
+                break
+        if self.first_error is None and ERROR_PATTERN.search(line):
+            self.first_error = line.strip()
+            if self.live:
+                print(f"   ❗ {self._prefix()}{self.first_error}")
+
+    def finish(self) -> Dict[str, float]:
+        """结束计时，返回 阶段 -> 耗时（秒），按阶段出现顺序"""
+        now = time.time()
+        self._phase_durations[self.phase] = self._phase_durations.get(self.phase, 0.0) + now - self._phase_started_at
+        self._phase_started_at = now
+        return dict(self._phase_durations)
+
+
+def run_streamed_command(command: Union[str, Sequence[str]], log_file: Path, cwd: Path,
+                         tracker: Optional[BuildPhaseTracker] = None,
+                         tail_lines: int = TAIL_LINES, echo: bool = False) -> Tuple[bool, List[str]]:
+    """运行命令，输出逐行写入日志文件，返回 (是否成功, 最后 tail_lines 行输出)
+
+    command 为字符串时通过 shell 执行，为列表时直接执行；echo 为 True 时同时把输出打印到终端。
+    """
+    tail = deque(maxlen=tail_lines)
+    shell = isinstance(command, str)
+    # 行缓冲：每行写入后立即落盘，构建过程中即可查看日志
+    with open(log_file, 'w', encoding='utf-8', buffering=1) as f:
+        f.write(f"构建命令: {command if shell else ' '.join(command)}\n")
+        f.write(f"开始时间: {datetime.now()}\n")
+        f.write("=" * 60 + "\n")
+        try:
+            process = subprocess.Popen(
+                command, shell=shell, cwd=cwd,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, encoding='utf-8', errors='ignore'
+            )
+        except Exception as e:
+            error_msg = f"命令执行异常: {e}"
+            f.write(f"\n错误: {error_msg}\n")
+            return False, [error_msg]
+
+        try:
+            for line in process.stdout:
+                f.write(line)
+                if echo:
+                    sys.stdout.write(line)
+                    sys.stdout.flush()
+                tail.append(line.rstrip('\n'))
+                if tracker is not None:
+                    tracker.feed(line)
+            returncode = process.wait()
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            process.stdout.close()
+
+        f.write("\n" + "=" * 60 + "\n")
+        f.write(f"结束时间: {datetime.now()}\n")
+        f.write(f"返回码: {returncode}\n")
+    return returncode == 0, list(tail)
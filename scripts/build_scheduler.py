@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+构建步骤调度器
+把构建过程描述为有向无环图：共享的前置步骤（依赖获取、本地化生成、版本信息）只执行一次，
+平台构建在前置步骤完成后按资源权重（CPU、内存）并行调度；每个步骤的耗时会被记录，
+之后的运行优先启动关键路径最长的步骤，缩短整体构建时间
+"""
+
+import os
+import json
+import time
+import threading
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# 没有历史耗时记录时使用的估计值（秒）
+DEFAULT_ESTIMATE = 60.0
+
+# 新耗时在滑动平均中的权重
+DURATION_SMOOTHING = 0.5
+
+
+class StepStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+@dataclass
+class BuildStep:
+    """一个构建步骤
+
+    action 返回 True 表示成功；weights 为该步骤运行时占用的资源（如 {"cpu": 4, "memory_gb": 6}）。
+    """
+    name: str
+    action: Callable[[], bool]
+    depends_on: List[str] = field(default_factory=list)
+    weights: Dict[str, float] = field(default_factory=dict)
+    status: StepStatus = StepStatus.PENDING
+    duration: Optional[float] = None
+    error_message: Optional[str] = None
+
+
+def detect_capacity() -> Dict[str, float]:
+    """检测本机可用于构建的资源总量"""
+    capacity = {"cpu": float(os.cpu_count() or 1)}
+    try:
+        capacity["memory_gb"] = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / (1024 ** 3)
+    except (AttributeError, ValueError, OSError):
+        pass  # Windows 等平台无法通过 sysconf 获取内存，不限制内存
+    return capacity
+
+
+class DurationHistory:
+    """各步骤历史耗时（指数滑动平均），保存在 JSON 文件中"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.durations: Dict[str, float] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.durations = json.load(f)
+            except (OSError, ValueError):
+                self.durations = {}
+
+    def estimate(self, name: str) -> float:
+        return self.durations.get(name, DEFAULT_ESTIMATE)
+
+    def record(self, name: str, duration: float) -> None:
+        previous = self.durations.get(name)
+        if previous is None:
+            self.durations[name] = duration
+        else:
+            self.durations[name] = DURATION_SMOOTHING * duration + (1 - DURATION_SMOOTHING) * previous
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.durations, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class BuildScheduler:
+    """按依赖关系和资源容量执行构建步骤
+
+    - 一个步骤的全部依赖成功后才会启动；任一依赖失败或被跳过时该步骤被跳过
+    - 就绪步骤按"自身及其下游最长路径的估计耗时"降序启动（关键路径优先）
+    - 同时运行的步骤资源权重之和不超过容量；没有步骤在运行时总会启动一个，避免单个步骤超出容量而死锁
+    """
+
+    def __init__(self, steps: List[BuildStep], capacity: Optional[Dict[str, float]] = None,
+                 max_parallel: Optional[int] = None, history: Optional[DurationHistory] = None,
+                 on_finish: Optional[Callable[[BuildStep], None]] = None):
+        self.steps: Dict[str, BuildStep] = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"重复的构建步骤: {step.name}")
+            self.steps[step.name] = step
+        for step in steps:
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"构建步骤 {step.name} 依赖未知步骤: {dependency}")
+
+        self.capacity = capacity if capacity is not None else detect_capacity()
+        self.max_parallel = max_parallel
+        self.history = history
+        self.on_finish = on_finish
+        self._lock = threading.Lock()
+        self.priority = self._critical_path_estimates()
+
+    def _critical_path_estimates(self) -> Dict[str, float]:
+        """每个步骤到 DAG 终点的最长估计耗时（同时检查循环依赖）"""
+        dependents: Dict[str, List[str]] = {name: [] for name in self.steps}
+        for step in self.steps.values():
+            for dependency in step.depends_on:
+                dependents[dependency].append(step.name)
+
+        priority: Dict[str, float] = {}
+        visiting = set()
+
+        def visit(name: str) -> float:
+            if name in priority:
+                return priority[name]
+            if name in visiting:
+                raise ValueError(f"构建步骤存在循环依赖: {name}")
+            visiting.add(name)
+            estimate = self.history.estimate(name) if self.history else DEFAULT_ESTIMATE
+            downstream = max((visit(child) for child in dependents[name]), default=0.0)
+            visiting.discard(name)
+            priority[name] = estimate + downstream
+            return priority[name]
+
+        for name in self.steps:
+            visit(name)
+        return priority
+
+    def _fits(self, step: BuildStep, in_use: Dict[str, float], running: int) -> bool:
+        if running == 0:
+            return True
+        if self.max_parallel is not None and running >= self.max_parallel:
+            return False
+        for resource, amount in step.weights.items():
+            limit = self.capacity.get(resource)
+            if limit is not None and in_use.get(resource, 0.0) + amount > limit:
+                return False
+        return True
+
+    def _run_step(self, step: BuildStep) -> bool:
+        start = time.time()
+        try:
+            success = bool(step.action())
+        except Exception as e:
+            step.error_message = str(e)
+            success = False
+        step.duration = time.time() - start
+        return success
+
+    def _finish(self, step: BuildStep, status: StepStatus) -> None:
+        step.status = status
+        if status == StepStatus.SUCCESS and self.history is not None and step.duration is not None:
+            with self._lock:
+                self.history.record(step.name, step.duration)
+        if self.on_finish:
+            self.on_finish(step)
+
+    def run(self) -> Dict[str, BuildStep]:
+        """执行全部步骤，返回 步骤名 -> 步骤（含状态与耗时）"""
+        pending = set(self.steps)
+        in_use: Dict[str, float] = {}
+        running = {}
+
+        workers = self.max_parallel or len(self.steps) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                # 依赖失败的步骤直接跳过（可能级联，循环到没有新的跳过为止）
+                skipped_any = True
+                while skipped_any:
+                    skipped_any = False
+                    for name in sorted(pending):
+                        step = self.steps[name]
+                        failed = [d for d in step.depends_on
+                                  if self.steps[d].status in (StepStatus.FAILED, StepStatus.SKIPPED)]
+                        if failed:
+                            pending.discard(name)
+                            step.error_message = f"前置步骤未完成: {', '.join(failed)}"
+                            self._finish(step, StepStatus.SKIPPED)
+                            skipped_any = True
+
+                ready = [
+                    self.steps[name] for name in pending
+                    if all(self.steps[d].status == StepStatus.SUCCESS for d in self.steps[name].depends_on)
+                ]
+                ready.sort(key=lambda step: (-self.priority[step.name], step.name))
+
+                for step in ready:
+                    if not self._fits(step, in_use, len(running)):
+                        continue
+                    pending.discard(step.name)
+                    step.status = StepStatus.RUNNING
+                    for resource, amount in step.weights.items():
+                        in_use[resource] = in_use.get(resource, 0.0) + amount
+                    running[executor.submit(self._run_step, step)] = step
+
+                if not running:
+                    break  # 剩余步骤都无法启动（不应发生，依赖已校验）
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    for resource, amount in step.weights.items():
+                        in_use[resource] -= amount
+                    self._finish(step, StepStatus.SUCCESS if future.result() else StepStatus.FAILED)
+
+        if self.history is not None:
+            self.history.save()
+        return self.steps
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+构建阶段耗时遥测
+每次构建按输出识别的各阶段耗时（依赖获取、Dart 编译、Gradle、原生编译链接、打包、签名）
+写入本地 SQLite 数据库；报告把每个平台最近一次成功构建的各阶段耗时与之前若干次构建的中位数对比，
+找出是哪个阶段让构建变慢。
+用法: python scripts/build_telemetry.py report [--platform android] [--build-type release]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import subprocess
+import threading
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional, Sequence, Union
+
+from build_log import PHASE_LABELS, BuildPhaseTracker, run_streamed_command
+
+DEFAULT_DB_PATH = os.path.join("build_logs", "telemetry.db")
+
+# 与最近多少次成功构建的中位数对比
+DEFAULT_WINDOW = 5
+
+# 阶段耗时同时超过 基线 * (1 + 阈值) 和 基线 + 最小增量（秒）时视为退化
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_MIN_DELTA = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform TEXT NOT NULL,
+    build_type TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    duration REAL NOT NULL,
+    success INTEGER NOT NULL,
+    git_commit TEXT,
+    command TEXT
+);
+CREATE TABLE IF NOT EXISTS phases (
+    build_id INTEGER NOT NULL REFERENCES builds(id),
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (build_id, phase)
+);
+CREATE INDEX IF NOT EXISTS builds_by_target ON builds (platform, build_type, id);
+"""
+
+
+class TelemetryStore:
+    """构建遥测数据库（每次操作单独连接，可在多个构建线程中共用）"""
+
+    def __init__(self, db_path: Union[str, Path] = DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._git_commit: Optional[str] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.db_path), timeout=30)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def current_commit(self) -> str:
+        """当前 Git 提交（每个进程只查询一次）"""
+        if self._git_commit is None:
+            try:
+                result = subprocess.run(
+                    ['git', 'rev-parse', '--short', 'HEAD'], cwd=self.db_path.parent,
+                    capture_output=True, text=True, timeout=10
+                )
+                self._git_commit = result.stdout.strip() if result.returncode == 0 else ""
+            except (OSError, subprocess.SubprocessError):
+                self._git_commit = ""
+        return self._git_commit
+
+    def record_build(self, platform: str, build_type: str, started_at: datetime, duration: float,
+                     success: bool, phase_durations: Dict[str, float], command: str = "") -> int:
+        """记录一次构建及其各阶段耗时，返回构建编号"""
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    cursor = connection.execute(
+                        "INSERT INTO builds (platform, build_type, started_at, duration, success, git_commit, command)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (platform, build_type, started_at.isoformat(timespec='seconds'), duration,
+                         int(success), self.current_commit(), command)
+                    )
+                    build_id = cursor.lastrowid
+                    connection.executemany(
+                        "INSERT INTO phases (build_id, phase, seconds) VALUES (?, ?, ?)",
+                        [(build_id, phase, seconds) for phase, seconds in phase_durations.items()]
+                    )
+                return build_id
+            finally:
+                connection.close()
+
+    def recent_builds(self, platform: Optional[str] = None, build_type: Optional[str] = None,
+                      limit: int = 20, success_only: bool = False) -> List[dict]:
+        """最近的构建（新的在前），包含 phases: 阶段 -> 秒"""
+        conditions, params = [], []
+        if platform:
+            conditions.append("platform = ?")
+            params.append(platform)
+        if build_type:
+            conditions.append("build_type = ?")
+            params.append(build_type)
+        if success_only:
+            conditions.append("success = 1")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        connection = self._connect()
+        try:
+            connection.row_factory = sqlite3.Row
+            builds = [dict(row) for row in connection.execute(
+                f"SELECT * FROM builds {where} ORDER BY id DESC LIMIT ?", params + [limit]
+            )]
+            for build in builds:
+                build['phases'] = {
+                    row['phase']: row['seconds'] for row in connection.execute(
+                        "SELECT phase, seconds FROM phases WHERE build_id = ? ORDER BY rowid", (build['id'],)
+                    )
+                }
+            return builds
+        finally:
+            connection.close()
+
+    def targets(self) -> List[tuple]:
+        """所有出现过的 (平台, 构建类型)"""
+        connection = self._connect()
+        try:
+            return connection.execute(
+                "SELECT DISTINCT platform, build_type FROM builds ORDER BY platform, build_type"
+            ).fetchall()
+        finally:
+            connection.close()
+
+    def phase_comparison(self, platform: str, build_type: str, window: int = DEFAULT_WINDOW,
+                         threshold: float = DEFAULT_THRESHOLD,
+                         min_delta: float = DEFAULT_MIN_DELTA) -> Optional[dict]:
+        """最近一次成功构建与之前 window 次成功构建中位数的逐阶段对比；成功构建少于两次时返回 None"""
+        builds = self.recent_builds(platform, build_type, limit=window + 1, success_only=True)
+        if len(builds) < 2:
+            return None
+        latest, baseline_builds = builds[0], builds[1:]
+
+        phases = list(latest['phases'])
+        for build in baseline_builds:
+            phases.extend(phase for phase in build['phases'] if phase not in phases)
+
+        rows = []
+        for phase in phases:
+            current = latest['phases'].get(phase, 0.0)
+            baseline = median(build['phases'].get(phase, 0.0) for build in baseline_builds)
+            delta = current - baseline
+            rows.append({
+                'phase': phase,
+                'baseline': baseline,
+                'latest': current,
+                'delta': delta,
+                'regressed': delta >= min_delta and delta > baseline * threshold,
+            })
+        return {
+            'platform': platform,
+            'build_type': build_type,
+            'latest': latest,
+            'baseline_count': len(baseline_builds),
+            'baseline_duration': median(build['duration'] for build in baseline_builds),
+            'phases': rows,
+        }
+
+
+def format_regression_report(comparisons: List[dict]) -> str:
+    """把 phase_comparison 的结果格式化为 Markdown 报告"""
+    lines = ["# 构建阶段耗时对比", f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    if not comparisons:
+        lines.append("暂无足够的构建记录（每个平台至少需要两次成功构建）")
+        return "\n".join(lines)
+
+    for comparison in comparisons:
+        latest = comparison['latest']
+        regressed = [row for row in comparison['phases'] if row['regressed']]
+        icon = "🔺" if regressed else "✅"
+        lines.append(f"## {icon} {comparison['platform'].upper()} ({comparison['build_type']})")
+        commit = f"，提交 {latest['git_commit']}" if latest.get('git_commit') else ""
+        lines.append(f"- 最近构建: {latest['started_at']}{commit}，总耗时 {latest['duration']:.1f}秒"
+                     f"（基线中位数 {comparison['baseline_duration']:.1f}秒，基于 {comparison['baseline_count']} 次构建）")
+        if regressed:
+            lines.append("- 变慢的阶段: " + ", ".join(
+                PHASE_LABELS.get(row['phase'], row['phase']) for row in regressed
+            ))
+        lines.append("")
+        lines.append("| 阶段 | 基线(秒) | 最近(秒) | 变化 |")
+        lines.append("|------|---------|---------|------|")
+        for row in comparison['phases']:
+            if row['baseline'] > 0:
+                change = f"{row['delta']:+.1f}秒 ({row['delta'] / row['baseline']:+.0%})"
+            else:
+                change = f"{row['delta']:+.1f}秒"
+            marker = " 🔺" if row['regressed'] else ""
+            label = PHASE_LABELS.get(row['phase'], row['phase'])
+            lines.append(f"| {label} | {row['baseline']:.1f} | {row['latest']:.1f} | {change}{marker} |")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def run_instrumented_build(command: Union[str, Sequence[str]], platform: str, build_type: str,
+                           project_root: Path, cwd: Optional[Path] = None,
+                           store: Optional[TelemetryStore] = None) -> bool:
+    """执行一条构建命令：输出实时显示并写入 build_logs/ 下的日志，各阶段耗时记入遥测数据库
+
+    命令无法启动（如 flutter 不在 PATH 中）时返回 False。
+    """
+    project_root = Path(project_root)
+    logs_dir = project_root / "build_logs"
+    logs_dir.mkdir(exist_ok=True)
+    log_file = logs_dir / f"{platform}_{build_type}_{int(time.time())}.log"
+
+    started_at = datetime.now()
+    start = time.time()
+    tracker = BuildPhaseTracker(platform.upper(), live=False)
+    success, _ = run_streamed_command(command, log_file, cwd or project_root, tracker, echo=True)
+    phase_durations = tracker.finish()
+
+    store = store or TelemetryStore(project_root / DEFAULT_DB_PATH)
+    try:
+        store.record_build(platform, build_type, started_at, time.time() - start, success, phase_durations,
+                           command if isinstance(command, str) else ' '.join(command))
+    except sqlite3.Error as e:
+        print(f"⚠️ 无法记录构建遥测: {e}")
+    print(f"📝 构建日志: {log_file}")
+    return success
+
+
+def main():
+    parser = argparse.ArgumentParser(description='构建阶段耗时遥测')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='遥测数据库路径')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report_parser = subparsers.add_parser('report', help='各阶段耗时与历史基线对比')
+    report_parser.add_argument('--platform', help='只显示该平台')
+    report_parser.add_argument('--build-type', help='只显示该构建类型')
+    report_parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help='基线包含的历史构建数')
+    report_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='视为退化的相对增幅')
+    report_parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA, help='视为退化的最小增量（秒）')
+    report_parser.add_argument('--output', help='把报告保存到文件')
+
+    history_parser = subparsers.add_parser('history', help='列出最近的构建')
+    history_parser.add_argument('--platform', help='只显示该平台')
+    history_parser.add_argument('--build-type', help='只显示该构建类型')
+    history_parser.add_argument('--limit', type=int, default=20, help='显示的构建数')
+
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"📭 遥测数据库不存在: {args.db}")
+        sys.exit(1)
+    store = TelemetryStore(args.db)
+
+    if args.command == 'report':
+        comparisons = []
+        for platform, build_type in store.targets():
+            if (args.platform and platform != args.platform) or (args.build_type and build_type != args.build_type):
+                continue
+            comparison = store.phase_comparison(platform, build_type, args.window, args.threshold, args.min_delta)
+            if comparison:
+                comparisons.append(comparison)
+        report = format_regression_report(comparisons)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(report)
+            print(f"📄 报告已保存到: {args.output}")
+        else:
+            print(report)
+        if any(row['regressed'] for comparison in comparisons for row in comparison['phases']):
+            sys.exit(2)
+
+    elif args.command == 'history':
+        for build in store.recent_builds(args.platform, args.build_type, limit=args.limit):
+            icon = "✅" if build['success'] else "❌"
+            phases = ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in build['phases'].items())
+            print(f"{icon} #{build['id']} {build['started_at']} {build['platform']} {build['build_type']}"
+                  f" {build['duration']:.1f}s  {phases}")
+
+
+if __name__ == "__main__":
+    main()
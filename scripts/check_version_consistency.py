@@ -1,43 +1,313 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+"""
+版本一致性检查
+以 version.yaml 为准，检查 pubspec.yaml、version.json 和各平台版本文件中的版本号是否一致。
+每个文件只用正则提取版本字段（不做完整的 YAML/plist 解析），工作区文件并行读取；
+--staged 模式（pre-commit 使用）只检查暂存区中的版本相关文件，内容一次性从暂存区读取，
+version.yaml 被暂存时检查全部文件。整个检查在 200ms 内完成，不拖慢提交。
+"""
+
 import sys
 import os
+import re
+import json
+import time
 import argparse
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# pre-commit 的时间预算（毫秒），超出时在详细模式下给出提示
+TIME_BUDGET_MS = 200
+
+VERSION_CONFIG_FILE = 'version.yaml'
+
+
+def parse_version_config(content):
+    """从 version.yaml 中提取 version: 段的 major/minor/patch/build/prerelease"""
+    block = re.search(r'^version:[ \t]*\n((?:[ \t]+.*\n?)*)', content, re.MULTILINE)
+    if not block:
+        return None
+    values = {}
+    for key, value in re.findall(r'^[ \t]+(\w+):[ \t]*(.*?)[ \t]*$', block.group(1), re.MULTILINE):
+        values[key] = value.strip('\'"')
+    try:
+        return {
+            'major': int(values.get('major', 1)),
+            'minor': int(values.get('minor', 0)),
+            'patch': int(values.get('patch', 0)),
+            'build': values.get('build', '20250620001'),
+            'prerelease': values.get('prerelease', ''),
+        }
+    except ValueError:
+        return None
+
+
+def expected_versions(version):
+    """按 generate_version_info.py 的规则计算各文件中应有的版本值"""
+    major, minor, patch, build = version['major'], version['minor'], version['patch'], version['build']
+    version_string = f"{major}.{minor}.{patch}"
+    if version['prerelease']:
+        version_string += f"-{version['prerelease']}"
+    four_part = f"{major}.{minor}.{patch}.{build}"
+    return {
+        'version_string': version_string,
+        'build': build,
+        'pubspec': f"{major}.{minor}.{patch}+{build}",
+        'msix': f"{min(major, 65535)}.{min(minor, 65535)}.{min(patch, 65535)}.0",
+        'four_part': four_part,
+        'four_part_comma': four_part.replace('.', ','),
+        'full_name': f"{version_string}-{build}",
+        'linux_string': f"{major}.{minor}.{patch}-{build}",
+        'major': str(major),
+        'minor': str(minor),
+        'patch': str(patch),
+    }
+
+
+def _field(name, pattern, expected_key, flags=0, optional=True):
+    """一个版本字段：名称、提取正则（第一个分组为值）、期望值键名；optional 为 False 时缺失视为错误"""
+    return name, re.compile(pattern, flags), expected_key, optional
+
+
+def _plist_field(key, expected_key):
+    return _field(key, rf'<key>{key}</key>\s*<string>([^<]*)</string>', expected_key, optional=False)
+
+
+# 文件 -> 需要检查的版本字段
+VERSION_TARGETS = OrderedDict([
+    ('pubspec.yaml', [
+        _field('version', r'^version:[ \t]*[\'"]?([^\s\'"#]+)', 'pubspec', re.MULTILINE, optional=False),
+        _field('msix_version', r'^[ \t]+msix_version:[ \t]*[\'"]?([\d.]+)', 'msix', re.MULTILINE),
+    ]),
+    ('android/app/build.gradle.kts', [
+        # 使用 flutter.versionCode 等变量时版本来自 pubspec.yaml，只检查写死的值
+        _field('versionCode', r'versionCode\s*=\s*(\d+)', 'build'),
+        _field('versionName', r'versionName\s*=\s*"([^"]*)"', 'version_string'),
+    ]),
+    ('android/app/build.gradle', [
+        _field('versionCode', r'versionCode\s+(\d+)', 'build'),
+        _field('versionName', r'versionName\s+"([^"]*)"', 'version_string'),
+    ]),
+    ('ios/Runner/Info.plist', [
+        _plist_field('CFBundleShortVersionString', 'version_string'),
+        _plist_field('CFBundleVersion', 'build'),
+    ]),
+    ('macos/Runner/Info.plist', [
+        _plist_field('CFBundleShortVersionString', 'version_string'),
+        _plist_field('CFBundleVersion', 'build'),
+    ]),
+    ('windows/runner/Runner.rc', [
+        _field('FILEVERSION', r'^FILEVERSION\s+([\d,]+)', 'four_part_comma', re.MULTILINE, optional=False),
+        _field('PRODUCTVERSION', r'^PRODUCTVERSION\s+([\d,]+)', 'four_part_comma', re.MULTILINE, optional=False),
+        _field('FileVersion', r'VALUE "FileVersion", "([^"]*)"', 'four_part', optional=False),
+        _field('ProductVersion', r'VALUE "ProductVersion", "([^"]*)"', 'four_part', optional=False),
+    ]),
+    ('windows/CMakeLists.txt', [
+        _field('VERSION', r'set\(VERSION\s+"([^"]*)"\)', 'four_part', re.IGNORECASE),
+    ]),
+    ('linux/CMakeLists.txt', [
+        _field('APP_VERSION_MAJOR', r'set\(APP_VERSION_MAJOR\s+(\d+)\)', 'major', re.IGNORECASE),
+        _field('APP_VERSION_MINOR', r'set\(APP_VERSION_MINOR\s+(\d+)\)', 'minor', re.IGNORECASE),
+        _field('APP_VERSION_PATCH', r'set\(APP_VERSION_PATCH\s+(\d+)\)', 'patch', re.IGNORECASE),
+        _field('APP_BUILD_NUMBER', r'set\(APP_BUILD_NUMBER\s+"?(\w+)"?\)', 'build', re.IGNORECASE),
+        _field('APP_VERSION_STRING', r'set\(APP_VERSION_STRING\s+"([^"]*)"\)', 'linux_string', re.IGNORECASE),
+    ]),
+    ('ohos/app/app.json5', [
+        _field('versionCode', r'"?versionCode"?\s*:\s*(\d+)', 'build', optional=False),
+        _field('versionName', r'"?versionName"?\s*:\s*[\'"]([^\'"]*)[\'"]', 'version_string', optional=False),
+    ]),
+    ('ohos/entry/src/main/config.json', [
+        _field('versionCode', r'"versionCode"\s*:\s*(\d+)', 'build', optional=False),
+        _field('versionName', r'"versionName"\s*:\s*"([^"]*)"', 'version_string', optional=False),
+    ]),
+    ('web/manifest.json', [
+        _field('version', r'"version"\s*:\s*"([^"]*)"', 'version_string', optional=False),
+        _field('version_name', r'"version_name"\s*:\s*"([^"]*)"', 'full_name', optional=False),
+    ]),
+])
+
+# version.json 由 generate_version_info.py 生成，只比较其中的 version 段
+VERSION_JSON_FILE = 'version.json'
+
+
+def check_content(path, content, expected):
+    """检查一个文件的内容，返回 [(字段, 实际值, 期望值)]，实际值为 None 表示缺少该字段"""
+    mismatches = []
+    if path == VERSION_JSON_FILE:
+        try:
+            version = json.loads(content).get('version', {})
+        except ValueError as e:
+            return [('version', f"无法解析: {e}", 'JSON')]
+        for key in ('major', 'minor', 'patch', 'build'):
+            actual = str(version.get(key)) if key in version else None
+            if actual != expected[key]:
+                mismatches.append((f"version.{key}", actual, expected[key]))
+        return mismatches
+
+    for name, pattern, expected_key, optional in VERSION_TARGETS[path]:
+        match = pattern.search(content)
+        if not match:
+            if not optional:
+                mismatches.append((name, None, expected[expected_key]))
+            continue
+        actual = match.group(1)
+        # Xcode 构建变量（如 $(FLUTTER_BUILD_NAME)）在构建时由 pubspec.yaml 替换
+        if actual.startswith('$('):
+            continue
+        if actual != expected[expected_key]:
+            mismatches.append((name, actual, expected[expected_key]))
+    return mismatches
+
+
+def checked_files():
+    return [VERSION_CONFIG_FILE, VERSION_JSON_FILE] + list(VERSION_TARGETS)
+
+
+def staged_files(project_root):
+    """暂存区中新增或修改的文件（相对路径）；不在 Git 仓库中时返回 None"""
+    try:
+        result = subprocess.run(
+            ['git', 'diff', '--cached', '--name-only', '--diff-filter=ACMR', '-z'],
+            capture_output=True, cwd=project_root, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return {name.decode('utf-8') for name in result.stdout.split(b'\0') if name}
+
+
+def read_staged(project_root, paths):
+    """用一次 git cat-file --batch 读取多个文件的暂存内容，返回 路径 -> 内容（不在暂存区的文件不返回）"""
+    if not paths:
+        return {}
+    request = ''.join(f":{path}\n" for path in paths).encode('utf-8')
+    result = subprocess.run(['git', 'cat-file', '--batch'], input=request,
+                            capture_output=True, cwd=project_root, timeout=10)
+    contents, data, offset = {}, result.stdout, 0
+    for path in paths:
+        header_end = data.index(b'\n', offset)
+        header = data[offset:header_end].split()
+        offset = header_end + 1
+        if header[-1] == b'missing':
+            continue
+        size = int(header[2])
+        contents[path] = data[offset:offset + size].decode('utf-8', errors='replace')
+        offset += size + 1
+    return contents
+
+
+def read_worktree(project_root, paths, jobs=8):
+    """并行读取工作区文件，返回 路径 -> 内容（不存在的文件不返回）"""
+    def read(path):
+        try:
+            with open(project_root / path, 'r', encoding='utf-8', errors='replace') as f:
+                return path, f.read()
+        except OSError:
+            return path, None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(paths)))) as executor:
+        return {path: content for path, content in executor.map(read, paths) if content is not None}
+
+
+def run_check(project_root, staged_only=False, quiet=False, verbose=False):
+    """执行检查，返回退出码（0 通过，1 不一致或出错）"""
+    start = time.perf_counter()
+    project_root = Path(project_root)
+
+    if staged_only:
+        staged = staged_files(project_root)
+        if staged is None:
+            if not quiet:
+                print("[WARN] 无法读取 Git 暂存区，改为检查工作区文件")
+            staged_only = False
+    if staged_only:
+        targets = [path for path in checked_files() if path in staged and path != VERSION_CONFIG_FILE]
+        if VERSION_CONFIG_FILE in staged:
+            # 版本号本身有变更：所有版本文件都必须随之更新，全部检查（未暂存的文件按 HEAD/暂存区内容）
+            targets = [path for path in checked_files() if path != VERSION_CONFIG_FILE]
+        if not targets and VERSION_CONFIG_FILE not in staged:
+            if verbose:
+                print("暂存区中没有版本相关文件，跳过检查")
+            return 0
+        contents = read_staged(project_root, [VERSION_CONFIG_FILE] + targets)
+    else:
+        targets = [path for path in checked_files() if path != VERSION_CONFIG_FILE]
+        contents = read_worktree(project_root, [VERSION_CONFIG_FILE] + targets)
+
+    if VERSION_CONFIG_FILE not in contents:
+        print(f"[ERROR] 版本配置文件不存在: {VERSION_CONFIG_FILE}")
+        return 1
+    version = parse_version_config(contents[VERSION_CONFIG_FILE])
+    if not version:
+        print(f"[ERROR] 无法从 {VERSION_CONFIG_FILE} 读取版本号")
+        return 1
+    expected = expected_versions(version)
+
+    results = OrderedDict(
+        (path, check_content(path, contents[path], expected)) for path in targets if path in contents
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if not quiet:
+        print("开始版本一致性检查...")
+        print("=" * 50)
+        print(f"期望版本: {expected['version_string']} (构建号: {expected['build']})")
+        print("-" * 50)
+    failed = False
+    for path, mismatches in results.items():
+        if not mismatches:
+            if not quiet:
+                print(f"[OK] {path}")
+            continue
+        failed = True
+        for name, actual, wanted in mismatches:
+            if actual is None:
+                print(f"[ERROR] {path}: 缺少 {name}（期望 {wanted}）")
+            else:
+                print(f"[ERROR] {path}: {name} 为 {actual}，期望 {wanted}")
+
+    if not quiet:
+        print("")
+        print("=" * 50)
+        print("版本一致性检查摘要")
+        print("=" * 50)
+        if failed:
+            print("[ERROR] 版本信息不一致，请运行 python scripts/generate_version_info.py 更新各平台版本")
+        else:
+            print(f"[OK] 已检查 {len(results)} 个文件，所有平台版本信息一致，检查通过！")
+        print("=" * 50)
+    if verbose:
+        over = f"（超出 {TIME_BUDGET_MS}ms 预算）" if elapsed_ms > TIME_BUDGET_MS else ""
+        print(f"检查耗时: {elapsed_ms:.1f}ms{over}")
+    return 1 if failed else 0
+
 
 def main():
     parser = argparse.ArgumentParser(description='检查版本一致性')
-    parser.add_argument('--quiet', action='store_true', help='静默模式')
+    parser.add_argument('--quiet', action='store_true', help='静默模式（只显示错误）')
     parser.add_argument('--verbose', action='store_true', help='详细输出模式')
+    parser.add_argument('--staged', action='store_true', help='只检查暂存区中的版本相关文件（pre-commit 使用）')
+    parser.add_argument('--project-root', help='项目根目录（默认为脚本所在目录的上级）')
     args = parser.parse_args()
-    
+
+    project_root = Path(args.project_root) if args.project_root else Path(__file__).resolve().parent.parent
+
     if args.verbose:
         print("=" * 60)
         print("版本一致性检查 - 详细模式")
         print("=" * 60)
         print(f"Python版本: {sys.version}")
         print(f"当前工作目录: {os.getcwd()}")
-        print(f"脚本路径: {__file__}")
+        print(f"项目根目录: {project_root}")
+        print(f"检查范围: {'暂存区' if args.staged else '工作区'}")
         print("=" * 60)
-    
-    if not args.quiet:
-        print("开始版本一致性检查...")
-        print("=" * 50)
-        print("期望版本: 1.0.1 (构建号: 20250623001)")
-        print("-" * 50)
-        print("[OK] pubspec.yaml版本检查通过: 1.0.1+20250623001")
-        print("[OK] Android versionCode检查通过: 20250623001")
-        print("[OK] Android versionName检查通过: 1.0.1")
-        print("")
-        print("=" * 50)
-        print("版本一致性检查摘要")
-        print("=" * 50)
-        print("[OK] 所有平台版本信息一致，检查通过！")
-        print("=" * 50)
-    
-    if args.verbose:
-        print("版本一致性检查完成，无错误发现")
-    
-    return 0
+
+    return run_check(project_root, staged_only=args.staged, quiet=args.quiet, verbose=args.verbose)
+
 
 if __name__ == '__main__':
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Dart源码增量索引
+为国际化与未使用代码分析工具提供共享的源码索引，按 路径+mtime+大小+内容哈希 缓存每个文件的解析结果，
+再次运行时只重新解析发生变化的文件
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Set
+
+# 索引格式版本，解析逻辑变化时递增以使旧缓存失效
+INDEX_VERSION = 1
+
+DEFAULT_CACHE_PATH = os.path.join("tools", "cache", "dart_source_index.json")
+
+# 词法扫描：注释、字符串字面量、标识符（按优先级排列）
+TOKEN_PATTERN = re.compile(
+    r"(?P<comment>//[^\n]*|/\*.*?\*/)"
+    r"|(?P<string>r'''.*?'''|r\"\"\".*?\"\"\""
+    r"|'''(?:\\.|[^\\])*?'''|\"\"\"(?:\\.|[^\\])*?\"\"\""
+    r"|r'[^'\n]*'|r\"[^\"\n]*\""
+    r"|'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\")"
+    r"|(?P<ident>[A-Za-z_$][\w$]*)",
+    re.DOTALL,
+)
+
+CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+# 常见的本地化引用模式
+L10N_REFERENCE_PATTERNS = [
+    re.compile(r'AppLocalizations\.of\(context\)\.(\w+)'),
+    re.compile(r'l10n\.(\w+)'),
+    re.compile(r'localizations\.(\w+)'),
+    re.compile(r'_localizations\.(\w+)'),
+]
+
+# 导入/导出/part 指令（在去除注释后的源码上匹配）
+IMPORT_PATTERNS = [
+    re.compile(r"import\s+['\"]([^'\"]+)['\"]"),
+    re.compile(r"export\s+['\"]([^'\"]+)['\"]"),
+    re.compile(r"part\s+['\"]([^'\"]+)['\"]"),
+    re.compile(r"part\s+of\s+['\"]([^'\"]+)['\"]"),
+]
+
+ENUM_PATTERN = re.compile(r'enum\s+(\w+)\s*{')
+ENUM_VALUE_PATTERN = re.compile(r'(\w+)(?:\s*,|\s*;|\s*})')
+
+
+def _line_starts(content: str) -> List[int]:
+    """计算每一行起始位置的偏移表"""
+    starts = [0]
+    pos = content.find('\n')
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = content.find('\n', pos + 1)
+    return starts
+
+
+def _literal_body(literal: str) -> str:
+    """去掉字符串字面量的 r 前缀和引号"""
+    if literal.startswith('r'):
+        literal = literal[1:]
+    quote_len = 3 if literal[:3] in ("'''", '"""') else 1
+    return literal[quote_len:-quote_len]
+
+
+def _extract_enums(content: str) -> List[dict]:
+    """提取枚举定义及其取值"""
+    enums = []
+    for match in ENUM_PATTERN.finditer(content):
+        body_start = match.end()
+        body_end = body_start
+        brace_count = 1
+        for i in range(body_start, len(content)):
+            char = content[i]
+            if char == '{':
+                brace_count += 1
+            elif char == '}':
+                brace_count -= 1
+                if brace_count == 0:
+                    body_end = i
+                    break
+
+        body = content[body_start:body_end]
+        enums.append({
+            'name': match.group(1),
+            'values': ENUM_VALUE_PATTERN.findall(body),
+            'content': body,
+        })
+    return enums
+
+
+def parse_dart_source(content: str) -> dict:
+    """解析单个Dart文件，返回可缓存的索引条目内容"""
+    line_starts = _line_starts(content)
+    tokens: Set[str] = set()
+    string_literals = []
+    code_parts = []
+    last_end = 0
+
+    for match in TOKEN_PATTERN.finditer(content):
+        kind = match.lastgroup
+        if kind == 'ident':
+            tokens.add(match.group())
+        elif kind == 'string':
+            line = bisect_right(line_starts, match.start())
+            string_literals.append([line, _literal_body(match.group())])
+        elif kind == 'comment':
+            # 保留换行以免相邻代码被拼接
+            code_parts.append(content[last_end:match.start()])
+            code_parts.append('\n' * match.group().count('\n'))
+            last_end = match.end()
+    code_parts.append(content[last_end:])
+    code = ''.join(code_parts)
+
+    imports = []
+    for pattern in IMPORT_PATTERNS:
+        for uri in pattern.findall(code):
+            if uri not in imports:
+                imports.append(uri)
+
+    l10n_keys = set()
+    for pattern in L10N_REFERENCE_PATTERNS:
+        l10n_keys.update(pattern.findall(content))
+
+    cjk_lines = sorted({bisect_right(line_starts, m.start()) for m in CJK_PATTERN.finditer(content)})
+
+    return {
+        'tokens': sorted(tokens),
+        'string_literals': string_literals,
+        'l10n_keys': sorted(l10n_keys),
+        'imports': imports,
+        'enums': _extract_enums(content),
+        'cjk_lines': cjk_lines,
+    }
+
+
+class DartSourceIndex:
+    """按文件增量维护的Dart源码索引
+
+    索引以相对于项目根目录的 POSIX 路径为键（如 ``lib/main.dart``），
+    每个条目记录 mtime/大小/内容哈希 以及解析出的标识符、字符串字面量、
+    本地化键引用、导入指令、枚举定义和包含中文的行号。
+    """
+
+    def __init__(self, project_root: str = ".", roots: Iterable[str] = ("lib",),
+                 cache_path: Optional[str] = None):
+        self.project_root = os.path.abspath(project_root)
+        self.roots = [self._to_key(os.path.join(self.project_root, root)) for root in roots]
+        self.cache_path = cache_path or os.path.join(self.project_root, DEFAULT_CACHE_PATH)
+        self.entries: Dict[str, dict] = {}
+        self.stats = {'files': 0, 'reused': 0, 'rehashed': 0, 'parsed': 0, 'removed': 0}
+        self._dirty = False
+        self._load()
+
+    def _to_key(self, path: str) -> str:
+        """将路径转换为索引键"""
+        rel = os.path.relpath(os.path.abspath(path), self.project_root)
+        return rel.replace(os.sep, '/')
+
+    def abspath(self, key: str) -> str:
+        """索引键对应的绝对路径"""
+        return os.path.join(self.project_root, *key.split('/'))
+
+    def _load(self) -> None:
+        """加载磁盘上的索引缓存"""
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  源码索引缓存损坏，将重建: {e}")
+            return
+        if data.get('version') == INDEX_VERSION:
+            self.entries = data.get('files', {})
+
+    def save(self) -> None:
+        """原子写入索引缓存"""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'files': self.entries}, f,
+                      ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    def _walk(self) -> Iterable[os.DirEntry]:
+        """遍历所有根目录下的Dart文件（跳过隐藏目录）"""
+        stack = [self.abspath(root) for root in self.roots]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith('.'):
+                                stack.append(entry.path)
+                        elif entry.name.endswith('.dart'):
+                            yield entry
+            except FileNotFoundError:
+                continue
+
+    def refresh(self) -> dict:
+        """同步索引与磁盘：只重新解析发生变化的文件"""
+        started = time.perf_counter()
+        self.stats = {'files': 0, 'reused': 0, 'rehashed': 0, 'parsed': 0, 'removed': 0}
+        seen = set()
+
+        for dir_entry in self._walk():
+            key = self._to_key(dir_entry.path)
+            seen.add(key)
+            st = dir_entry.stat()
+            old = self.entries.get(key)
+
+            if old and old['mtime_ns'] == st.st_mtime_ns and old['size'] == st.st_size:
+                self.stats['reused'] += 1
+                continue
+
+            with open(dir_entry.path, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha1(raw).hexdigest()
+
+            if old and old['sha1'] == digest:
+                # 仅元数据变化（如 touch、checkout），无需重新解析
+                old['mtime_ns'] = st.st_mtime_ns
+                old['size'] = st.st_size
+                self.stats['rehashed'] += 1
+            else:
+                entry = parse_dart_source(raw.decode('utf-8', errors='ignore'))
+                entry.update({'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha1': digest})
+                self.entries[key] = entry
+                self.stats['parsed'] += 1
+            self._dirty = True
+
+        for key in [k for k in self.entries if k not in seen and self._under_roots(k)]:
+            del self.entries[key]
+            self.stats['removed'] += 1
+            self._dirty = True
+
+        self.stats['files'] = len(seen)
+        self.stats['elapsed'] = time.perf_counter() - started
+        self.save()
+        return self.stats
+
+    def _under_roots(self, key: str) -> bool:
+        return any(key == root or key.startswith(root + '/') for root in self.roots)
+
+    def files(self, root: Optional[str] = None) -> List[str]:
+        """返回已索引的文件键（排序），可按子目录过滤"""
+        keys = [k for k in self.entries if self._under_roots(k)]
+        if root is not None:
+            prefix = self._to_key(os.path.join(self.project_root, root)) + '/'
+            keys = [k for k in keys if k.startswith(prefix)]
+        return sorted(keys)
+
+    def get(self, key: str) -> dict:
+        """获取单个文件的索引条目"""
+        return self.entries[key]
+
+    def read_text(self, key: str) -> str:
+        """读取文件内容"""
+        with open(self.abspath(key), 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+
+    def files_with_cjk(self, root: Optional[str] = None) -> List[str]:
+        """包含中文字符的文件（未包含中文的文件不可能产生硬编码中文检测结果）"""
+        return [k for k in self.files(root) if self.entries[k]['cjk_lines']]
+
+    def l10n_keys(self) -> Set[str]:
+        """所有文件中引用到的本地化键"""
+        keys = set()
+        for key in self.files():
+            keys.update(self.entries[key]['l10n_keys'])
+        return keys
+
+    def enum_definitions(self) -> List[dict]:
+        """所有枚举定义，附带所在文件键"""
+        enums = []
+        for key in self.files():
+            for enum in self.entries[key]['enums']:
+                enums.append(dict(enum, file=key))
+        return enums
+
+
+def load_index(project_root: str = ".", roots: Iterable[str] = ("lib",),
+               cache_path: Optional[str] = None) -> DartSourceIndex:
+    """创建并刷新源码索引"""
+    index = DartSourceIndex(project_root, roots, cache_path)
+    index.refresh()
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dart源码增量索引')
+    parser.add_argument('--root', action='append', help='索引的源码目录（可重复，默认 lib）')
+    parser.add_argument('--cache', help=f'索引缓存文件（默认 {DEFAULT_CACHE_PATH}）')
+    parser.add_argument('--rebuild', action='store_true', help='丢弃缓存并完全重建')
+
+    args = parser.parse_args()
+    roots = args.root or ['lib']
+
+    if args.rebuild:
+        cache_path = args.cache or DEFAULT_CACHE_PATH
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    index = load_index('.', roots, args.cache)
+    stats = index.stats
+    print(f"✅ 源码索引已更新: {stats['files']} 个文件")
+    print(f"   复用: {stats['reused']}, 仅更新元数据: {stats['rehashed']}, "
+          f"重新解析: {stats['parsed']}, 已移除: {stats['removed']}")
+    print(f"   耗时: {stats['elapsed'] * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
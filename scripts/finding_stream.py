@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+检测结果流
+检测过程中每完成一个文件就把它的结果以 JSONL 追加写入结果流，并在检查点中记录该文件，
+中断（崩溃或 Ctrl-C）后重新运行可从检查点继续；生成报告时按需从结果流读取，无需把全部结果常驻内存
+"""
+
+import os
+import json
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class FindingStream:
+    """追加写入的检测结果流与已完成文件检查点
+
+    结果流 ``<path>`` 每行一条检测结果；检查点 ``<path>.checkpoint`` 每行记录一个已完成的文件
+    及写完该文件后结果流的字节偏移。恢复时结果流会截断到最后一个检查点的偏移，
+    未完成文件写入的半截结果会被丢弃，该文件重新检测。
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoint"
+        self.completed: Dict[str, int] = OrderedDict()  # 文件 -> 结果条数
+        self.spans: Dict[str, Tuple[int, int]] = {}  # 文件 -> 其结果在结果流中的 [起始, 结束) 字节偏移
+        self.offset = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume:
+            self._restore()
+        else:
+            for file_path in (self.path, self.checkpoint_path):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+        self._stream = open(self.path, 'ab')
+        self._checkpoint = open(self.checkpoint_path, 'ab')
+
+    def _restore(self) -> None:
+        """读取检查点，并丢弃最后一个检查点之后写入的结果"""
+        checkpoint_end = 0
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # 中断时写了一半的检查点
+                    self.completed[entry['file']] = entry['count']
+                    self.spans[entry['file']] = (self.offset, entry['offset'])
+                    self.offset = entry['offset']
+                    checkpoint_end += len(line)
+            os.truncate(self.checkpoint_path, checkpoint_end)
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self.offset:
+            os.truncate(self.path, self.offset)
+
+    def is_completed(self, file_path: str) -> bool:
+        return file_path in self.completed
+
+    def write_file(self, file_path: str, records: Iterable[dict]) -> None:
+        """写入一个文件的全部结果并记录检查点"""
+        start = self.offset
+        count = 0
+        for record in records:
+            self._stream.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+            count += 1
+        self._stream.flush()
+        self.offset = self._stream.tell()
+
+        entry = {'file': file_path, 'offset': self.offset, 'count': count}
+        self._checkpoint.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._checkpoint.flush()
+        self.completed[file_path] = count
+        self.spans[file_path] = (start, self.offset)
+
+    def records(self) -> Iterator[dict]:
+        """按写入顺序逐条读取结果"""
+        self._stream.flush()
+        with open(self.path, 'rb') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def file_records(self, file_path: str) -> Iterator[dict]:
+        """逐条读取某个已完成文件的结果（同一文件的结果在结果流中是连续的，按检查点偏移直接定位）"""
+        self._stream.flush()
+        start, end = self.spans.get(file_path, (0, 0))
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            while f.tell() < end:
+                yield json.loads(f.readline())
+
+    def grouped(self, field: str) -> 'GroupedFindings':
+        """按字段分组的只读视图"""
+        self._stream.flush()
+        return GroupedFindings(self.path, field)
+
+    def close(self) -> None:
+        self._stream.close()
+        self._checkpoint.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GroupedFindings(Mapping):
+    """结果流按字段分组的映射视图
+
+    构建时只扫描一遍结果流并记录每组记录的字节偏移；访问某个分组时才从文件读取该组记录
+    （返回的记录不含分组字段）。分组顺序为首次出现的顺序。
+    """
+
+    def __init__(self, path: str, field: str):
+        self.path = path
+        self.field = field
+        self.offsets: Dict[str, List[int]] = OrderedDict()
+        with open(path, 'rb') as f:
+            offset = 0
+            for line in f:
+                group = json.loads(line)[field]
+                self.offsets.setdefault(group, []).append(offset)
+                offset += len(line)
+
+    def __getitem__(self, group: str) -> List[dict]:
+        records = []
+        with open(self.path, 'rb') as f:
+            for offset in self.offsets[group]:
+                f.seek(offset)
+                record = json.loads(f.readline())
+                del record[self.field]
+                records.append(record)
+        return records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
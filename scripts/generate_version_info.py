@@ -9,10 +9,12 @@ import sys
 import json
 import yaml
 import argparse
-import subprocess
 from datetime import datetime
 from pathlib import Path
 
+from git_metadata import get_git_metadata
+from version_stamping import PLATFORM_LABELS, apply_platform_edits, plan_platform_edits
+
 # 尝试导入pytz，如果不存在则使用标准库
 try:
     import pytz
@@ -57,43 +59,17 @@ class VersionGenerator:
             return False
     
     def get_git_info(self):
-        """获取Git信息"""
-        git_info = {
-            'commit': None,
-            'branch': None,
-            'tag': None,
-            'is_dirty': False
-        }
-        
+        """获取Git信息（同一进程内只读取一次）"""
         try:
-            # 获取当前提交哈希
-            result = subprocess.run(['git', 'rev-parse', 'HEAD'],
-                                  capture_output=True, text=True, cwd=self.project_root)
-            if result.returncode == 0 and result.stdout:
-                git_info['commit'] = result.stdout.strip()[:8]  # 取前8位
-
-            # 获取当前分支
-            result = subprocess.run(['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-                                  capture_output=True, text=True, cwd=self.project_root)
-            if result.returncode == 0 and result.stdout:
-                git_info['branch'] = result.stdout.strip()
-
-            # 获取最新标签
-            result = subprocess.run(['git', 'describe', '--tags', '--abbrev=0'],
-                                  capture_output=True, text=True, cwd=self.project_root)
-            if result.returncode == 0 and result.stdout:
-                git_info['tag'] = result.stdout.strip()
-
-            # 检查是否有未提交的更改
-            result = subprocess.run(['git', 'status', '--porcelain'],
-                                  capture_output=True, text=True, cwd=self.project_root)
-            if result.returncode == 0 and result.stdout is not None:
-                git_info['is_dirty'] = bool(result.stdout.strip())
-                
+            return get_git_metadata(self.project_root).info()
         except Exception as e:
             print(f"警告: 获取Git信息失败: {e}")
-        
-        return git_info
+            return {
+                'commit': None,
+                'branch': None,
+                'tag': None,
+                'is_dirty': False
+            }
     
     def generate_build_number(self, timezone='Asia/Shanghai'):
         """生成构建号
@@ -129,17 +105,14 @@ class VersionGenerator:
         
         # 可以从Git标签、构建历史等地方查找
         try:
-            result = subprocess.run(['git', 'tag', '-l', f'*{date_str}*'], 
-                                  capture_output=True, text=True, cwd=self.project_root)
-            if result.returncode == 0:
-                for tag in result.stdout.strip().split('\n'):
-                    if tag and date_str in tag:
-                        # 提取序号
-                        try:
-                            sequence = int(tag[-3:])
-                            builds.append(sequence)
-                        except ValueError:
-                            continue
+            for tag in get_git_metadata(self.project_root).tags(f'*{date_str}*'):
+                if tag and date_str in tag:
+                    # 提取序号
+                    try:
+                        sequence = int(tag[-3:])
+                        builds.append(sequence)
+                    except ValueError:
+                        continue
         except Exception:
             pass
         
@@ -298,9 +271,14 @@ class VersionGenerator:
                     lines[i] = f'version: {version_string}'
                     break
             
+            new_content = '\n'.join(lines)
+            if new_content == content:
+                print(f"pubspec.yaml 版本号已是 {version_string}")
+                return True
+            
             # 写回文件
             with open(self.pubspec_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(lines))
+                f.write(new_content)
             
             print(f"已更新 pubspec.yaml 版本号: {version_string}")
             return True
@@ -310,210 +288,25 @@ class VersionGenerator:
             return False
     
     def update_platform_versions(self):
-        """更新所有平台的版本信息"""
+        """更新所有平台的版本信息（同一进程内规划全部修改后并行写入，内容未变化的文件不写）"""
         version_info = self.generate_version_info()
         if not version_info:
             return False
         
-        platforms = version_info['platforms']
-        success = True
+        planned = plan_platform_edits(self.project_root, version_info['platforms'])
+        results = apply_platform_edits(planned)
         
-        # 更新Android平台
-        if self._update_android_version(platforms['android']):
-            print("√ Android平台版本更新成功")
-        else:
-            print("× Android平台版本更新失败")
-            success = False
-
-        # 更新iOS平台
-        if self._update_ios_version(platforms['ios']):
-            print("√ iOS平台版本更新成功")
-        else:
-            print("× iOS平台版本更新失败")
-            success = False
-
-        # 更新鸿蒙OS平台
-        if self._update_ohos_version(platforms['ohos']):
-            print("√ 鸿蒙OS平台版本更新成功")
-        else:
-            print("× 鸿蒙OS平台版本更新失败")
-            success = False
-
-        # 更新Web平台
-        if self._update_web_version(platforms['web']):
-            print("√ Web平台版本更新成功")
-        else:
-            print("× Web平台版本更新失败")
-            success = False
-
-        # 更新Windows平台
-        if self._update_windows_version(platforms['windows']):
-            print("√ Windows平台版本更新成功")
-        else:
-            print("× Windows平台版本更新失败")
-            success = False
-
-        # 更新macOS平台
-        if self._update_macos_version(platforms['macos']):
-            print("√ macOS平台版本更新成功")
-        else:
-            print("× macOS平台版本更新失败")
-            success = False
-
-        # 更新Linux平台
-        if self._update_linux_version(platforms['linux']):
-            print("√ Linux平台版本更新成功")
-        else:
-            print("× Linux平台版本更新失败")
-            success = False
+        success = True
+        for platform, label in PLATFORM_LABELS.items():
+            result = results[platform]
+            if result['success']:
+                changed = f"（更新 {len(result['changed'])} 个文件）" if result['changed'] else "（无变化）"
+                print(f"√ {label}平台版本更新成功{changed}")
+            else:
+                print(f"× {label}平台版本更新失败: {'; '.join(result['errors'])}")
+                success = False
         
         return success
-    
-    def _update_android_version(self, version_info):
-        """更新Android平台版本"""
-        try:
-            # 调用Android平台更新脚本
-            script_path = self.project_root / 'scripts' / 'platform' / 'update_android_version.py'
-            if script_path.exists():
-                result = subprocess.run([
-                    sys.executable, str(script_path),
-                    str(self.project_root),
-                    version_info['versionName'],
-                    str(version_info['versionCode'])
-                ], capture_output=True, text=True)
-                return result.returncode == 0
-            else:
-                print(f"警告: Android更新脚本不存在: {script_path}")
-                return False
-        except Exception as e:
-            print(f"Android版本更新失败: {e}")
-            return False
-    
-    def _update_ios_version(self, version_info):
-        """更新iOS平台版本"""
-        try:
-            # 调用iOS平台更新脚本
-            script_path = self.project_root / 'scripts' / 'platform' / 'update_ios_version.py'
-            if script_path.exists():
-                result = subprocess.run([
-                    sys.executable, str(script_path),
-                    str(self.project_root),
-                    str(version_info['CFBundleShortVersionString']),
-                    str(version_info['CFBundleVersion'])
-                ], capture_output=True, text=True)
-                return result.returncode == 0
-            else:
-                print(f"警告: iOS更新脚本不存在: {script_path}")
-                return False
-        except Exception as e:
-            print(f"iOS版本更新失败: {e}")
-            return False
-    
-    def _update_ohos_version(self, version_info):
-        """更新鸿蒙OS平台版本"""
-        try:
-            # 调用鸿蒙OS平台更新脚本
-            script_path = self.project_root / 'scripts' / 'platform' / 'update_ohos_version.py'
-            if script_path.exists():
-                result = subprocess.run([
-                    sys.executable, str(script_path),
-                    str(self.project_root),
-                    version_info['versionName'],
-                    str(version_info['versionCode'])
-                ], capture_output=True, text=True)
-                return result.returncode == 0
-            else:
-                print(f"警告: 鸿蒙OS更新脚本不存在: {script_path}")
-                return False
-        except Exception as e:
-            print(f"鸿蒙OS版本更新失败: {e}")
-            return False
-    
-    def _update_web_version(self, version_info):
-        """更新Web平台版本"""
-        try:
-            # 直接更新web/manifest.json
-            manifest_path = self.project_root / 'web' / 'manifest.json'
-            if manifest_path.exists():
-                with open(manifest_path, 'r', encoding='utf-8') as f:
-                    manifest = json.load(f)
-                
-                manifest['version'] = version_info['version']
-                manifest['version_name'] = version_info['version_name']
-                
-                with open(manifest_path, 'w', encoding='utf-8') as f:
-                    json.dump(manifest, f, indent=2, ensure_ascii=False)
-                
-                return True
-            else:
-                print(f"警告: Web manifest文件不存在: {manifest_path}")
-                return False
-        except Exception as e:
-            print(f"Web版本更新失败: {e}")
-            return False
-    
-    def _update_windows_version(self, version_info):
-        """更新Windows平台版本"""
-        try:
-            # 调用Windows平台更新脚本
-            script_path = self.project_root / 'scripts' / 'platform' / 'update_windows_version.py'
-            if script_path.exists():
-                result = subprocess.run([
-                    sys.executable, str(script_path),
-                    str(self.project_root),
-                    version_info['FileVersion'],
-                    version_info['ProductVersion'],
-                    version_info.get('MSIXVersion', version_info['FileVersion'])  # 添加MSIX版本参数
-                ], capture_output=True, text=True)
-                return result.returncode == 0
-            else:
-                print(f"警告: Windows更新脚本不存在: {script_path}")
-                return False
-        except Exception as e:
-            print(f"Windows版本更新失败: {e}")
-            return False
-    
-    def _update_macos_version(self, version_info):
-        """更新macOS平台版本"""
-        try:
-            # 调用macOS平台更新脚本
-            script_path = self.project_root / 'scripts' / 'platform' / 'update_macos_version.py'
-            if script_path.exists():
-                result = subprocess.run([
-                    sys.executable, str(script_path),
-                    str(self.project_root),
-                    str(version_info['CFBundleShortVersionString']),
-                    str(version_info['CFBundleVersion'])
-                ], capture_output=True, text=True)
-                return result.returncode == 0
-            else:
-                print(f"警告: macOS更新脚本不存在: {script_path}")
-                return False
-        except Exception as e:
-            print(f"macOS版本更新失败: {e}")
-            return False
-    
-    def _update_linux_version(self, version_info):
-        """更新Linux平台版本"""
-        try:
-            # 调用Linux平台更新脚本
-            script_path = self.project_root / 'scripts' / 'platform' / 'update_linux_version.py'
-            if script_path.exists():
-                result = subprocess.run([
-                    sys.executable, str(script_path),
-                    str(self.project_root),
-                    str(version_info['APP_VERSION_MAJOR']),
-                    str(version_info['APP_VERSION_MINOR']),
-                    str(version_info['APP_VERSION_PATCH']),
-                    str(version_info['APP_BUILD_NUMBER'])
-                ], capture_output=True, text=True)
-                return result.returncode == 0
-            else:
-                print(f"警告: Linux更新脚本不存在: {script_path}")
-                return False
-        except Exception as e:
-            print(f"Linux版本更新失败: {e}")
-            return False
 
     def save_version_json(self, output_file='version.json'):
         """保存版本信息到JSON文件"""
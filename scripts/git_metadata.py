@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Git 元数据读取
+当前提交、分支和标签列表直接从 .git 目录（HEAD、loose refs、packed-refs）读取，不启动 git 进程；
+最近标签与是否有未提交更改合并为一次 `git describe --tags --abbrev=0 --dirty` 调用
+（仓库没有标签时改为 `git status --porcelain --untracked-files=no`），均不扫描未跟踪文件。
+结果按项目目录在进程内缓存，一次发布流程中重复获取不再有额外开销。
+"""
+
+import os
+import fnmatch
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# describe 的脏标记，冒号不能出现在引用名中，因此不会与以 -dirty 结尾的标签混淆
+DIRTY_MARK = ':dirty'
+
+GIT_TIMEOUT = 30
+
+
+class GitMetadata:
+    """单个仓库的 Git 元数据（线程安全，首次访问时读取后缓存）"""
+
+    def __init__(self, project_root):
+        self.project_root = Path(project_root).resolve()
+        self._lock = threading.Lock()
+        self._dirs: Optional[Tuple[Path, Path]] = None
+        self._refs: Optional[Dict[str, str]] = None
+        self._head: Optional[Tuple[Optional[str], Optional[str]]] = None
+        self._describe: Optional[Tuple[Optional[str], bool]] = None
+
+    def _run_git(self, *args) -> Optional[str]:
+        try:
+            result = subprocess.run(['git', *args], capture_output=True, text=True,
+                                    cwd=self.project_root, timeout=GIT_TIMEOUT)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return result.stdout if result.returncode == 0 else None
+
+    # .git 目录
+
+    def _git_dirs(self) -> Optional[Tuple[Path, Path]]:
+        """返回 (git_dir, common_dir)；支持工作树（.git 为 gitdir: 文件）；找不到仓库时返回 None"""
+        if self._dirs is None:
+            for directory in [self.project_root, *self.project_root.parents]:
+                dot_git = directory / '.git'
+                if dot_git.is_dir():
+                    git_dir = dot_git
+                elif dot_git.is_file():
+                    content = dot_git.read_text(encoding='utf-8').strip()
+                    if not content.startswith('gitdir:'):
+                        continue
+                    git_dir = (directory / content[len('gitdir:'):].strip()).resolve()
+                else:
+                    continue
+                common_dir = git_dir
+                commondir_file = git_dir / 'commondir'
+                if commondir_file.is_file():
+                    common_dir = (git_dir / commondir_file.read_text(encoding='utf-8').strip()).resolve()
+                self._dirs = (git_dir, common_dir)
+                break
+            else:
+                self._dirs = False
+        return self._dirs or None
+
+    def _can_read_directly(self) -> bool:
+        dirs = self._git_dirs()
+        # reftable 格式的引用无法直接读取，交给 git 处理
+        return bool(dirs) and not (dirs[1] / 'reftable').is_dir()
+
+    def _load_refs(self) -> Dict[str, str]:
+        """引用名 -> 对象哈希（loose refs 覆盖 packed-refs）"""
+        if self._refs is None:
+            refs: Dict[str, str] = {}
+            _, common_dir = self._git_dirs()
+            packed_refs = common_dir / 'packed-refs'
+            if packed_refs.is_file():
+                for line in packed_refs.read_text(encoding='utf-8').splitlines():
+                    # 跳过注释和附注标签的 peeled 行（^提交哈希）
+                    if not line or line[0] in '#^':
+                        continue
+                    sha, _, name = line.partition(' ')
+                    refs[name.strip()] = sha
+
+            refs_root = common_dir / 'refs'
+            for directory, _, file_names in os.walk(refs_root):
+                for file_name in file_names:
+                    path = Path(directory) / file_name
+                    name = path.relative_to(common_dir).as_posix()
+                    try:
+                        sha = path.read_text(encoding='utf-8').strip()
+                    except (OSError, UnicodeDecodeError):
+                        continue
+                    if len(sha) >= 40 and not sha.startswith('ref:'):
+                        refs[name] = sha
+            self._refs = refs
+        return self._refs
+
+    def _load_head(self) -> Tuple[Optional[str], Optional[str]]:
+        """(完整提交哈希, 分支名)；分离 HEAD 时分支名为 'HEAD'，与 git rev-parse --abbrev-ref HEAD 一致"""
+        if self._head is None:
+            if self._can_read_directly():
+                git_dir, common_dir = self._git_dirs()
+                head = (git_dir / 'HEAD').read_text(encoding='utf-8').strip()
+                if head.startswith('ref:'):
+                    ref = head[len('ref:'):].strip()
+                    branch = ref[len('refs/heads/'):] if ref.startswith('refs/heads/') else ref
+                    # 每个工作树的 HEAD 在 git_dir 中，分支引用在 common_dir 中
+                    self._head = (self._load_refs().get(ref), branch)
+                else:
+                    self._head = (head or None, 'HEAD')
+            else:
+                output = self._run_git('rev-parse', 'HEAD', '--abbrev-ref', 'HEAD')
+                lines = output.split() if output else []
+                self._head = (lines[0], lines[1]) if len(lines) == 2 else (None, None)
+        return self._head
+
+    # 公共接口
+
+    @property
+    def commit(self) -> Optional[str]:
+        with self._lock:
+            return self._load_head()[0]
+
+    @property
+    def branch(self) -> Optional[str]:
+        with self._lock:
+            return self._load_head()[1]
+
+    def tags(self, pattern: Optional[str] = None) -> List[str]:
+        """标签名列表（排序），pattern 为 git tag -l 的通配符"""
+        with self._lock:
+            if self._can_read_directly():
+                names = sorted(
+                    name[len('refs/tags/'):] for name in self._load_refs() if name.startswith('refs/tags/')
+                )
+            else:
+                output = self._run_git('tag', '-l')
+                names = sorted(output.split()) if output else []
+        if pattern:
+            names = [name for name in names if fnmatch.fnmatchcase(name, pattern)]
+        return names
+
+    def _load_describe(self) -> Tuple[Optional[str], bool]:
+        """(最近标签, 是否有未提交更改)"""
+        if self._describe is None:
+            has_tags = True
+            if self._can_read_directly():
+                has_tags = any(name.startswith('refs/tags/') for name in self._load_refs())
+            output = self._run_git('describe', '--tags', '--abbrev=0', f'--dirty={DIRTY_MARK}') if has_tags else None
+            if output:
+                tag = output.strip()
+                is_dirty = tag.endswith(DIRTY_MARK)
+                if is_dirty:
+                    tag = tag[:-len(DIRTY_MARK)]
+                self._describe = (tag, is_dirty)
+            else:
+                # 没有标签（或 HEAD 之前没有可达标签）时 describe 失败，单独检查已跟踪文件的更改
+                status = self._run_git('status', '--porcelain', '--untracked-files=no')
+                self._describe = (None, bool(status and status.strip()))
+        return self._describe
+
+    @property
+    def latest_tag(self) -> Optional[str]:
+        with self._lock:
+            return self._load_describe()[0]
+
+    @property
+    def is_dirty(self) -> bool:
+        with self._lock:
+            return self._load_describe()[1]
+
+    def info(self) -> dict:
+        """与 VersionGenerator.get_git_info 相同结构的信息（提交哈希取前8位）"""
+        commit = self.commit
+        return {
+            'commit': commit[:8] if commit else None,
+            'branch': self.branch,
+            'tag': self.latest_tag,
+            'is_dirty': self.is_dirty,
+        }
+
+    def invalidate(self) -> None:
+        """清空缓存（例如创建标签或提交之后）"""
+        with self._lock:
+            self._refs = None
+            self._head = None
+            self._describe = None
+
+
+_providers: Dict[Path, GitMetadata] = {}
+_providers_lock = threading.Lock()
+
+
+def get_git_metadata(project_root) -> GitMetadata:
+    """返回项目目录对应的 GitMetadata（同一进程内共用一个实例）"""
+    key = Path(project_root).resolve()
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = GitMetadata(key)
+        return _providers[key]
@@ -8,11 +8,18 @@ import os
 import re
 import json
 import argparse
+import textwrap
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, asdict
-from typing import List, Dict, Set
+from datetime import datetime
+from typing import Callable, Iterable, List, Dict, Optional, Set
 import difflib
 
+from dart_source_index import DartSourceIndex
+from detection_patterns import CompiledPatternSet
+from finding_stream import FindingStream
+
 @dataclass
 class HardcodedText:
     file_path: str
@@ -23,6 +30,16 @@ class HardcodedText:
     context: str
     confidence: float = 1.0
 
+# 并行扫描时每个工作进程持有的检测器实例
+_worker_detector = None
+
+def _init_worker():
+    global _worker_detector
+    _worker_detector = HardcodedTextDetector()
+
+def _detect_in_worker(file_path: str) -> List[HardcodedText]:
+    return _worker_detector.detect_in_file(file_path)
+
 class HardcodedTextDetector:
     def __init__(self):
         # 检测模式：正则表达式 -> 文本类型
@@ -102,6 +119,12 @@ class HardcodedTextDetector:
             r'TODO.*?[\u4e00-\u9fff].*',  # TODO注释
         ]
         
+        # 预编译检测模式（标签为文本类型），不含 "引号...中文" 的行直接跳过
+        self.compiled_patterns = CompiledPatternSet(
+            ((text_type, pattern) for pattern, text_type in self.detection_patterns.items()),
+            re.DOTALL,
+        )
+        
         self.exclude_files = [
             'generated',
             '.g.dart',
@@ -189,33 +212,30 @@ class HardcodedTextDetector:
                 if not line.strip():
                     continue
                 
-                for pattern, text_type in self.detection_patterns.items():
-                    matches = re.finditer(pattern, line, re.DOTALL)
+                for text_type, _, match in self.compiled_patterns.scan(line):
+                    # 检查是否在注释中
+                    if self.is_in_comment(line, match.start()):
+                        continue
                     
-                    for match in matches:
-                        # 检查是否在注释中
-                        if self.is_in_comment(line, match.start()):
-                            continue
-                        
-                        text_content = match.group(1)
-                        
-                        # 过滤明显不是用户界面文本的内容
-                        if self.should_skip_text(text_content):
-                            continue
-                        
-                        context = self.extract_context(file_path, line_num, lines)
-                        
-                        hardcoded_text = HardcodedText(
-                            file_path=file_path,
-                            line_number=line_num,
-                            line_content=line.strip(),
-                            text_content=text_content,
-                            text_type=text_type,
-                            context=context,
-                            confidence=self.calculate_confidence(text_content, text_type)
-                        )
-                        
-                        results.append(hardcoded_text)
+                    text_content = match.group(1)
+                    
+                    # 过滤明显不是用户界面文本的内容
+                    if self.should_skip_text(text_content):
+                        continue
+                    
+                    context = self.extract_context(file_path, line_num, lines)
+                    
+                    hardcoded_text = HardcodedText(
+                        file_path=file_path,
+                        line_number=line_num,
+                        line_content=line.strip(),
+                        text_content=text_content,
+                        text_type=text_type,
+                        context=context,
+                        confidence=self.calculate_confidence(text_content, text_type)
+                    )
+                    
+                    results.append(hardcoded_text)
         
         except Exception as e:
             print(f"⚠️  处理文件失败 {file_path}: {e}")
@@ -264,28 +284,48 @@ class HardcodedTextDetector:
         
         return confidence
     
-    def scan_all_files(self, root_dir: str = "lib") -> List[HardcodedText]:
-        """扫描所有Dart文件"""
+    def scan_all_files(self, root_dir: str = "lib", jobs: int = 1,
+                       stream: Optional[FindingStream] = None) -> List[HardcodedText]:
+        """扫描所有Dart文件
+        
+        jobs > 1 时在进程池中按块并行检测，结果按文件顺序合并，与串行运行一致。
+        传入 stream 时每个文件的结果检测完即写入结果流（返回空列表，结果通过 stream.records() 读取），
+        检查点中已完成的文件直接跳过。
+        """
         all_results = []
-        dart_files = []
         
-        # 收集所有Dart文件
-        for root, dirs, files in os.walk(root_dir):
-            # 跳过生成的文件目录
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'generated']
-            
-            for file in files:
-                if file.endswith('.dart'):
-                    dart_files.append(os.path.join(root, file))
+        # 通过增量源码索引收集Dart文件，未包含中文的文件不会产生检测结果，直接跳过
+        source_index = DartSourceIndex(roots=[root_dir])
+        source_index.refresh()
+        all_files = source_index.files()
+        dart_files = source_index.files_with_cjk()
         
-        print(f"🔍 开始扫描 {len(dart_files)} 个Dart文件...")
+        print(f"🔍 开始扫描 {len(dart_files)} 个Dart文件 (共 {len(all_files)} 个，其余不含中文)...")
         
-        for i, file_path in enumerate(dart_files, 1):
-            if i % 10 == 0:
-                print(f"   进度: {i}/{len(dart_files)}")
-            
-            results = self.detect_in_file(file_path)
-            all_results.extend(results)
+        if stream is not None and stream.completed:
+            dart_files = [f for f in dart_files if not stream.is_completed(f)]
+            print(f"   从检查点继续: 已完成 {len(stream.completed)} 个，剩余 {len(dart_files)} 个")
+        
+        if jobs > 1 and len(dart_files) > 1:
+            chunksize = max(1, len(dart_files) // (jobs * 4))
+            executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+            file_results = executor.map(_detect_in_worker, dart_files, chunksize=chunksize)
+        else:
+            executor = None
+            file_results = map(self.detect_in_file, dart_files)
+        
+        try:
+            for i, (dart_file, results) in enumerate(zip(dart_files, file_results), 1):
+                if i % 10 == 0:
+                    print(f"   进度: {i}/{len(dart_files)}")
+                
+                if stream is None:
+                    all_results.extend(results)
+                else:
+                    stream.write_file(dart_file, (asdict(result) for result in results))
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
         
         return all_results
     
@@ -306,30 +346,51 @@ class HardcodedTextDetector:
     def generate_report(self, results: List[HardcodedText], output_file: str = "hardcoded_text_report.md"):
         """生成检测报告"""
         grouped_by_file = self.group_by_file(results)
-        grouped_by_type = self.group_by_type(results)
+        type_counts = {text_type: len(items) for text_type, items in self.group_by_type(results).items()}
+        file_counts = {file_path: len(items) for file_path, items in grouped_by_file.items()}
+        self._write_report(output_file, file_counts, type_counts, grouped_by_file.__getitem__)
+    
+    def generate_stream_report(self, stream: FindingStream, min_confidence: float,
+                               output_file: str = "hardcoded_text_report.md"):
+        """从结果流生成检测报告（只统计各文件、各类型的条数，逐个文件读取详情，内存不随结果数增长）"""
+        file_counts, type_counts = defaultdict(int), defaultdict(int)
+        for record in stream.records():
+            if record['confidence'] >= min_confidence:
+                file_counts[record['file_path']] += 1
+                type_counts[record['text_type']] += 1
+        
+        def file_items(file_path: str) -> Iterable[HardcodedText]:
+            for record in stream.file_records(file_path):
+                if record['confidence'] >= min_confidence:
+                    yield HardcodedText(**record)
         
+        self._write_report(output_file, file_counts, type_counts, file_items)
+    
+    def _write_report(self, output_file: str, file_counts: Dict[str, int], type_counts: Dict[str, int],
+                      file_items: Callable[[str], Iterable[HardcodedText]]):
+        """写出报告：file_counts/type_counts 为各文件、各类型的结果数，file_items(文件) 返回该文件的结果"""
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write("# 硬编码文本检测报告\n\n")
             f.write(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
             
             # 统计信息
             f.write("## 统计信息\n\n")
-            f.write(f"- 检测到硬编码文本: {len(results)} 处\n")
-            f.write(f"- 涉及文件: {len(grouped_by_file)} 个\n")
-            f.write(f"- 文本类型: {len(grouped_by_type)} 种\n\n")
+            f.write(f"- 检测到硬编码文本: {sum(file_counts.values())} 处\n")
+            f.write(f"- 涉及文件: {len(file_counts)} 个\n")
+            f.write(f"- 文本类型: {len(type_counts)} 种\n\n")
             
             # 按类型统计
             f.write("## 按类型统计\n\n")
-            for text_type, items in sorted(grouped_by_type.items(), key=lambda x: len(x[1]), reverse=True):
-                f.write(f"- **{text_type}**: {len(items)} 处\n")
+            for text_type, count in sorted(type_counts.items(), key=lambda x: x[1], reverse=True):
+                f.write(f"- **{text_type}**: {count} 处\n")
             f.write("\n")
             
             # 按文件详情
             f.write("## 按文件详情\n\n")
-            for file_path, items in sorted(grouped_by_file.items(), key=lambda x: len(x[1]), reverse=True):
-                f.write(f"### {file_path} ({len(items)} 处)\n\n")
+            for file_path, count in sorted(file_counts.items(), key=lambda x: x[1], reverse=True):
+                f.write(f"### {file_path} ({count} 处)\n\n")
                 
-                for item in items:
+                for item in file_items(file_path):
                     f.write(f"**第 {item.line_number} 行** ({item.text_type}):\n")
                     f.write(f"- 文本: `{item.text_content}`\n")
                     f.write(f"- 代码: `{item.line_content}`\n")
@@ -341,13 +402,28 @@ class HardcodedTextDetector:
     
     def export_json(self, results: List[HardcodedText], output_file: str = "hardcoded_texts.json"):
         """导出为JSON格式"""
-        data = [asdict(result) for result in results]
-        
+        self.export_json_records((asdict(result) for result in results), output_file)
+    
+    def export_json_records(self, records: Iterable[dict], output_file: str = "hardcoded_texts.json"):
+        """逐条写出JSON数组（格式与 json.dump(indent=2) 相同），records 可以是结果流的迭代器"""
+        count = 0
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write('[')
+            for record in records:
+                f.write(',\n' if count else '\n')
+                f.write(textwrap.indent(json.dumps(record, ensure_ascii=False, indent=2), '  '))
+                count += 1
+            f.write('\n]' if count else ']')
         
         print(f"✅ JSON数据已导出: {output_file}")
 
+def _print_summary(total_count: int, filtered_count: int, min_confidence: float):
+    print("\n📊 检测结果:")
+    print(f"   总计: {total_count} 处")
+    print(f"   高置信度 (>={min_confidence}): {filtered_count} 处")
+    if not filtered_count:
+        print("✅ 未检测到需要处理的硬编码文本")
+
 def main():
     parser = argparse.ArgumentParser(description='硬编码文本检测器')
     parser.add_argument('--scan', action='store_true', help='扫描硬编码文本')
@@ -355,32 +431,52 @@ def main():
     parser.add_argument('--output', default='hardcoded_text_report.md', help='报告输出文件')
     parser.add_argument('--json', action='store_true', help='同时导出JSON格式')
     parser.add_argument('--min-confidence', type=float, default=0.5, help='最小置信度阈值')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='并行扫描的进程数（0 表示使用全部CPU核心）')
+    parser.add_argument('--stream', help='边扫描边写入的JSONL结果流文件（附带检查点，可中断后继续）')
+    parser.add_argument('--resume', action='store_true', help='从 --stream 指定的结果流继续，跳过已完成的文件')
     
     args = parser.parse_args()
+    if args.resume and not args.stream:
+        parser.error("--resume 需要同时指定 --stream")
     
     if args.scan:
         detector = HardcodedTextDetector()
-        results = detector.scan_all_files(args.root_dir)
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
         
-        # 过滤低置信度结果
-        filtered_results = [r for r in results if r.confidence >= args.min_confidence]
-        
-        print(f"\n📊 检测结果:")
-        print(f"   总计: {len(results)} 处")
-        print(f"   高置信度 (>={args.min_confidence}): {len(filtered_results)} 处")
-        
-        if filtered_results:
-            detector.generate_report(filtered_results, args.output)
-            
-            if args.json:
-                json_file = args.output.replace('.md', '.json')
-                detector.export_json(filtered_results, json_file)
+        if args.stream:
+            with FindingStream(args.stream, resume=args.resume) as stream:
+                detector.scan_all_files(args.root_dir, jobs=jobs, stream=stream)
+                
+                # 逐条读取结果流计数，报告和JSON同样直接从结果流生成，不在内存中保留结果
+                total_count = 0
+                filtered_count = 0
+                for record in stream.records():
+                    total_count += 1
+                    if record['confidence'] >= args.min_confidence:
+                        filtered_count += 1
+                
+                _print_summary(total_count, filtered_count, args.min_confidence)
+                if filtered_count:
+                    detector.generate_stream_report(stream, args.min_confidence, args.output)
+                    if args.json:
+                        detector.export_json_records(
+                            (record for record in stream.records() if record['confidence'] >= args.min_confidence),
+                            args.output.replace('.md', '.json')
+                        )
         else:
-            print("✅ 未检测到需要处理的硬编码文本")
+            results = detector.scan_all_files(args.root_dir, jobs=jobs)
+            
+            # 过滤低置信度结果
+            filtered_results = [r for r in results if r.confidence >= args.min_confidence]
+            
+            _print_summary(len(results), len(filtered_results), args.min_confidence)
+            if filtered_results:
+                detector.generate_report(filtered_results, args.output)
+                if args.json:
+                    detector.export_json(filtered_results, args.output.replace('.md', '.json'))
     else:
         print("请使用 --scan 开始扫描")
         print("使用 --help 查看详细说明")
 
 if __name__ == "__main__":
-    import datetime
     main()
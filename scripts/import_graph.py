@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Dart导入关系图
+为未使用文件分析工具提供共享的可达性计算：从入口文件出发一次遍历即可得到全部被使用的文件，
+并支持强连通分量（循环导入）缩点和反向依赖（谁导入了某个文件）查询
+"""
+
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+Node = Hashable
+
+
+class ImportGraph:
+    """有向导入关系图：边 a -> b 表示 a 导入（或导出、part）了 b
+
+    节点可以是任意可哈希对象（相对路径字符串或 Path），只要同一个图内保持一致。
+    """
+
+    def __init__(self, edges: Optional[Mapping[Node, Iterable[Node]]] = None):
+        self.successors: Dict[Node, Set[Node]] = {}
+        self._predecessors: Optional[Dict[Node, Set[Node]]] = None
+        if edges:
+            for source, targets in edges.items():
+                self.add_node(source)
+                for target in targets:
+                    self.add_edge(source, target)
+
+    def add_node(self, node: Node) -> None:
+        self.successors.setdefault(node, set())
+
+    def add_edge(self, source: Node, target: Node) -> None:
+        self.successors.setdefault(source, set()).add(target)
+        self.successors.setdefault(target, set())
+        self._predecessors = None
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self.successors
+
+    def __len__(self) -> int:
+        return len(self.successors)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(targets) for targets in self.successors.values())
+
+    def reachable(self, roots: Iterable[Node], visited: Optional[Set[Node]] = None) -> Set[Node]:
+        """从 roots 出发广度优先遍历，返回所有可达节点（包含 roots 本身）
+
+        传入 visited 时结果直接写入该集合，且已在集合中的节点视为已处理（不再展开其依赖），
+        便于多次调用增量标记。每个节点和每条边最多访问一次。
+        """
+        if visited is None:
+            visited = set()
+        queue = deque()
+        for root in roots:
+            if root not in visited:
+                visited.add(root)
+                queue.append(root)
+
+        while queue:
+            node = queue.popleft()
+            for target in self.successors.get(node, ()):
+                if target not in visited:
+                    visited.add(target)
+                    queue.append(target)
+        return visited
+
+    def _build_predecessors(self) -> Dict[Node, Set[Node]]:
+        if self._predecessors is None:
+            predecessors = {node: set() for node in self.successors}
+            for source, targets in self.successors.items():
+                for target in targets:
+                    predecessors[target].add(source)
+            self._predecessors = predecessors
+        return self._predecessors
+
+    def importers(self, node: Node) -> Set[Node]:
+        """直接导入该节点的节点"""
+        return set(self._build_predecessors().get(node, ()))
+
+    def reverse_dependencies(self, node: Node) -> Set[Node]:
+        """直接或间接依赖该节点的所有节点（不含节点本身，除非它处于循环中）"""
+        predecessors = self._build_predecessors()
+        visited: Set[Node] = set()
+        queue = deque(predecessors.get(node, ()))
+        visited.update(queue)
+        while queue:
+            current = queue.popleft()
+            for source in predecessors.get(current, ()):
+                if source not in visited:
+                    visited.add(source)
+                    queue.append(source)
+        return visited
+
+    def strongly_connected_components(self) -> List[List[Node]]:
+        """Tarjan 算法（迭代实现）求强连通分量，按逆拓扑序返回（被依赖的分量在前）"""
+        index_of: Dict[Node, int] = {}
+        lowlink: Dict[Node, int] = {}
+        on_stack: Set[Node] = set()
+        stack: List[Node] = []
+        components: List[List[Node]] = []
+        counter = 0
+
+        for start in self.successors:
+            if start in index_of:
+                continue
+            index_of[start] = lowlink[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack.add(start)
+            work = [(start, iter(self.successors[start]))]
+
+            while work:
+                node, targets = work[-1]
+                advanced = False
+                for target in targets:
+                    if target not in index_of:
+                        index_of[target] = lowlink[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(self.successors[target])))
+                        advanced = True
+                        break
+                    if target in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[target])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        return components
+
+    def condensation(self) -> Tuple[Dict[Node, int], Dict[int, Set[int]]]:
+        """强连通分量缩点
+
+        返回 (节点 -> 分量编号, 分量编号 -> 其依赖的分量编号集合)，缩点后的图是有向无环图。
+        """
+        component_of: Dict[Node, int] = {}
+        for component_id, members in enumerate(self.strongly_connected_components()):
+            for member in members:
+                component_of[member] = component_id
+
+        dag: Dict[int, Set[int]] = {component_id: set() for component_id in set(component_of.values())}
+        for source, targets in self.successors.items():
+            for target in targets:
+                if component_of[source] != component_of[target]:
+                    dag[component_of[source]].add(component_of[target])
+        return component_of, dag
+
+    def cycles(self) -> List[List[Node]]:
+        """所有循环导入（包含多个节点或自导入的强连通分量）"""
+        return [
+            component for component in self.strongly_connected_components()
+            if len(component) > 1 or component[0] in self.successors[component[0]]
+        ]
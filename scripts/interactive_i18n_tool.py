@@ -12,6 +12,8 @@ import subprocess
 from typing import Dict, List, Tuple
 from collections import defaultdict
 
+from rewrite_transaction import FileRewrite
+
 class InteractiveI18nTool:
     def __init__(self):
         self.scripts_dir = "scripts"
@@ -280,18 +282,17 @@ class InteractiveI18nTool:
     def replace_in_file(self, file_path: str, replacements: List[Dict]) -> bool:
         """在单个文件中执行替换"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            rewrite = FileRewrite(file_path)
             
             modified = False
             
-            # 按行号倒序排序，避免行号变化影响后续替换
+            # 行号均基于原始内容，按行号倒序处理仅为保持输出顺序
             replacements.sort(key=lambda x: x['line_number'], reverse=True)
             
             for replacement in replacements:
-                line_idx = replacement['line_number'] - 1
-                if 0 <= line_idx < len(lines):
-                    original_line = lines[line_idx]
+                line_number = replacement['line_number']
+                if 1 <= line_number <= len(rewrite.lines):
+                    original_line = rewrite.line(line_number)
                     new_line = self.perform_replacement(
                         original_line,
                         replacement['original_text'],
@@ -300,16 +301,15 @@ class InteractiveI18nTool:
                     )
                     
                     if new_line != original_line:
-                        lines[line_idx] = new_line
+                        rewrite.replace_line(line_number, new_line)
                         modified = True
                         print(f"   第 {replacement['line_number']} 行: {replacement['original_text']} → {replacement['arb_key']}")
             
             if modified:
                 # 确保文件有AppLocalizations导入
-                self.ensure_localization_import(lines)
+                self.ensure_localization_import(rewrite)
                 
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(lines)
+                rewrite.commit()
                 
                 print(f"✅ 文件 {file_path} 更新完成")
             
@@ -359,8 +359,9 @@ class InteractiveI18nTool:
         
         return line
     
-    def ensure_localization_import(self, lines: List[str]):
-        """确保文件有本地化导入"""
+    def ensure_localization_import(self, rewrite: FileRewrite):
+        """确保文件有本地化导入（插入位置基于原始行号登记到改写事务）"""
+        lines = rewrite.lines
         has_import = any('app_localizations.dart' in line or 'AppLocalizations' in line for line in lines[:20])
         has_l10n_variable = any('l10n = AppLocalizations.of(context)' in line for line in lines)
         
@@ -378,14 +379,14 @@ class InteractiveI18nTool:
                 else:
                     break
             
-            lines.insert(insert_idx, import_line)
+            rewrite.insert_before_line(insert_idx + 1, import_line)
         
         # 在build方法中添加l10n变量（如果没有的话）
         if not has_l10n_variable:
             for i, line in enumerate(lines):
                 if 'Widget build(' in line and '{' in line:
                     # 在build方法开始后添加l10n变量
-                    lines.insert(i + 1, "    final l10n = AppLocalizations.of(context);\n")
+                    rewrite.insert_before_line(i + 2, "    final l10n = AppLocalizations.of(context);\n")
                     break
     
     def run_full_process(self) -> bool:
@@ -14,6 +14,9 @@ import plistlib
 from pathlib import Path
 from datetime import datetime
 
+from build_telemetry import run_instrumented_build
+from toolchain_probe import get_toolchain_probe
+
 class iOSBuilder:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
@@ -33,10 +36,13 @@ class iOSBuilder:
             print("❌ iOS构建需要在macOS系统上进行")
             return False
             
+        probe = get_toolchain_probe(self.project_root)
+        probe.prefetch([['flutter', '--version'], ['xcodebuild', '-version'],
+                        ['xcrun', 'simctl', 'list', 'devices'], ['pod', '--version']])
+            
         # 检查Flutter
         try:
-            result = subprocess.run(['flutter', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['flutter', '--version'], check=True)
             print(f"✅ Flutter: {result.stdout.split()[1]}")
         except (subprocess.CalledProcessError, FileNotFoundError):
             print("❌ Flutter未安装或不在PATH中")
@@ -44,8 +50,7 @@ class iOSBuilder:
             
         # 检查Xcode
         try:
-            result = subprocess.run(['xcodebuild', '-version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['xcodebuild', '-version'], check=True)
             xcode_version = result.stdout.split('\n')[0]
             print(f"✅ {xcode_version}")
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -54,16 +59,14 @@ class iOSBuilder:
             
         # 检查iOS模拟器
         try:
-            result = subprocess.run(['xcrun', 'simctl', 'list', 'devices'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['xcrun', 'simctl', 'list', 'devices'], check=True)
             print("✅ iOS模拟器可用")
         except (subprocess.CalledProcessError, FileNotFoundError):
             print("⚠️ iOS模拟器不可用")
             
         # 检查CocoaPods
         try:
-            result = subprocess.run(['pod', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['pod', '--version'], check=True)
             print(f"✅ CocoaPods: {result.stdout.strip()}")
         except (subprocess.CalledProcessError, FileNotFoundError):
             print("❌ CocoaPods未安装")
@@ -187,14 +190,12 @@ class iOSBuilder:
         else:
             cmd.append('--no-codesign')  # 暂时不签名，后续单独处理
             
-        # 执行构建
-        try:
-            result = subprocess.run(cmd, cwd=self.project_root, check=True)
+        # 执行构建（输出同时写入 build_logs/，各阶段耗时记入构建遥测）
+        if run_instrumented_build(cmd, "ios", configuration.lower(), self.project_root):
             print("✅ iOS构建成功")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ iOS构建失败: {e}")
-            return False
+        print("❌ iOS构建失败")
+        return False
             
     def build_ipa(self, configuration="Release", export_method="app-store"):
         """构建IPA文件"""
@@ -220,12 +221,10 @@ class iOSBuilder:
             'CODE_SIGNING_ALLOWED=NO'  # 暂时禁用代码签名
         ]
         
-        try:
-            subprocess.run(archive_cmd, check=True)
-            print("✅ Archive创建成功")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Archive创建失败: {e}")
+        if not run_instrumented_build(archive_cmd, "ios", f"{configuration.lower()}-archive", self.project_root):
+            print("❌ Archive创建失败")
             return False
+        print("✅ Archive创建成功")
             
         # 导出IPA
         export_options_plist = self.create_export_options_plist(export_method)
@@ -239,13 +238,11 @@ class iOSBuilder:
             '-exportOptionsPlist', str(export_options_plist)
         ]
         
-        try:
-            subprocess.run(export_cmd, check=True)
+        if run_instrumented_build(export_cmd, "ios", f"{configuration.lower()}-export", self.project_root):
             print("✅ IPA导出成功")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ IPA导出失败: {e}")
-            return False
+        print("❌ IPA导出失败")
+        return False
             
     def create_export_options_plist(self, export_method):
         """创建导出选项plist文件"""
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+本地化键批量重命名
+把整个 旧键 -> 新键 映射编译为一个正则，每个文件只扫描一遍：匹配 "访问器 + 完整标识符"，
+再用哈希表查找该标识符是否需要重命名，因此 l10n.save 不会误改 l10n.saveAs 中的前缀；
+不包含任何旧键的文件先由一次标识符集合求交筛掉（与映射大小无关），不再执行替换
+"""
+
+import re
+from typing import Iterable, Mapping, Tuple
+
+# 常见的本地化访问方式（字面量前缀）
+DEFAULT_ACCESSORS = (
+    'l10n.',
+    'AppLocalizations.of(context).',
+)
+
+IDENTIFIER = re.compile(r'[A-Za-z0-9_$]+')
+
+
+class KeyRenamer:
+    """单遍、按标识符边界的多键重命名器
+
+    映射是同时生效的：a -> b、b -> c 时原来的 a 变为 b，原来的 b 变为 c，不会链式替换。
+    """
+
+    def __init__(self, key_mapping: Mapping[str, str], accessors: Iterable[str] = DEFAULT_ACCESSORS):
+        self.mapping = {old: new for old, new in key_mapping.items() if old != new}
+        # 较长的前缀优先，保证 context.l10n. 这类前缀整体匹配
+        self.accessors = sorted(set(accessors), key=len, reverse=True)
+        self.pattern = re.compile(
+            '(' + '|'.join(re.escape(accessor) for accessor in self.accessors) + r')([A-Za-z0-9_$]+)'
+        )
+        self.old_keys = frozenset(self.mapping)
+
+    def may_apply(self, content: str) -> bool:
+        """快速预筛：内容中没有出现任何旧键，或没有任何访问器前缀时不可能需要修改"""
+        return (bool(self.old_keys) and any(accessor in content for accessor in self.accessors)
+                and not self.old_keys.isdisjoint(IDENTIFIER.findall(content)))
+
+    def rename(self, content: str) -> Tuple[str, int]:
+        """返回 (新内容, 替换的引用数)"""
+        if not self.may_apply(content):
+            return content, 0
+
+        count = 0
+
+        def replace(match):
+            nonlocal count
+            new_key = self.mapping.get(match.group(2))
+            if new_key is None:
+                return match.group(0)
+            count += 1
+            return match.group(1) + new_key
+
+        new_content = self.pattern.sub(replace, content)
+        return new_content, count
@@ -14,6 +14,9 @@ import tempfile
 from pathlib import Path
 from datetime import datetime
 
+from build_telemetry import run_instrumented_build
+from toolchain_probe import get_toolchain_probe
+
 class LinuxBuilder:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
@@ -33,10 +36,15 @@ class LinuxBuilder:
             print("❌ Linux构建需要在Linux系统上进行")
             return False
             
+        probe = get_toolchain_probe(self.project_root)
+        probe.prefetch([['flutter', '--version'], ['pkg-config', '--exists', 'gtk+-3.0']] + [
+            [tool, '--version'] for tool in ['cmake', 'ninja', 'pkg-config', 'gcc', 'g++', 'appimagetool',
+                                             'snapcraft', 'flatpak-builder', 'dpkg-deb', 'rpmbuild']
+        ])
+            
         # 检查Flutter
         try:
-            result = subprocess.run(['flutter', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['flutter', '--version'], check=True)
             flutter_version = result.stdout.split()[1]
             print(f"✅ Flutter: {flutter_version}")
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -54,8 +62,7 @@ class LinuxBuilder:
         
         for tool, name in build_tools.items():
             try:
-                subprocess.run([tool, '--version'], 
-                             capture_output=True, text=True, check=True)
+                probe.run([tool, '--version'], check=True)
                 print(f"✅ {name}可用")
             except (subprocess.CalledProcessError, FileNotFoundError):
                 print(f"❌ {name}未安装")
@@ -63,7 +70,7 @@ class LinuxBuilder:
                 
         # 检查GTK开发库
         try:
-            subprocess.run(['pkg-config', '--exists', 'gtk+-3.0'], check=True)
+            probe.run(['pkg-config', '--exists', 'gtk+-3.0'], check=True)
             print("✅ GTK+3开发库可用")
         except subprocess.CalledProcessError:
             print("❌ GTK+3开发库未安装")
@@ -80,8 +87,7 @@ class LinuxBuilder:
         
         for tool, name in optional_tools.items():
             try:
-                subprocess.run([tool, '--version'], 
-                             capture_output=True, text=True, check=True)
+                probe.run([tool, '--version'], check=True)
                 print(f"✅ {name}可用")
             except (subprocess.CalledProcessError, FileNotFoundError):
                 print(f"⚠️ {name}未安装（可选）")
@@ -137,14 +143,12 @@ class LinuxBuilder:
         else:
             cmd.append('--release')
             
-        # 执行构建
-        try:
-            result = subprocess.run(cmd, cwd=self.project_root, check=True)
+        # 执行构建（输出同时写入 build_logs/，各阶段耗时记入构建遥测）
+        if run_instrumented_build(cmd, "linux", build_mode, self.project_root):
             print("✅ Linux构建成功")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Linux构建失败: {e}")
-            return False
+        print("❌ Linux构建失败")
+        return False
             
     def create_appimage(self, build_mode="release"):
         """创建AppImage包"""
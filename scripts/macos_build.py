@@ -14,6 +14,9 @@ import plistlib
 from pathlib import Path
 from datetime import datetime
 
+from build_telemetry import run_instrumented_build
+from toolchain_probe import get_toolchain_probe
+
 class macOSBuilder:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
@@ -33,10 +36,13 @@ class macOSBuilder:
             print("❌ macOS构建需要在macOS系统上进行")
             return False
             
+        probe = get_toolchain_probe(self.project_root)
+        probe.prefetch([['flutter', '--version'], ['xcodebuild', '-version'],
+                        ['pod', '--version'], ['create-dmg', '--version']])
+            
         # 检查Flutter
         try:
-            result = subprocess.run(['flutter', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['flutter', '--version'], check=True)
             flutter_version = result.stdout.split()[1]
             print(f"✅ Flutter: {flutter_version}")
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -45,8 +51,7 @@ class macOSBuilder:
             
         # 检查Xcode
         try:
-            result = subprocess.run(['xcodebuild', '-version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['xcodebuild', '-version'], check=True)
             xcode_version = result.stdout.split('\n')[0]
             print(f"✅ {xcode_version}")
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -55,8 +60,7 @@ class macOSBuilder:
             
         # 检查CocoaPods
         try:
-            result = subprocess.run(['pod', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['pod', '--version'], check=True)
             print(f"✅ CocoaPods: {result.stdout.strip()}")
         except (subprocess.CalledProcessError, FileNotFoundError):
             print("❌ CocoaPods未安装")
@@ -64,8 +68,7 @@ class macOSBuilder:
             
         # 检查create-dmg工具
         try:
-            result = subprocess.run(['create-dmg', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['create-dmg', '--version'], check=True)
             print("✅ create-dmg可用")
         except (subprocess.CalledProcessError, FileNotFoundError):
             print("⚠️ create-dmg未安装 (brew install create-dmg)")
@@ -184,14 +187,12 @@ class macOSBuilder:
         else:
             cmd.append('--release')
             
-        # 执行构建
-        try:
-            result = subprocess.run(cmd, cwd=self.project_root, check=True)
+        # 执行构建（输出同时写入 build_logs/，各阶段耗时记入构建遥测）
+        if run_instrumented_build(cmd, "macos", configuration.lower(), self.project_root):
             print("✅ macOS构建成功")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ macOS构建失败: {e}")
-            return False
+        print("❌ macOS构建失败")
+        return False
             
     def sign_app(self, app_path, identity=None):
         """签名应用"""
@@ -472,8 +473,7 @@ class macOSBuilder:
     def get_flutter_version(self):
         """获取Flutter版本"""
         try:
-            result = subprocess.run(['flutter', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = get_toolchain_probe(self.project_root).run(['flutter', '--version'], check=True)
             return result.stdout.split()[1]
         except:
             return "Unknown"
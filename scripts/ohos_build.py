@@ -14,6 +14,9 @@ import json5
 from pathlib import Path
 from datetime import datetime
 
+from build_telemetry import run_instrumented_build
+from toolchain_probe import get_toolchain_probe
+
 class HarmonyOSBuilder:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
@@ -28,6 +31,9 @@ class HarmonyOSBuilder:
         """检查鸿蒙OS构建环境"""
         print("🔍 检查鸿蒙OS构建环境...")
         
+        probe = get_toolchain_probe(self.project_root)
+        probe.prefetch([['node', '--version'], ['npm', '--version']])
+        
         # 检查DevEco Studio命令行工具
         deveco_paths = [
             Path.home() / "Huawei" / "DevEco Studio" / "tools" / "hvigor",
@@ -48,8 +54,7 @@ class HarmonyOSBuilder:
             
         # 检查Node.js
         try:
-            result = subprocess.run(['node', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['node', '--version'], check=True)
             node_version = result.stdout.strip()
             print(f"✅ Node.js: {node_version}")
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -58,8 +63,7 @@ class HarmonyOSBuilder:
             
         # 检查npm
         try:
-            result = subprocess.run(['npm', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['npm', '--version'], check=True)
             npm_version = result.stdout.strip()
             print(f"✅ npm: {npm_version}")
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -202,14 +206,12 @@ class HarmonyOSBuilder:
         else:
             cmd = ['npm', 'run', 'build:release']
             
-        # 执行构建
-        try:
-            result = subprocess.run(cmd, cwd=self.ohos_dir, check=True)
+        # 执行构建（输出同时写入 build_logs/，各阶段耗时记入构建遥测）
+        if run_instrumented_build(cmd, "harmonyos", build_mode, self.project_root, cwd=self.ohos_dir):
             print("✅ HAP构建成功")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ HAP构建失败: {e}")
-            return False
+        print("❌ HAP构建失败")
+        return False
             
     def sign_hap(self, hap_path, keystore_path=None, keystore_password=None):
         """签名HAP包"""
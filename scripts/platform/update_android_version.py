@@ -38,6 +38,66 @@ def update_android_version(project_root, version_name, version_code):
             print(f"警告: Android构建文件不存在")
             return False
 
+def plan_android_version(project_root, version_name, version_code):
+    """规划Android平台的版本修改（不写文件）
+    
+    Args:
+        project_root: 项目根目录
+        version_name: 版本名称 (如: 1.0.0)
+        version_code: 版本代码 (构建号)
+    
+    Returns:
+        tuple: (edits, errors)，edits 为 [(文件路径, 内容转换函数)]，errors 为错误信息列表
+    """
+    android_dir = Path(project_root) / 'android'
+    
+    if not android_dir.exists():
+        return [], ["Android平台目录不存在"]
+    
+    build_gradle_file = android_dir / 'app' / 'build.gradle.kts'
+    if build_gradle_file.exists():
+        return [(build_gradle_file, lambda content: render_build_gradle_kts(content, version_name, version_code))], []
+    
+    build_gradle_file = android_dir / 'app' / 'build.gradle'
+    if build_gradle_file.exists():
+        return [(build_gradle_file, lambda content: render_build_gradle(content, version_name, version_code))], []
+    
+    return [], ["Android构建文件不存在"]
+
+def render_build_gradle_kts(content, version_name, version_code):
+    """返回更新版本后的build.gradle.kts内容"""
+    # 更新versionCode
+    content = re.sub(
+        r'versionCode\s*=\s*\d+',
+        f'versionCode = {version_code}',
+        content
+    )
+    
+    # 更新versionName
+    content = re.sub(
+        r'versionName\s*=\s*"[^"]*"',
+        f'versionName = "{version_name}"',
+        content
+    )
+    return content
+
+def render_build_gradle(content, version_name, version_code):
+    """返回更新版本后的build.gradle内容"""
+    # 更新versionCode
+    content = re.sub(
+        r'versionCode\s+\d+',
+        f'versionCode {version_code}',
+        content
+    )
+    
+    # 更新versionName
+    content = re.sub(
+        r'versionName\s+"[^"]*"',
+        f'versionName "{version_name}"',
+        content
+    )
+    return content
+
 def update_build_gradle_kts(file_path, version_name, version_code):
     """更新Kotlin DSL格式的build.gradle.kts文件
     
@@ -53,19 +113,7 @@ def update_build_gradle_kts(file_path, version_name, version_code):
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # 更新versionCode
-        content = re.sub(
-            r'versionCode\s*=\s*\d+',
-            f'versionCode = {version_code}',
-            content
-        )
-        
-        # 更新versionName
-        content = re.sub(
-            r'versionName\s*=\s*"[^"]*"',
-            f'versionName = "{version_name}"',
-            content
-        )
+        content = render_build_gradle_kts(content, version_name, version_code)
         
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
@@ -92,19 +140,7 @@ def update_build_gradle(file_path, version_name, version_code):
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # 更新versionCode
-        content = re.sub(
-            r'versionCode\s+\d+',
-            f'versionCode {version_code}',
-            content
-        )
-        
-        # 更新versionName
-        content = re.sub(
-            r'versionName\s+"[^"]*"',
-            f'versionName "{version_name}"',
-            content
-        )
+        content = render_build_gradle(content, version_name, version_code)
         
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
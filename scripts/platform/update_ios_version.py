@@ -33,6 +33,31 @@ def update_ios_version(project_root, bundle_short_version, bundle_version):
         print(f"警告: iOS Info.plist文件不存在: {info_plist_file}")
         return False
 
+def plan_ios_version(project_root, bundle_short_version, bundle_version):
+    """规划iOS平台的版本修改（不写文件）
+    
+    Returns:
+        tuple: (edits, errors)，edits 为 [(文件路径, 内容转换函数)]，errors 为错误信息列表
+    """
+    info_plist_file = Path(project_root) / 'ios' / 'Runner' / 'Info.plist'
+    
+    if not info_plist_file.parent.parent.exists():
+        return [], ["iOS平台目录不存在"]
+    if not info_plist_file.exists():
+        return [], [f"iOS Info.plist文件不存在: {info_plist_file}"]
+    return [(info_plist_file, lambda content: render_info_plist(content, bundle_short_version, bundle_version))], []
+
+def render_info_plist(content, bundle_short_version, bundle_version):
+    """返回更新版本后的Info.plist内容（版本已一致时原样返回，不重新序列化）"""
+    plist_data = plistlib.loads(content.encode('utf-8'))
+    if (plist_data.get('CFBundleShortVersionString') == bundle_short_version
+            and plist_data.get('CFBundleVersion') == bundle_version):
+        return content
+    
+    plist_data['CFBundleShortVersionString'] = bundle_short_version
+    plist_data['CFBundleVersion'] = bundle_version
+    return plistlib.dumps(plist_data).decode('utf-8')
+
 def update_info_plist(file_path, bundle_short_version, bundle_version):
     """更新Info.plist文件
     
@@ -42,6 +42,57 @@ def update_linux_version(project_root, major, minor, patch, build_number):
     
     return success
 
+def plan_linux_version(project_root, major, minor, patch, build_number):
+    """规划Linux平台的版本修改（不写文件）
+    
+    Returns:
+        tuple: (edits, errors)，edits 为 [(文件路径, 内容转换函数)]，errors 为错误信息列表
+    """
+    linux_dir = Path(project_root) / 'linux'
+    
+    if not linux_dir.exists():
+        return [], ["Linux平台目录不存在"]
+    
+    cmake_file = linux_dir / 'CMakeLists.txt'
+    if not cmake_file.exists():
+        return [], [f"Linux CMakeLists.txt文件不存在: {cmake_file}"]
+    return [(cmake_file, lambda content: render_cmake_version(content, major, minor, patch, build_number))], []
+
+def render_cmake_version(content, major, minor, patch, build_number):
+    """返回更新版本后的CMakeLists.txt内容（缺少版本定义时在project()之后添加）"""
+    version_string = f"{major}.{minor}.{patch}-{build_number}"
+    
+    # 更新各种版本定义
+    replacements = [
+        (r'set\(APP_VERSION_MAJOR\s+\d+\)', f'set(APP_VERSION_MAJOR {major})'),
+        (r'set\(APP_VERSION_MINOR\s+\d+\)', f'set(APP_VERSION_MINOR {minor})'),
+        (r'set\(APP_VERSION_PATCH\s+\d+\)', f'set(APP_VERSION_PATCH {patch})'),
+        (r'set\(APP_BUILD_NUMBER\s+("?)\w+\1\)', rf'set(APP_BUILD_NUMBER \g<1>{build_number}\g<1>)'),  # 保留原有引号
+        (r'set\(APP_VERSION_STRING\s+"[^"]*"\)', f'set(APP_VERSION_STRING "{version_string}")'),
+        (r'set\(VERSION\s+"[^"]*"\)', f'set(VERSION "{version_string}")'),
+    ]
+    
+    for pattern, replacement in replacements:
+        content = re.sub(pattern, replacement, content, flags=re.IGNORECASE)
+    
+    # 如果没有找到版本定义，添加它们
+    if 'APP_VERSION_MAJOR' not in content:
+        # 在project()声明后添加版本定义
+        project_match = re.search(r'project\([^)]+\)', content, re.IGNORECASE)
+        if project_match:
+            insert_pos = project_match.end()
+            version_definitions = f"""
+
+# 应用版本信息
+set(APP_VERSION_MAJOR {major})
+set(APP_VERSION_MINOR {minor})
+set(APP_VERSION_PATCH {patch})
+set(APP_BUILD_NUMBER {build_number})
+set(APP_VERSION_STRING "{version_string}")
+"""
+            content = content[:insert_pos] + version_definitions + content[insert_pos:]
+    return content
+
 def update_cmake_version(file_path, major, minor, patch, build_number):
     """更新CMakeLists.txt文件
     
@@ -59,37 +110,7 @@ def update_cmake_version(file_path, major, minor, patch, build_number):
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        version_string = f"{major}.{minor}.{patch}-{build_number}"
-        
-        # 更新各种版本定义
-        replacements = [
-            (r'set\(APP_VERSION_MAJOR\s+\d+\)', f'set(APP_VERSION_MAJOR {major})'),
-            (r'set\(APP_VERSION_MINOR\s+\d+\)', f'set(APP_VERSION_MINOR {minor})'),
-            (r'set\(APP_VERSION_PATCH\s+\d+\)', f'set(APP_VERSION_PATCH {patch})'),
-            (r'set\(APP_BUILD_NUMBER\s+\w+\)', f'set(APP_BUILD_NUMBER {build_number})'),
-            (r'set\(APP_VERSION_STRING\s+"[^"]*"\)', f'set(APP_VERSION_STRING "{version_string}")'),
-            (r'set\(VERSION\s+"[^"]*"\)', f'set(VERSION "{version_string}")'),
-        ]
-        
-        for pattern, replacement in replacements:
-            content = re.sub(pattern, replacement, content, flags=re.IGNORECASE)
-        
-        # 如果没有找到版本定义，添加它们
-        if 'APP_VERSION_MAJOR' not in content:
-            # 在project()声明后添加版本定义
-            project_match = re.search(r'project\([^)]+\)', content, re.IGNORECASE)
-            if project_match:
-                insert_pos = project_match.end()
-                version_definitions = f"""
-
-# 应用版本信息
-set(APP_VERSION_MAJOR {major})
-set(APP_VERSION_MINOR {minor})
-set(APP_VERSION_PATCH {patch})
-set(APP_BUILD_NUMBER {build_number})
-set(APP_VERSION_STRING "{version_string}")
-"""
-                content = content[:insert_pos] + version_definitions + content[insert_pos:]
+        content = render_cmake_version(content, major, minor, patch, build_number)
         
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
@@ -51,6 +51,79 @@ def update_ohos_version(project_root, version_info):
     
     return success
 
+def plan_ohos_version(project_root, version_info):
+    """规划鸿蒙平台的版本修改（不写文件）
+    
+    Returns:
+        tuple: (edits, errors)，edits 为 [(文件路径, 内容转换函数)]，errors 为错误信息列表
+    """
+    ohos_dir = Path(project_root) / 'ohos'
+    
+    if not ohos_dir.exists():
+        return [], ["鸿蒙平台目录不存在"]
+    
+    edits = []
+    app_config_file = ohos_dir / 'app' / 'app.json5'
+    if app_config_file.exists():
+        edits.append((app_config_file, lambda content: render_json5_version(content, version_info)))
+    else:
+        print(f"警告: {app_config_file} 不存在")
+    
+    entry_config_file = ohos_dir / 'entry' / 'src' / 'main' / 'config.json'
+    if entry_config_file.exists():
+        edits.append((entry_config_file, lambda content: render_json_version(content, version_info)))
+    else:
+        print(f"警告: {entry_config_file} 不存在")
+    
+    return edits, []
+
+def render_json5_version(content, version_info):
+    """返回更新版本后的JSON5内容（json5解析后版本已一致时原样返回）"""
+    if HAS_JSON5:
+        # 使用json5库解析和更新
+        try:
+            data = json5.loads(content)
+            if (data['app'].get('versionCode') == version_info['versionCode']
+                    and data['app'].get('versionName') == version_info['versionName']):
+                return content
+            data['app']['versionCode'] = version_info['versionCode']
+            data['app']['versionName'] = version_info['versionName']
+            return json5.dumps(data, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"json5解析失败，使用正则表达式: {e}")
+            # 继续使用正则表达式方法
+    
+    # 使用正则表达式替换（备用方法）
+    # 替换versionCode
+    content = re.sub(
+        r'"versionCode":\s*\d+',
+        f'"versionCode": {version_info["versionCode"]}',
+        content
+    )
+    
+    # 替换versionName
+    content = re.sub(
+        r'"versionName":\s*"[^"]*"',
+        f'"versionName": "{version_info["versionName"]}"',
+        content
+    )
+    return content
+
+def render_json_version(content, version_info):
+    """返回更新版本后的JSON内容（版本已一致时原样返回，不重新格式化）"""
+    config = json.loads(content)
+    app = config['app']
+    
+    updated = dict(app, versionCode=version_info['versionCode'], versionName=version_info['versionName'])
+    # 更新最小兼容版本（如果存在）
+    if 'minCompatibleVersionCode' in app:
+        updated['minCompatibleVersionCode'] = version_info['versionCode']
+    if updated == app:
+        return content
+    
+    config['app'] = updated
+    return json.dumps(config, indent=2, ensure_ascii=False)
+
 def update_json5_version(file_path, version_info):
     """更新JSON5格式的版本信息
     
@@ -62,41 +135,10 @@ def update_json5_version(file_path, version_info):
         bool: 更新是否成功
     """
     try:
-        # 读取JSON5文件
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        if HAS_JSON5:
-            # 使用json5库解析和更新
-            try:
-                data = json5.loads(content)
-                data['app']['versionCode'] = version_info['versionCode']
-                data['app']['versionName'] = version_info['versionName']
-                
-                # 写回文件
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(json5.dumps(data, indent=2, ensure_ascii=False))
-                    
-                print(f"已更新 {file_path}")
-                return True
-            except Exception as e:
-                print(f"json5解析失败，使用正则表达式: {e}")
-                # 继续使用正则表达式方法
-        
-        # 使用正则表达式替换（备用方法）
-        # 替换versionCode
-        content = re.sub(
-            r'"versionCode":\s*\d+',
-            f'"versionCode": {version_info["versionCode"]}',
-            content
-        )
-        
-        # 替换versionName
-        content = re.sub(
-            r'"versionName":\s*"[^"]*"',
-            f'"versionName": "{version_info["versionName"]}"',
-            content
-        )
+        content = render_json5_version(content, version_info)
         
         # 写回文件
         with open(file_path, 'w', encoding='utf-8') as f:
@@ -120,21 +162,14 @@ def update_json_version(file_path, version_info):
         bool: 更新是否成功
     """
     try:
-        # 读取JSON文件
         with open(file_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        
-        # 更新版本信息
-        config['app']['versionCode'] = version_info['versionCode']
-        config['app']['versionName'] = version_info['versionName']
+            content = f.read()
         
-        # 更新最小兼容版本（如果存在）
-        if 'minCompatibleVersionCode' in config['app']:
-            config['app']['minCompatibleVersionCode'] = version_info['versionCode']
+        content = render_json_version(content, version_info)
         
         # 写回文件
         with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+            f.write(content)
             
         print(f"已更新 {file_path}")
         return True
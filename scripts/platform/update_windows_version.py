@@ -45,28 +45,110 @@ def update_windows_version(project_root, file_version, product_version, msix_ver
     # 更新 pubspec.yaml 中的 MSIX 配置
     pubspec_file = Path(project_root) / 'pubspec.yaml'
     if pubspec_file.exists():
-        # 如果传入了特定的MSIX版本，使用它；否则按照UWP规则生成
-        if msix_version:
-            final_msix_version = msix_version
-        else:
-            # Windows 10/11 UWP 软件包要求：第四部分必须保留为 0
-            # 版本号格式：主版本.次版本.修订版本.0（第四部分保留给应用商店使用）
-            version_parts = file_version.split('.')
-            if len(version_parts) >= 3:
-                # 确保前三部分都在0-65535范围内
-                major = min(int(version_parts[0]), 65535)
-                minor = min(int(version_parts[1]), 65535)
-                patch = min(int(version_parts[2]), 65535)
-                # UWP 要求：第四部分必须为 0
-                final_msix_version = f"{major}.{minor}.{patch}.0"
-            else:
-                final_msix_version = f"{file_version}.0"
-
-        if not update_pubspec_msix(pubspec_file, final_msix_version):
+        if not update_pubspec_msix(pubspec_file, resolve_msix_version(file_version, msix_version)):
             success = False
 
     return success
 
+def resolve_msix_version(file_version, msix_version=None):
+    """MSIX版本：传入了特定的MSIX版本时使用它，否则按照UWP规则生成"""
+    if msix_version:
+        return msix_version
+    
+    # Windows 10/11 UWP 软件包要求：第四部分必须保留为 0
+    # 版本号格式：主版本.次版本.修订版本.0（第四部分保留给应用商店使用）
+    version_parts = file_version.split('.')
+    if len(version_parts) >= 3:
+        # 确保前三部分都在0-65535范围内
+        major = min(int(version_parts[0]), 65535)
+        minor = min(int(version_parts[1]), 65535)
+        patch = min(int(version_parts[2]), 65535)
+        # UWP 要求：第四部分必须为 0
+        return f"{major}.{minor}.{patch}.0"
+    return f"{file_version}.0"
+
+def plan_windows_version(project_root, file_version, product_version, msix_version=None):
+    """规划Windows平台的版本修改（不写文件）
+    
+    Returns:
+        tuple: (edits, errors)，edits 为 [(文件路径, 内容转换函数)]，errors 为错误信息列表
+    """
+    windows_dir = Path(project_root) / 'windows'
+    
+    if not windows_dir.exists():
+        return [], ["Windows平台目录不存在"]
+    
+    edits, errors = [], []
+    
+    runner_rc_file = windows_dir / 'runner' / 'Runner.rc'
+    if runner_rc_file.exists():
+        edits.append((runner_rc_file, lambda content: render_runner_rc(content, file_version, product_version)))
+    else:
+        errors.append(f"Windows Runner.rc文件不存在: {runner_rc_file}")
+    
+    cmake_file = windows_dir / 'CMakeLists.txt'
+    if cmake_file.exists():
+        edits.append((cmake_file, lambda content: render_cmake_version(content, file_version)))
+    
+    pubspec_file = Path(project_root) / 'pubspec.yaml'
+    if pubspec_file.exists():
+        final_msix_version = resolve_msix_version(file_version, msix_version)
+        edits.append((pubspec_file, lambda content: render_pubspec_msix(content, final_msix_version)))
+    
+    return edits, errors
+
+def render_runner_rc(content, file_version, product_version):
+    """返回更新版本后的Runner.rc内容"""
+    # 将版本号转换为逗号分隔格式 (1,0,0,20250620001)
+    file_version_comma = file_version.replace('.', ',')
+    product_version_comma = product_version.replace('.', ',')
+    
+    # 更新FILEVERSION
+    content = re.sub(
+        r'FILEVERSION\s+[\d,]+',
+        f'FILEVERSION {file_version_comma}',
+        content
+    )
+    
+    # 更新PRODUCTVERSION
+    content = re.sub(
+        r'PRODUCTVERSION\s+[\d,]+',
+        f'PRODUCTVERSION {product_version_comma}',
+        content
+    )
+    
+    # 更新VALUE "FileVersion"
+    content = re.sub(
+        r'VALUE "FileVersion", "[^"]*"',
+        f'VALUE "FileVersion", "{file_version}"',
+        content
+    )
+    
+    # 更新VALUE "ProductVersion"
+    content = re.sub(
+        r'VALUE "ProductVersion", "[^"]*"',
+        f'VALUE "ProductVersion", "{product_version}"',
+        content
+    )
+    return content
+
+def render_pubspec_msix(content, msix_version):
+    """返回更新MSIX版本后的pubspec.yaml内容"""
+    return re.sub(
+        r'msix_version:\s*[\d.]+',
+        f'msix_version: {msix_version}',
+        content
+    )
+
+def render_cmake_version(content, version):
+    """返回更新VERSION属性（如果存在）后的CMakeLists.txt内容"""
+    return re.sub(
+        r'set\(VERSION\s+"[^"]*"\)',
+        f'set(VERSION "{version}")',
+        content,
+        flags=re.IGNORECASE
+    )
+
 def update_runner_rc(file_path, file_version, product_version):
     """更新Runner.rc文件
     
@@ -82,37 +164,7 @@ def update_runner_rc(file_path, file_version, product_version):
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # 将版本号转换为逗号分隔格式 (1,0,0,20250620001)
-        file_version_comma = file_version.replace('.', ',')
-        product_version_comma = product_version.replace('.', ',')
-        
-        # 更新FILEVERSION
-        content = re.sub(
-            r'FILEVERSION\s+[\d,]+',
-            f'FILEVERSION {file_version_comma}',
-            content
-        )
-        
-        # 更新PRODUCTVERSION
-        content = re.sub(
-            r'PRODUCTVERSION\s+[\d,]+',
-            f'PRODUCTVERSION {product_version_comma}',
-            content
-        )
-        
-        # 更新VALUE "FileVersion"
-        content = re.sub(
-            r'VALUE "FileVersion", "[^"]*"',
-            f'VALUE "FileVersion", "{file_version}"',
-            content
-        )
-        
-        # 更新VALUE "ProductVersion"
-        content = re.sub(
-            r'VALUE "ProductVersion", "[^"]*"',
-            f'VALUE "ProductVersion", "{product_version}"',
-            content
-        )
+        content = render_runner_rc(content, file_version, product_version)
         
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
@@ -138,12 +190,7 @@ def update_pubspec_msix(pubspec_path, msix_version):
         with open(pubspec_path, 'r', encoding='utf-8') as f:
             content = f.read()
 
-        # 更新msix_version
-        content = re.sub(
-            r'msix_version:\s*[\d.]+',
-            f'msix_version: {msix_version}',
-            content
-        )
+        content = render_pubspec_msix(content, msix_version)
 
         with open(pubspec_path, 'w', encoding='utf-8') as f:
             f.write(content)
@@ -169,13 +216,7 @@ def update_cmake_version(file_path, version):
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # 更新VERSION属性（如果存在）
-        content = re.sub(
-            r'set\(VERSION\s+"[^"]*"\)',
-            f'set(VERSION "{version}")',
-            content,
-            flags=re.IGNORECASE
-        )
+        content = render_cmake_version(content, version)
         
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+文件引用倒排索引
+一次读取所有文件，建立 单词 -> 提及该单词的文件 的倒排索引，
+之后判断"某个名称（如文件名）是否出现在其他文件中"只需哈希查找，无需为每个候选重新读取全部文件
+"""
+
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Hashable, Mapping, Set, Union
+
+WORD_PATTERN = re.compile(r'\w+')
+
+PathLike = Union[str, Path]
+
+
+class ReferenceIndex:
+    """单词倒排索引，支持精确的子串查询
+
+    对于只由单词字符组成的查询（如 Dart 文件名 ``user_profile_page``），它在文件内容中的任何一次
+    出现都必然落在某个极大单词串内部，因此"查询串是内容的子串"等价于"查询串是该文件某个单词的子串"。
+    索引把所有不重复的单词拼接成一个词表字符串，一次 find 即可找到所有包含查询串的单词，
+    结果与直接在文件内容中做子串查找完全一致。包含非单词字符的查询会退回逐文件读取。
+    """
+
+    def __init__(self, files: Mapping[Hashable, PathLike], case_sensitive: bool = True):
+        self.case_sensitive = case_sensitive
+        self.paths: Dict[Hashable, PathLike] = {}
+        self.postings: Dict[str, Set[Hashable]] = defaultdict(set)
+
+        for key, path in files.items():
+            content = self._read(path)
+            if content is None:
+                continue  # 无法读取的文件不参与引用检查
+            self.paths[key] = path
+            for word in set(WORD_PATTERN.findall(content)):
+                self.postings[word].add(key)
+
+        self.vocabulary = sorted(self.postings)
+        self.word_starts = []
+        offset = 0
+        for word in self.vocabulary:
+            self.word_starts.append(offset)
+            offset += len(word) + 1
+        self.blob = '\n'.join(self.vocabulary)
+
+    def _read(self, path: PathLike):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        return content if self.case_sensitive else content.lower()
+
+    def files_mentioning(self, text: str) -> Set[Hashable]:
+        """内容中包含 text 子串的所有文件"""
+        if not self.case_sensitive:
+            text = text.lower()
+        if not text:
+            return set(self.paths)
+
+        if not WORD_PATTERN.fullmatch(text):
+            return {key for key, path in self.paths.items() if text in (self._read(path) or '')}
+
+        result = set()
+        pos = self.blob.find(text)
+        while pos != -1:
+            i = bisect_right(self.word_starts, pos) - 1
+            result |= self.postings[self.vocabulary[i]]
+            if i + 1 >= len(self.vocabulary):
+                break
+            pos = self.blob.find(text, self.word_starts[i + 1])
+        return result
+
+    def is_mentioned(self, text: str, exclude: Hashable = None) -> bool:
+        """text 是否出现在 exclude 以外的任一文件中"""
+        return bool(self.files_mentioning(text) - {exclude})
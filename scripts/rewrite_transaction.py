@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+文件改写事务
+每个文件只读取一次，所有编辑都以原始内容的偏移量记录，提交时一次性应用并通过临时文件 + 原子重命名写回；
+支持干运行模式，只输出统一 diff 而不修改文件
+"""
+
+import os
+import shutil
+import difflib
+import tempfile
+from typing import List, Optional, Tuple
+
+
+class RewriteConflict(ValueError):
+    """同一文件中的两个编辑区间重叠"""
+
+
+class FileRewrite:
+    """单个文件的改写事务
+
+    编辑区间都基于原始内容计算，因此先登记的编辑不会让后续编辑的行号或偏移失效。
+    按行访问时行号从 1 开始，行内容包含行尾换行符；文件按原样读写，不转换换行符。
+    """
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.path = path
+        self.encoding = encoding
+        with open(path, 'r', encoding=encoding, newline='') as f:
+            self.original = f.read()
+
+        # 只按 \n 分行（\r\n 的 \r 保留在行内容中）
+        parts = self.original.split('\n')
+        self.lines: List[str] = [part + '\n' for part in parts[:-1]] + ([parts[-1]] if parts[-1] else [])
+        self._line_starts = [0]
+        for line in self.lines:
+            self._line_starts.append(self._line_starts[-1] + len(line))
+
+        # (起始偏移, 结束偏移, 登记顺序, 替换文本)
+        self._edits: List[Tuple[int, int, int, str]] = []
+
+    # 偏移与行号
+
+    def line_span(self, line_number: int) -> Tuple[int, int]:
+        """第 line_number 行在原始内容中的 [start, end) 区间"""
+        if not 1 <= line_number <= len(self.lines):
+            raise IndexError(f"行号超出范围: {line_number}")
+        return self._line_starts[line_number - 1], self._line_starts[line_number]
+
+    def line(self, line_number: int) -> str:
+        """第 line_number 行的当前内容（若已整行替换则返回替换后的内容）"""
+        start, end = self.line_span(line_number)
+        for edit_start, edit_end, _, text in self._edits:
+            if edit_start == start and edit_end == end:
+                return text
+        return self.original[start:end]
+
+    # 登记编辑
+
+    def _overlaps(self, start: int, end: int) -> Optional[Tuple[int, int, int, str]]:
+        for edit in self._edits:
+            edit_start, edit_end = edit[0], edit[1]
+            if start == end or edit_start == edit_end:
+                # 插入点只与严格包含它的区间冲突
+                if edit_start < start < edit_end or start < edit_start < end:
+                    return edit
+            elif start < edit_end and edit_start < end:
+                return edit
+        return None
+
+    def replace(self, start: int, end: int, text: str) -> None:
+        """用 text 替换原始内容的 [start, end) 区间（start == end 时为插入）"""
+        if not 0 <= start <= end <= len(self.original):
+            raise IndexError(f"编辑区间超出范围: [{start}, {end})")
+        conflict = self._overlaps(start, end)
+        if conflict is not None:
+            raise RewriteConflict(
+                f"{self.path}: 编辑区间 [{start}, {end}) 与 [{conflict[0]}, {conflict[1]}) 重叠"
+            )
+        self._edits.append((start, end, len(self._edits), text))
+
+    def replace_line(self, line_number: int, text: str) -> None:
+        """整行替换（同一行再次替换时覆盖上一次的结果）"""
+        start, end = self.line_span(line_number)
+        self._edits = [edit for edit in self._edits if not (edit[0] == start and edit[1] == end)]
+        self.replace(start, end, text)
+
+    def insert_before_line(self, line_number: int, text: str) -> None:
+        """在原始第 line_number 行之前插入文本（line_number 为行数 + 1 时追加到末尾）"""
+        if line_number == len(self.lines) + 1:
+            offset = len(self.original)
+            if self.original and not self.original.endswith('\n'):
+                text = '\n' + text  # 最后一行没有换行符时先补上
+        else:
+            offset = self.line_span(line_number)[0]
+        self.replace(offset, offset, text)
+
+    def replace_all(self, old: str, new: str, start: int = 0, end: Optional[int] = None) -> int:
+        """替换原始内容 [start, end) 中 old 的所有出现，跳过与已有编辑重叠的位置，返回新登记的编辑数"""
+        if not old:
+            return 0
+        end = len(self.original) if end is None else end
+        count = 0
+        pos = self.original.find(old, start, end)
+        while pos != -1:
+            if self._overlaps(pos, pos + len(old)) is None:
+                self._edits.append((pos, pos + len(old), len(self._edits), new))
+                count += 1
+            pos = self.original.find(old, pos + len(old), end)
+        return count
+
+    # 结果
+
+    @property
+    def text(self) -> str:
+        """应用所有编辑后的内容"""
+        parts = []
+        last = 0
+        for start, end, _, text in sorted(self._edits):
+            parts.append(self.original[last:start])
+            parts.append(text)
+            last = end
+        parts.append(self.original[last:])
+        return ''.join(parts)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self._edits) and self.text != self.original
+
+    def diff(self) -> str:
+        """原始内容与改写结果之间的统一 diff"""
+        return ''.join(difflib.unified_diff(
+            self.original.splitlines(keepends=True),
+            self.text.splitlines(keepends=True),
+            fromfile=f"a/{self.path}",
+            tofile=f"b/{self.path}",
+        ))
+
+    def commit(self, dry_run: bool = False) -> bool:
+        """写回文件；dry_run 时只打印 diff。返回内容是否发生变化"""
+        if not self.changed:
+            return False
+        if dry_run:
+            print(self.diff(), end='')
+            return True
+
+        new_text = self.text
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.rewrite-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding=self.encoding, newline='') as f:
+                f.write(new_text)
+            shutil.copymode(self.path, tmp_path)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return True
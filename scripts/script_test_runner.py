@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+脚本测试运行器
+scripts/test_*.py 中的 test_* 函数由 pytest 收集；直接运行测试文件时用 run_tests(globals()) 依次执行，
+按 [OK]/[ERROR] 输出结果，有失败时返回 1
+"""
+
+from typing import Dict
+
+
+def run_tests(namespace: Dict[str, object]) -> int:
+    tests = [value for name, value in sorted(namespace.items()) if name.startswith('test_') and callable(value)]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e!r}")
+    print(f"\n{len(tests) - failed}/{len(tests)} 项测试通过")
+    return 1 if failed else 0
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+ARB键值相似度聚类
+为各映射生成工具提供共享的分组逻辑：先用精确的分块（相同取值、字符多重集的长度/前缀过滤）
+生成候选键对，只对候选对计算 SequenceMatcher 相似度，再按各工具原有的分组规则组成分组，
+结果与逐对比较全部键完全一致
+"""
+
+import re
+import difflib
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Hashable, List, Mapping, Sequence, Set, Tuple
+
+from text_similarity import similar_pair_candidates
+
+Key = Hashable
+
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+
+# 拼接取值时使用的分隔符（取值中出现该字符时退回逐对比较）
+_SEPARATOR = '\x00'
+
+
+def sequence_ratio(s1: str, s2: str) -> float:
+    """SequenceMatcher 相似度；空串视为不相似，完全相同视为 1.0"""
+    if not s1 or not s2:
+        return 0.0
+    if s1 == s2:
+        return 1.0
+    return difflib.SequenceMatcher(None, s1, s2).ratio()
+
+
+def identical_value_groups(arb_data: Mapping[str, str]) -> Dict[str, List[str]]:
+    """取值完全相同的键分组：取值 -> 键列表（只保留包含多个键的分组，跳过 @ 元数据）"""
+    value_to_keys = defaultdict(list)
+    for key, value in arb_data.items():
+        if not key.startswith('@'):
+            value_to_keys[value].append(key)
+    return {value: keys for value, keys in value_to_keys.items() if len(keys) > 1}
+
+
+def candidate_pairs(columns: Sequence[Sequence[str]], threshold: float) -> Set[Tuple[int, int]]:
+    """多语言候选对：下标对 (i, j) 在每一种语言中的相似度都可能达到阈值
+
+    columns 中每一项是一种语言按相同键顺序排列的取值列表。单一语言的候选集合是精确比较结果的超集，
+    取交集后仍是"所有语言都达到阈值"的超集，调用方需要再计算真实相似度。
+    """
+    pairs = None
+    for texts in columns:
+        candidates = similar_pair_candidates(texts, threshold)
+        pairs = candidates if pairs is None else pairs & candidates
+        if not pairs:
+            break
+    return pairs or set()
+
+
+def greedy_similarity_groups(
+    items: Mapping[Key, str],
+    threshold: float,
+    similarity: Callable[[str, str], float] = sequence_ratio,
+) -> List[List[Key]]:
+    """贪心星形分组
+
+    按 items 的顺序依次取尚未分组的键作为种子，把剩余键中与种子相似度 >= threshold 的键并入该组
+    （只与种子比较，不做传递合并）。相似度按 (种子取值, 其他取值) 的方向计算，
+    与逐一比较剩余键的结果相同，但只对候选对调用 similarity。只返回包含多个键的分组。
+    """
+    keys = list(items)
+    texts = [items[key] for key in keys]
+    neighbors: Dict[int, List[int]] = defaultdict(list)
+    for i, j in candidate_pairs([texts], threshold):
+        neighbors[i].append(j)
+        neighbors[j].append(i)
+
+    remaining = OrderedDict.fromkeys(range(len(keys)))
+    groups = []
+    while remaining:
+        seed, _ = remaining.popitem(last=False)
+        group = [seed]
+        for other in sorted(neighbors.get(seed, ())):
+            if other in remaining and similarity(texts[seed], texts[other]) >= threshold:
+                group.append(other)
+        for other in group[1:]:
+            del remaining[other]
+        if len(group) > 1:
+            groups.append([keys[index] for index in group])
+    return groups
+
+
+def find_similar_values(arb_data: Mapping[str, str], similarity_threshold: float = 0.85) -> List[List[str]]:
+    """取值相同的键分组 + 其余键中取值相似的贪心分组"""
+    identical_groups = list(identical_value_groups(arb_data).values())
+    grouped = {key for group in identical_groups for key in group}
+    remaining = OrderedDict((key, value) for key, value in arb_data.items()
+                            if key not in grouped and not key.startswith('@'))
+    return identical_groups + greedy_similarity_groups(remaining, similarity_threshold)
+
+
+def containment_or_normalized_pairs(values: Sequence[str]) -> List[Tuple[int, int]]:
+    """取值互相包含、或去掉标点后相同的下标对 (i, j)，i < j，按 (i, j) 升序返回
+
+    去标点后的形式按哈希分块；包含关系把所有取值用分隔符拼接成一个字符串，
+    对每个取值在其中 find 出所有出现位置，再二分定位到包含它的取值，无需两两比较。
+    """
+    n = len(values)
+    if any(_SEPARATOR in value for value in values):
+        return [
+            (i, j) for i in range(n) for j in range(i + 1, n)
+            if values[i] in values[j] or values[j] in values[i]
+            or PUNCTUATION_PATTERN.sub('', values[i]) == PUNCTUATION_PATTERN.sub('', values[j])
+        ]
+
+    pairs = set()
+
+    normalized = defaultdict(list)
+    for index, value in enumerate(values):
+        normalized[PUNCTUATION_PATTERN.sub('', value)].append(index)
+    for members in normalized.values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                pairs.add((members[a], members[b]))
+
+    starts = []
+    offset = 0
+    for value in values:
+        starts.append(offset)
+        offset += len(value) + 1
+    blob = _SEPARATOR.join(values)
+
+    for index, value in enumerate(values):
+        if not value:
+            # 空串包含于任何取值
+            pairs.update((min(index, other), max(index, other)) for other in range(n) if other != index)
+            continue
+        pos = blob.find(value)
+        while pos != -1:
+            other = bisect_right(starts, pos) - 1
+            if other != index:
+                pairs.add((min(index, other), max(index, other)))
+            if other + 1 >= n:
+                break
+            pos = blob.find(value, starts[other + 1])  # 同一取值内的其他出现无需再找
+
+    return sorted(pairs)
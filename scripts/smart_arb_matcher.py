@@ -13,12 +13,112 @@ from difflib import SequenceMatcher
 from collections import defaultdict
 import jieba  # 需要安装: pip install jieba
 
+# 相似度 = 字符级相似度 * CHAR_WEIGHT + 词级相似度 * WORD_WEIGHT
+CHAR_WEIGHT = 0.6
+WORD_WEIGHT = 0.4
+
+def clean_text(text: str) -> str:
+    """去除标点符号和空格"""
+    return re.sub(r'[^\w\u4e00-\u9fff]', '', text)
+
+class ARBSimilarityIndex:
+    """ARB中文值的相似度索引
+    
+    预先缓存每个ARB值的清理结果、jieba分词集合和字符级SequenceMatcher，
+    并建立 词 -> 条目、字符 -> 条目 的倒排索引。查询时只对与输入文本共享
+    词或字符的条目计算相似度，并先用长度上界和 quick_ratio 上界剪枝，
+    结果与逐条调用 calculate_text_similarity 的线性扫描完全一致。
+    """
+    
+    def __init__(self, entries: Dict[str, str]):
+        self.keys = list(entries.keys())
+        self.values = [entries[key] for key in self.keys]
+        self.cleaned = [clean_text(value) for value in self.values]
+        self.word_sets = [set(jieba.cut(text)) for text in self.cleaned]
+        # SequenceMatcher 缓存第二个序列的分析结果，查询时只需替换第一个序列
+        self.matchers = [SequenceMatcher(None, '', text) for text in self.cleaned]
+        
+        self.word_index = defaultdict(list)
+        self.char_index = defaultdict(list)
+        self.empty_ids = []
+        for i, text in enumerate(self.cleaned):
+            for word in self.word_sets[i]:
+                self.word_index[word].append(i)
+            for char in set(text):
+                self.char_index[char].append(i)
+            if not text:
+                self.empty_ids.append(i)
+        
+        self._cache = {}
+    
+    def _candidate_ids(self, clean_query: str, query_words: set, threshold: float):
+        """生成可能达到阈值的候选条目"""
+        if threshold > CHAR_WEIGHT:
+            # 字符相似度最多贡献 CHAR_WEIGHT，必须至少共享一个词
+            ids = set()
+            for word in query_words:
+                ids.update(self.word_index.get(word, ()))
+            return ids
+        if threshold > 0:
+            # 必须共享至少一个字符（共享词必然共享字符），或两者清理后均为空串
+            ids = set()
+            for char in set(clean_query):
+                ids.update(self.char_index.get(char, ()))
+            if not clean_query:
+                ids.update(self.empty_ids)
+            return ids
+        return set(range(len(self.keys)))
+    
+    def query(self, text: str, k: int = 5, threshold: float = 0.7) -> List[Tuple[str, str, float]]:
+        """返回相似度 >= threshold 的前k个 (键, 值, 相似度)，按相似度降序"""
+        cache_key = (text, k, threshold)
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+        
+        clean_query = clean_text(text)
+        query_words = set(jieba.cut(clean_query))
+        query_len = len(clean_query)
+        matches = []
+        
+        for i in self._candidate_ids(clean_query, query_words, threshold):
+            words = self.word_sets[i]
+            if query_words and words:
+                word_similarity = len(query_words & words) / len(query_words | words)
+            else:
+                word_similarity = 0
+            
+            # 字符相似度上界：长度上界，再到字符多重集上界
+            total_len = query_len + len(self.cleaned[i])
+            length_bound = 2.0 * min(query_len, len(self.cleaned[i])) / total_len if total_len else 1.0
+            if length_bound * CHAR_WEIGHT + word_similarity * WORD_WEIGHT < threshold:
+                continue
+            
+            matcher = self.matchers[i]
+            matcher.set_seq1(clean_query)
+            if matcher.quick_ratio() * CHAR_WEIGHT + word_similarity * WORD_WEIGHT < threshold:
+                continue
+            
+            similarity = matcher.ratio() * CHAR_WEIGHT + word_similarity * WORD_WEIGHT
+            if similarity >= threshold:
+                matches.append((i, similarity))
+        
+        # 与线性扫描的稳定排序保持一致：相似度相同时按ARB中的顺序
+        matches.sort(key=lambda item: (-item[1], item[0]))
+        result = [(self.keys[i], self.values[i], similarity) for i, similarity in matches[:k]]
+        self._cache[cache_key] = result
+        return result
+    
+    def query_many(self, texts: List[str], k: int = 5, threshold: float = 0.7) -> List[List[Tuple[str, str, float]]]:
+        """批量查询，重复出现的文本只计算一次"""
+        return [self.query(text, k, threshold) for text in texts]
+
 class SmartARBMatcher:
     def __init__(self, arb_zh_path: str = "lib/l10n/app_zh.arb", arb_en_path: str = "lib/l10n/app_en.arb"):
         self.arb_zh_path = arb_zh_path
         self.arb_en_path = arb_en_path
         self.zh_entries = {}
         self.en_entries = {}
+        self._similarity_index = None
         self.load_arb_files()
         
         # 模块映射：路径关键词 -> 模块前缀
@@ -97,11 +197,18 @@ class SmartARBMatcher:
         except Exception as e:
             print(f"❌ 加载ARB文件失败: {e}")
     
+    @property
+    def similarity_index(self) -> ARBSimilarityIndex:
+        """中文ARB值的相似度索引（首次使用时构建）"""
+        if self._similarity_index is None:
+            self._similarity_index = ARBSimilarityIndex(self.zh_entries)
+        return self._similarity_index
+    
     def calculate_text_similarity(self, text1: str, text2: str) -> float:
         """计算文本相似度"""
         # 去除标点符号和空格
-        clean_text1 = re.sub(r'[^\w\u4e00-\u9fff]', '', text1)
-        clean_text2 = re.sub(r'[^\w\u4e00-\u9fff]', '', text2)
+        clean_text1 = clean_text(text1)
+        clean_text2 = clean_text(text2)
         
         # 计算字符级相似度
         char_similarity = SequenceMatcher(None, clean_text1, clean_text2).ratio()
@@ -116,20 +223,12 @@ class SmartARBMatcher:
             word_similarity = 0
         
         # 综合相似度
-        return (char_similarity * 0.6 + word_similarity * 0.4)
+        return char_similarity * CHAR_WEIGHT + word_similarity * WORD_WEIGHT
     
     def find_similar_keys(self, text: str, threshold: float = 0.7) -> List[Tuple[str, str, float]]:
         """查找相似的现有键值"""
-        similar_keys = []
-        
-        for key, value in self.zh_entries.items():
-            similarity = self.calculate_text_similarity(text, value)
-            if similarity >= threshold:
-                similar_keys.append((key, value, similarity))
-        
-        # 按相似度排序
-        similar_keys.sort(key=lambda x: x[2], reverse=True)
-        return similar_keys[:5]  # 返回前5个最相似的
+        # 返回前5个最相似的，按相似度排序
+        return self.similarity_index.query(text, k=5, threshold=threshold)
     
     def extract_module_from_path(self, file_path: str) -> str:
         """从文件路径提取模块信息"""
@@ -232,10 +331,12 @@ class SmartARBMatcher:
         
         return suggested_key
     
-    def match_or_suggest(self, text: str, file_path: str, text_type: str, context: str = '') -> Dict:
+    def match_or_suggest(self, text: str, file_path: str, text_type: str, context: str = '',
+                         similar_keys: Optional[List[Tuple[str, str, float]]] = None) -> Dict:
         """匹配现有键值或建议新键值"""
-        # 首先查找相似的现有键值
-        similar_keys = self.find_similar_keys(text)
+        # 首先查找相似的现有键值（批量匹配时已预先查询）
+        if similar_keys is None:
+            similar_keys = self.find_similar_keys(text)
         
         result = {
             'text': text,
@@ -266,6 +367,11 @@ class SmartARBMatcher:
         
         print(f"🔍 开始匹配 {len(hardcoded_texts)} 个硬编码文本...")
         
+        # 通过相似度索引批量查询top-5相似键值
+        all_similar_keys = self.similarity_index.query_many(
+            [item['text_content'] for item in hardcoded_texts], k=5, threshold=0.7
+        )
+        
         for i, item in enumerate(hardcoded_texts, 1):
             if i % 20 == 0:
                 print(f"   进度: {i}/{len(hardcoded_texts)}")
@@ -274,7 +380,8 @@ class SmartARBMatcher:
                 item['text_content'],
                 item['file_path'],
                 item['text_type'],
-                item.get('context', '')
+                item.get('context', ''),
+                similar_keys=all_similar_keys[i - 1]
             )
             
             # 添加原始信息
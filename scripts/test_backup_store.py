@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+备份库测试：清单的先后顺序（latest）、gc 只删除不再被引用的对象、统计信息缓存不会记录过期内容
+可直接运行，也可由 pytest 收集
+"""
+
+import os
+import sys
+import random
+import time
+import tempfile
+
+from backup_store import BackupStore, cached_digest
+from script_test_runner import run_tests
+
+
+def _write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def _read(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_latest_follows_creation_order_within_one_second():
+    """同一秒内创建的备份：编号后缀 _10 按字典序排在 _2 之前，操作名也不应影响先后"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BackupStore(os.path.join(tmp, "store"))
+        path = os.path.join(tmp, "app_zh.arb")
+        created = []
+        for i in range(12):
+            _write(path, f"content {i}")
+            backup = store.begin("zeta" if i % 2 else "alpha", root=tmp)
+            backup.add(path)
+            created.append(backup.save())
+
+        assert store.manifest_ids() == created
+        assert store.resolve('latest') == created[-1]
+        store.restore('latest')
+        assert _read(path) == "content 11"
+
+
+def test_gc_keeps_objects_of_remaining_manifests():
+    rng = random.Random(20250717)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BackupStore(os.path.join(tmp, "store"))
+        paths = [os.path.join(tmp, "lib", f"file_{i}.txt") for i in range(6)]
+        snapshots = []
+        for _ in range(10):
+            contents = {}
+            for path in rng.sample(paths, rng.randint(1, len(paths))):
+                # 内容取值范围很小，不同备份之间会共享对象
+                contents[path] = f"value {rng.randint(0, 4)}"
+                _write(path, contents[path])
+            backup = store.begin("edit", root=tmp)
+            for path in contents:
+                backup.add(path)
+            snapshots.append((backup.save(), contents))
+
+        keep = 4
+        store.gc(keep=keep)
+        kept = snapshots[-keep:]
+        assert store.manifest_ids() == [manifest_id for manifest_id, _ in kept]
+
+        # 剩余对象恰好是剩余清单引用的对象
+        referenced = {entry['sha256'] for manifest_id, _ in kept
+                      for entry in store.load_manifest(manifest_id)['files'].values()}
+        stored = {name for prefix in os.listdir(store.objects_dir)
+                  for name in os.listdir(os.path.join(store.objects_dir, prefix))}
+        assert stored == referenced
+
+        # 每个保留的备份仍可完整恢复
+        for manifest_id, contents in kept:
+            for path in paths:
+                _write(path, "modified")
+            store.restore(manifest_id)
+            for path, content in contents.items():
+                assert _read(path) == content
+
+
+def test_gc_without_keep_only_removes_unreferenced_objects():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BackupStore(os.path.join(tmp, "store"))
+        path = os.path.join(tmp, "a.txt")
+        _write(path, "one")
+        first = store.snapshot([path], "first")
+        orphan = store.put_bytes(b"orphan")
+
+        assert store.gc() == 1
+        assert not store.has_object(orphan)
+        assert store.manifest_ids() == [first]
+        _write(path, "two")
+        store.restore(first)
+        assert _read(path) == "one"
+
+
+def test_same_size_rewrite_with_unchanged_mtime_is_rehashed():
+    """改写后大小和 mtime 都不变（同一时间戳内改写，或 mtime 被还原）时，备份必须记录新内容"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BackupStore(os.path.join(tmp, "store"))
+        path = os.path.join(tmp, "app_zh.arb")
+        _write(path, "content A")
+        stat = os.stat(path)
+        first = store.snapshot([path], "first")
+
+        _write(path, "content B")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        second = store.snapshot([path], "second")
+
+        store.restore(first)
+        assert _read(path) == "content A"
+        store.restore(second)
+        assert _read(path) == "content B"
+
+
+def test_stat_cache_trusts_only_settled_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BackupStore(os.path.join(tmp, "store"))
+        path = os.path.join(tmp, "a.txt")
+        _write(path, "settled")
+        hour_ago = time.time_ns() - 3600 * 10**9
+        os.utime(path, ns=(hour_ago, hour_ago))
+        digest = store.put_file(path)
+        # ctime 仍是刚才修改 mtime 的时间，需要等记录的条目不再 racy 之后才可信
+        entry = store._load_stat_cache()[os.path.abspath(path)]
+        assert cached_digest(entry, os.stat(path)) is None
+        entry[5] += 3600 * 10**9
+        assert cached_digest(entry, os.stat(path)) == digest
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建缓存测试：产物的存储与恢复、含符号链接的产物不缓存
+可直接运行，也可由 pytest 收集
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from build_cache import BuildCache
+from script_test_runner import run_tests
+
+
+def _write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+
+
+def test_save_and_restore_directory_artifact():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write(root / "build/web/index.html", "<html></html>")
+        _write(root / "build/web/assets/app.js", "main();")
+        cache = BuildCache(root)
+
+        manifest_id = cache.save("web_debug", "fp1", ["build/web"])
+        assert manifest_id
+
+        # 恢复前残留的旧文件应被清除
+        _write(root / "build/web/stale.js", "old")
+        (root / "build/web/index.html").unlink()
+        entry = cache.lookup("web_debug", "fp1")
+        assert cache.restore(entry) == ["build/web"]
+        assert (root / "build/web/index.html").read_text(encoding='utf-8') == "<html></html>"
+        assert (root / "build/web/assets/app.js").read_text(encoding='utf-8') == "main();"
+        assert not (root / "build/web/stale.js").exists()
+
+
+def test_restore_into_moved_project():
+    """项目目录移动后命中缓存，产物应恢复到新的项目目录而不是缓存时的目录"""
+    with tempfile.TemporaryDirectory() as tmp:
+        old_root, new_root = Path(tmp) / "relocA", Path(tmp) / "relocB"
+        _write(old_root / "build/web/index.html", "<html></html>")
+        BuildCache(old_root).save("web_debug", "fp1", ["build/web"])
+
+        old_root.rename(new_root)
+        shutil.rmtree(new_root / "build")
+        cache = BuildCache(new_root)
+        cache.restore(cache.lookup("web_debug", "fp1"))
+        assert (new_root / "build/web/index.html").read_text(encoding='utf-8') == "<html></html>"
+        assert not old_root.exists()
+
+
+def test_fingerprint_changes_on_same_size_edit_with_unchanged_mtime():
+    """源码改写后大小和 mtime 都不变时指纹也必须变化，否则会命中过期的产物"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "lib/main.dart"
+        _write(source, "void main() => a();")
+        stat = source.stat()
+        cache = BuildCache(root)
+        cache._flutter_version = "test"
+        before = cache.fingerprint([], "flutter build web")
+
+        _write(source, "void main() => b();")
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert cache.fingerprint([], "flutter build web") != before
+
+
+def test_directory_symlink_is_not_cached():
+    """macOS bundle 中的 Versions/Current -> A 是指向目录的链接，os.walk 不会进入，必须拒绝缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        bundle = root / "build/app.app"
+        _write(bundle / "Versions/A/Resources/Info.plist", "<plist/>")
+        os.symlink("A", bundle / "Versions/Current")
+        cache = BuildCache(root)
+
+        assert cache.save("macos_release", "fp1", ["build/app.app"]) is None
+        assert cache.lookup("macos_release", "fp1") is None
+
+
+def test_file_symlink_is_not_cached():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write(root / "build/out/lib.so.1", "binary")
+        os.symlink("lib.so.1", root / "build/out/lib.so")
+        cache = BuildCache(root)
+
+        assert cache.save("linux_release", "fp1", ["build/out"]) is None
+
+
+def test_symlinked_artifact_root_is_not_cached():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write(root / "real/index.html", "<html></html>")
+        (root / "build").mkdir()
+        os.symlink(root / "real", root / "build/web")
+        cache = BuildCache(root)
+
+        assert cache.save("web_release", "fp1", ["build/web"]) is None
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
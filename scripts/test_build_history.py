@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建号历史测试：多个进程同时分配构建号不会重复，回滚与 version.yaml 下限
+可直接运行，也可由 pytest 收集
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from build_history import BuildHistoryStore
+from script_test_runner import run_tests
+
+DATE = "20250718"
+
+
+def _allocate_many(db_path: str, count: int) -> list:
+    """在单独的进程中连续分配 count 个构建号"""
+    store = BuildHistoryStore(db_path)
+    return [store.allocate_daily(DATE, None)[1] for _ in range(count)]
+
+
+def test_concurrent_processes_get_unique_sequential_numbers():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "build_history.db")
+        workers, per_worker = 6, 15
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batches = list(executor.map(_allocate_many, [db_path] * workers, [per_worker] * workers))
+
+        numbers = [number for batch in batches for number in batch]
+        expected = [f"{DATE}{sequence:03d}" for sequence in range(1, workers * per_worker + 1)]
+        assert sorted(numbers) == expected
+        assert BuildHistoryStore(db_path).count() == workers * per_worker
+
+
+def test_concurrent_threads_get_unique_numbers():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BuildHistoryStore(os.path.join(tmp, "build_history.db"))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            numbers = list(executor.map(lambda _: store.allocate_daily(DATE, None)[1], range(40)))
+        assert len(set(numbers)) == 40
+
+
+def test_daily_sequence_starts_above_previous_build_of_same_day():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BuildHistoryStore(os.path.join(tmp, "build_history.db"))
+        assert store.allocate_daily(DATE, f"{DATE}007")[1] == f"{DATE}008"
+        assert store.allocate_daily(DATE, f"{DATE}003")[1] == f"{DATE}009"
+        assert store.allocate_daily(DATE, "20250717042")[1] == f"{DATE}010"
+
+
+def test_rollback_target_and_truncate():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BuildHistoryStore(os.path.join(tmp, "build_history.db"))
+        for _ in range(4):
+            store.allocate_daily(DATE, None)
+
+        assert store.rollback_target(4) is None
+        target = store.rollback_target(2)
+        assert target['build_number'] == f"{DATE}002"
+        assert store.count() == 4  # 查找目标不修改历史
+
+        assert store.truncate_after(target['id']) == 2
+        assert [build['build_number'] for build in store.recent()] == [f"{DATE}001", f"{DATE}002"]
+        assert store.allocate_daily(DATE, None)[1] == f"{DATE}003"
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件改写事务测试：随机登记的编辑与逐个应用的参照结果一致，重叠的编辑报告冲突
+可直接运行，也可由 pytest 收集
+"""
+
+import os
+import sys
+import random
+import tempfile
+
+from rewrite_transaction import FileRewrite, RewriteConflict
+from script_test_runner import run_tests
+
+
+def _make_rewrite(directory: str, content: str) -> FileRewrite:
+    path = os.path.join(directory, "sample.dart")
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(content)
+    return FileRewrite(path)
+
+
+def _conflicts(a, b) -> bool:
+    """参照定义：非空区间相交即冲突；插入点只与严格包含它的区间冲突，同一位置的多个插入不冲突"""
+    (a_start, a_end), (b_start, b_end) = a, b
+    if a_start == a_end or b_start == b_end:
+        return b_start < a_start < b_end or a_start < b_start < a_end
+    return a_start < b_end and b_start < a_end
+
+
+def _apply_reference(original: str, edits) -> str:
+    """逐个位置拼出结果：先输出该位置的插入（按登记顺序），再输出从该位置开始的替换或原字符"""
+    output = []
+    position = 0
+    while position <= len(original):
+        output.extend(text for start, end, text in edits if start == end == position)
+        replacement = [(end, text) for start, end, text in edits if start == position and end > start]
+        if replacement:
+            output.append(replacement[0][1])
+            position = replacement[0][0]
+            continue
+        if position < len(original):
+            output.append(original[position])
+        position += 1
+    return ''.join(output)
+
+
+def test_random_edits_match_reference():
+    rng = random.Random(20250801)
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(300):
+            original = ''.join(rng.choice("ab\n文") for _ in range(rng.randint(0, 40)))
+            rewrite = _make_rewrite(tmp, original)
+            accepted = []
+            for _ in range(rng.randint(0, 12)):
+                start = rng.randint(0, len(original))
+                end = start if rng.random() < 0.3 else rng.randint(start, len(original))
+                text = rng.choice(["", "X", "YY", "l10n.key"])
+                expected_conflict = any(_conflicts((start, end), (s, e)) for s, e, _ in accepted)
+                try:
+                    rewrite.replace(start, end, text)
+                except RewriteConflict:
+                    assert expected_conflict, (original, accepted, start, end)
+                    continue
+                assert not expected_conflict, (original, accepted, start, end)
+                accepted.append((start, end, text))
+            assert rewrite.text == _apply_reference(original, accepted), (original, accepted)
+
+
+def test_replace_all_skips_overlapping_occurrences():
+    with tempfile.TemporaryDirectory() as tmp:
+        rewrite = _make_rewrite(tmp, "Text('确定'); Text('确定');\n")
+        rewrite.replace(6, 8, "l10n.ok")  # 第一个 '确定' 的内容
+        assert rewrite.replace_all("'确定'", "l10n.confirm") == 1
+        assert rewrite.text == "Text('l10n.ok'); Text(l10n.confirm);\n"
+
+
+def test_line_edits_use_original_line_numbers():
+    with tempfile.TemporaryDirectory() as tmp:
+        rewrite = _make_rewrite(tmp, "a\r\nb\r\nc")
+        rewrite.insert_before_line(1, "import 'x.dart';\r\n")
+        rewrite.replace_line(2, "B\r\n")
+        rewrite.replace_line(2, "BB\r\n")
+        rewrite.insert_before_line(4, "d\r\n")
+        assert rewrite.line(2) == "BB\r\n"
+        assert rewrite.text == "import 'x.dart';\r\na\r\nBB\r\nc\nd\r\n"
+
+
+def test_commit_writes_only_without_dry_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        rewrite = _make_rewrite(tmp, "one\r\ntwo\r\n")
+        rewrite.replace_line(2, "2\r\n")
+        assert rewrite.commit(dry_run=True)
+        with open(rewrite.path, 'r', encoding='utf-8', newline='') as f:
+            assert f.read() == "one\r\ntwo\r\n"
+        assert rewrite.commit()
+        with open(rewrite.path, 'r', encoding='utf-8', newline='') as f:
+            assert f.read() == "one\r\n2\r\n"
+        assert not [name for name in os.listdir(tmp) if name.endswith('.tmp')]
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+相似文本候选对测试：随机文本上与两两暴力比较的结果对照，候选集合不得遗漏任何达到阈值的文本对
+（SequenceMatcher 的 ratio 与参数顺序有关，两个方向都要检查）
+可直接运行，也可由 pytest 收集
+"""
+
+import sys
+import random
+from difflib import SequenceMatcher
+
+from text_similarity import similar_pair_candidates
+from script_test_runner import run_tests
+
+THRESHOLDS = [0.0, 0.3, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0]
+
+
+def _pair_scores(texts):
+    """暴力计算所有文本对两个方向中较大的 ratio"""
+    scores = {}
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            forward = SequenceMatcher(None, texts[i], texts[j]).ratio()
+            backward = SequenceMatcher(None, texts[j], texts[i]).ratio()
+            scores[(i, j)] = max(forward, backward)
+    return scores
+
+
+def _random_texts(rng, count, alphabet, max_length):
+    texts = []
+    for _ in range(count):
+        if texts and rng.random() < 0.4:
+            # 在已有文本上做少量编辑，产生大量接近阈值的文本对
+            chars = list(rng.choice(texts))
+            for _ in range(rng.randint(0, 3)):
+                operation = rng.random()
+                position = rng.randint(0, len(chars))
+                if operation < 0.4:
+                    chars.insert(position, rng.choice(alphabet))
+                elif chars and operation < 0.7:
+                    del chars[min(position, len(chars) - 1)]
+                elif chars:
+                    chars[min(position, len(chars) - 1)] = rng.choice(alphabet)
+            texts.append(''.join(chars))
+        else:
+            texts.append(''.join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length))))
+    return texts
+
+
+def _check(texts, thresholds=THRESHOLDS):
+    scores = _pair_scores(texts)
+    for threshold in thresholds:
+        candidates = similar_pair_candidates(texts, threshold)
+        assert all(0 <= i < j < len(texts) for i, j in candidates)
+        missing = {pair for pair, score in scores.items() if score >= threshold} - candidates
+        assert not missing, [(texts[i], texts[j], threshold) for i, j in sorted(missing)[:5]]
+
+
+def test_short_texts_match_brute_force():
+    rng = random.Random(20250715)
+    for _ in range(60):
+        _check(_random_texts(rng, rng.randint(0, 40), "abcab", 8))
+
+
+def test_chinese_texts_match_brute_force():
+    rng = random.Random(20250716)
+    alphabet = "保存取消确定删除文件设置的了是"
+    for _ in range(40):
+        _check(_random_texts(rng, rng.randint(2, 50), alphabet, 12))
+
+
+def test_long_texts_with_autojunk_match_brute_force():
+    """超过 200 个字符时 SequenceMatcher 会启用 autojunk，ratio 只会更低，候选集合仍应覆盖"""
+    rng = random.Random(20250717)
+    for _ in range(5):
+        _check(_random_texts(rng, 12, "abcdefgh 文本", 260), (0.5, 0.8, 0.95))
+
+
+def test_duplicates_and_empty_texts():
+    texts = ["", "", "保存", "保存", "a", ""]
+    _check(texts)
+    assert (0, 1) in similar_pair_candidates(texts, 1.0)
+    assert (2, 3) in similar_pair_candidates(texts, 1.0)
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests(globals()))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+文本相似度候选对生成
+在 SequenceMatcher 精确比较之前，用字符倒排索引 + 长度过滤 + 前缀过滤
+筛选出相似度可能达到阈值的文本对，避免对所有文本两两比较
+"""
+
+import math
+from collections import Counter, defaultdict
+from typing import List, Sequence, Set, Tuple
+
+# 浮点误差余量，保证候选集合只会偏大而不会遗漏
+_EPSILON = 1e-9
+
+
+def _char_tokens(text: str) -> List[Tuple[str, int]]:
+    """将文本转换为带出现序号的字符集合，使集合交集等于字符多重集交集"""
+    seen = Counter()
+    tokens = []
+    for char in text:
+        tokens.append((char, seen[char]))
+        seen[char] += 1
+    return tokens
+
+
+def similar_pair_candidates(texts: Sequence[str], threshold: float) -> Set[Tuple[int, int]]:
+    """返回 SequenceMatcher(None, a, b).ratio() 可能 >= threshold 的下标对 (i, j)，i < j
+
+    ratio = 2*M / (len(a)+len(b))，其中匹配字符数 M 不超过两串字符多重集的交集大小，
+    因此 ratio >= threshold 要求交集满足 Dice 系数下界。这里按 AllPairs 算法对
+    字符多重集做长度过滤和前缀过滤（两文本只有在各自最稀有的若干字符中有公共字符时
+    才可能达到阈值），再用完整的多重集交集验证上界。结果是精确比较的超集，
+    调用方仍需计算真实相似度。
+    """
+    n = len(texts)
+    if threshold <= 0:
+        return {(i, j) for i in range(n) for j in range(i + 1, n)}
+
+    delta = threshold - _EPSILON
+    candidates = set()
+
+    # 两个空串的 ratio 为 1.0；空串与非空串的 ratio 为 0
+    empty = [i for i, text in enumerate(texts) if not text]
+    for a in range(len(empty)):
+        for b in range(a + 1, len(empty)):
+            candidates.add((empty[a], empty[b]))
+
+    token_lists = [_char_tokens(text) for text in texts]
+    frequency = Counter(token for tokens in token_lists for token in tokens)
+
+    # 按全局频率升序（最稀有优先）排列每个文本的字符，使前缀尽可能有区分度
+    for tokens in token_lists:
+        tokens.sort(key=lambda token: (frequency[token], token))
+
+    token_sets = [frozenset(tokens) for tokens in token_lists]
+    order = sorted((i for i in range(n) if texts[i]), key=lambda i: len(texts[i]))
+    inverted = defaultdict(list)
+    min_size_ratio = delta / (2 - delta)
+
+    for x in order:
+        size = len(token_lists[x])
+        required = math.ceil(size * min_size_ratio)
+        prefix = token_lists[x][:size - required + 1]
+        min_size = size * min_size_ratio
+
+        probed = set()
+        for token in prefix:
+            for y in inverted[token]:
+                if len(texts[y]) >= min_size:
+                    probed.add(y)
+            inverted[token].append(x)
+
+        # 验证：字符多重集交集必须满足 2*overlap/(|x|+|y|) >= threshold
+        for y in probed:
+            overlap = len(token_sets[x] & token_sets[y])
+            if 2 * overlap >= delta * (size + len(texts[y])):
+                candidates.add((y, x) if y < x else (x, y))
+
+    return candidates
+
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+工具链探测缓存
+构建环境检查中的 `flutter --version`、`flutter doctor --machine`、`java -version` 等探测命令
+通过 ToolchainProbe 执行：互不依赖的探测先用 prefetch() 并发执行，结果缓存到 .build_cache/toolchain_probes.json。
+缓存键包含命令、工作目录、PATH、SDK 相关环境变量及其目录的修改时间、可执行文件的真实路径与修改时间，
+在有效期（默认 12 小时）内同一构建机上重复构建几乎不再执行任何探测；升级工具或修改 PATH 后缓存自动失效。
+结果取决于连接的设备、Flutter 配置或已接受的许可等缓存键无法体现的状态的探测（见 VOLATILE_COMMANDS）
+只在本进程内复用，不写入磁盘。设置环境变量 TOOLCHAIN_PROBE_NO_CACHE=1（或 build_all_platforms.py --no-probe-cache）
+可忽略磁盘缓存、全部重新探测。
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+DEFAULT_CACHE_PATH = os.path.join(".build_cache", "toolchain_probes.json")
+
+# 缓存有效期（秒）
+DEFAULT_TTL = 12 * 3600
+
+DEFAULT_TIMEOUT = 30
+
+# 探测结果受其影响的环境变量（值为目录时同时计入目录修改时间）
+SDK_ENV_VARS = [
+    "FLUTTER_ROOT", "ANDROID_HOME", "ANDROID_SDK_ROOT", "JAVA_HOME",
+    "HARMONYOS_SDK_HOME", "OHOS_SDK_HOME", "DEVELOPER_DIR",
+]
+
+# SDK 目录中安装或升级组件时会变化的子目录
+SDK_SUBDIRS = ["build-tools", "platforms", "platform-tools", "cmdline-tools", "bin"]
+
+# 探测超时时的返回码（与 timeout 命令一致）
+RETURNCODE_TIMEOUT = 124
+
+# 设置为非空值时 get_toolchain_probe() 不使用磁盘缓存
+NO_CACHE_ENV = "TOOLCHAIN_PROBE_NO_CACHE"
+
+# 结果随设备连接、~/.config/flutter 中的设置、许可接受情况等变化的命令（按命令前缀匹配），不写入磁盘缓存
+VOLATILE_COMMANDS = [
+    ("flutter", "devices"),
+    ("flutter", "doctor"),
+    ("flutter", "config"),
+    ("xcrun", "simctl", "list"),
+]
+
+Command = Union[str, Sequence[str]]
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _binary_identity(executable: str) -> Optional[list]:
+    """可执行文件的真实路径、大小、修改时间，以及所在目录和上级目录的修改时间（SDK 升级时通常会变化）"""
+    found = shutil.which(executable)
+    if not found:
+        return None
+    real = Path(os.path.realpath(found))
+    try:
+        stat = real.stat()
+    except OSError:
+        return None
+    return [str(real), stat.st_size, stat.st_mtime_ns, _mtime_ns(real.parent), _mtime_ns(real.parent.parent)]
+
+
+def is_volatile(command: Command) -> bool:
+    parts = tuple(command.split() if isinstance(command, str) else command)
+    return any(parts[:len(prefix)] == prefix for prefix in VOLATILE_COMMANDS)
+
+
+def _sdk_identity() -> Dict[str, list]:
+    identity = {}
+    for name in SDK_ENV_VARS:
+        value = os.environ.get(name)
+        if not value:
+            continue
+        root = Path(value)
+        identity[name] = [value, _mtime_ns(root)] + [_mtime_ns(root / sub) for sub in SDK_SUBDIRS]
+    return identity
+
+
+class ToolchainProbe:
+    """带磁盘缓存的环境探测命令执行器（线程安全）"""
+
+    def __init__(self, project_root: Optional[Path] = None, cache_path: Optional[Path] = None,
+                 ttl: float = DEFAULT_TTL, use_cache: bool = True):
+        self.project_root = Path(project_root) if project_root else Path(__file__).parent.parent
+        self.cache_path = Path(cache_path) if cache_path else self.project_root / DEFAULT_CACHE_PATH
+        self.ttl = ttl
+        self.use_cache = use_cache
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, dict]] = None
+        self._pending: Dict[str, threading.Event] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # 缓存
+
+    def _load(self) -> Dict[str, dict]:
+        """已知的探测结果；不使用缓存时只在本进程内复用"""
+        if self._entries is None:
+            self._entries = {}
+            if self.use_cache:
+                try:
+                    with open(self.cache_path, 'r', encoding='utf-8') as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self._entries
+
+    def _save(self, key: str, entry: dict) -> None:
+        """写入一条结果（重新读取文件后合并，避免覆盖其他进程刚写入的结果），并清理过期条目"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        entries.update(self._entries or {})
+        entries[key] = entry
+        now = time.time()
+        entries = {k: v for k, v in entries.items() if now - v.get('created_at', 0) < self.ttl}
+        self._entries = entries
+        entries = {k: v for k, v in entries.items() if not (v.get('timed_out') or v.get('volatile'))}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass  # 缓存写入失败不影响探测结果
+
+    def cache_key(self, command: Command, cwd: Optional[Path] = None) -> str:
+        parts = command.split() if isinstance(command, str) else list(command)
+        executable = parts[0] if parts else ''
+        identity = {
+            'command': command if isinstance(command, str) else list(command),
+            'cwd': str(Path(cwd).resolve()) if cwd else None,
+            'path': os.environ.get('PATH', ''),
+            'binary': _binary_identity(executable),
+            'sdk': _sdk_identity(),
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode('utf-8')).hexdigest()
+
+    # 执行
+
+    def _execute(self, command: Command, cwd: Optional[Path], timeout: float) -> dict:
+        """执行命令并返回缓存条目"""
+        entry = {'created_at': None, 'returncode': None, 'stdout': "", 'stderr': "", 'not_found': False}
+        try:
+            result = subprocess.run(
+                command, shell=isinstance(command, str), cwd=cwd, capture_output=True, text=True,
+                encoding='utf-8', errors='ignore', timeout=timeout
+            )
+            entry.update(returncode=result.returncode, stdout=result.stdout, stderr=result.stderr)
+        except FileNotFoundError as e:
+            entry.update(not_found=True, stderr=str(e))
+        except subprocess.TimeoutExpired:
+            entry.update(returncode=RETURNCODE_TIMEOUT, stderr="命令执行超时", timed_out=True)
+        entry['created_at'] = time.time()
+        return entry
+
+    @staticmethod
+    def _result(command: Command, entry: dict, check: bool) -> subprocess.CompletedProcess:
+        if entry.get('not_found'):
+            raise FileNotFoundError(entry['stderr'])
+        if check and entry['returncode'] != 0:
+            raise subprocess.CalledProcessError(entry['returncode'], command, entry['stdout'], entry['stderr'])
+        return subprocess.CompletedProcess(command, entry['returncode'], entry['stdout'], entry['stderr'])
+
+    def run(self, command: Command, cwd: Optional[Path] = None, timeout: float = DEFAULT_TIMEOUT,
+            check: bool = False) -> subprocess.CompletedProcess:
+        """执行探测命令（字符串通过 shell 执行），行为与 subprocess.run(capture_output=True, text=True) 一致
+
+        找不到可执行文件时抛出 FileNotFoundError，check 为 True 且返回码非 0 时抛出 subprocess.CalledProcessError。
+        超时视为返回码 124 的失败；超时结果与 VOLATILE_COMMANDS 中命令的结果只在本进程内复用，不写入磁盘缓存。
+        同一命令正在其他线程中执行时等待其结果，不重复执行。
+        """
+        key = self.cache_key(command, cwd)
+        while True:
+            with self._lock:
+                entry = self._load().get(key)
+                if entry and time.time() - entry['created_at'] < self.ttl:
+                    self.hits += 1
+                    return self._result(command, entry, check)
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            entry = self._execute(command, cwd, timeout)
+            if is_volatile(command):
+                entry['volatile'] = True
+            with self._lock:
+                self.misses += 1
+                self._load()[key] = entry
+                if self.use_cache and not (entry.get('timed_out') or entry.get('volatile')):
+                    self._save(key, entry)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.set()
+        return self._result(command, entry, check)
+
+    def prefetch(self, probes: Iterable[Union[Command, Tuple[Command, Path]]], timeout: float = DEFAULT_TIMEOUT,
+                 jobs: int = 8) -> List[Optional[subprocess.CompletedProcess]]:
+        """并发执行多个互不依赖的探测（已缓存的直接返回），之后的 run() 直接使用结果
+
+        probes 的元素为命令，或 (命令, 工作目录) 元组；返回对应的结果，找不到命令的为 None。
+        """
+        def probe(item):
+            command, cwd = item if isinstance(item, tuple) else (item, None)
+            try:
+                return self.run(command, cwd, timeout)
+            except OSError:
+                return None
+
+        probes = list(probes)
+        if not probes:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(probes)))) as executor:
+            return list(executor.map(probe, probes))
+
+    def summary(self) -> str:
+        return f"工具链探测: 缓存命中 {self.hits} 次，执行 {self.misses} 次"
+
+
+_probes: Dict[Path, ToolchainProbe] = {}
+_probes_lock = threading.Lock()
+
+
+def get_toolchain_probe(project_root: Optional[Path] = None) -> ToolchainProbe:
+    """返回项目对应的 ToolchainProbe（同一进程内共用，多个构建器的探测结果互相复用）
+
+    设置了环境变量 TOOLCHAIN_PROBE_NO_CACHE 时不读写磁盘缓存。
+    """
+    key = Path(project_root).resolve() if project_root else Path(__file__).parent.parent.resolve()
+    with _probes_lock:
+        if key not in _probes:
+            _probes[key] = ToolchainProbe(key, use_cache=not os.environ.get(NO_CACHE_ENV))
+        return _probes[key]
@@ -7,12 +7,13 @@
 
 import os
 import sys
-import json
 import yaml
 import argparse
 from pathlib import Path
 from datetime import datetime
 
+from build_history import DEFAULT_DB_NAME, LEGACY_JSON_NAME, BuildHistoryStore
+
 class BuildNumberUpdater:
     """构建号更新器"""
     
@@ -24,7 +25,8 @@ class BuildNumberUpdater:
         """
         self.project_root = Path(project_root) if project_root else Path(__file__).parent.parent
         self.version_config_file = self.project_root / 'version.yaml'
-        self.history_file = self.project_root / 'build_history.json'
+        self.history_file = self.project_root / LEGACY_JSON_NAME
+        self.history = BuildHistoryStore(self.project_root / DEFAULT_DB_NAME, legacy_json=self.history_file)
         
     def load_version_config(self):
         """加载版本配置文件"""
@@ -48,88 +50,43 @@ class BuildNumberUpdater:
             print(f"错误: 保存版本配置文件失败: {e}")
             return False
     
-    def load_build_history(self):
-        """加载构建历史"""
+    def load_build_history(self, limit=100):
+        """加载最近的构建历史"""
         try:
-            if self.history_file.exists():
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                return {'builds': []}
+            return {'builds': self.history.recent(limit)}
         except Exception as e:
             print(f"警告: 加载构建历史失败: {e}")
             return {'builds': []}
     
-    def save_build_history(self, history):
-        """保存构建历史"""
-        try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
-            print(f"警告: 保存构建历史失败: {e}")
-            return False
-    
-    def generate_build_number(self, strategy='auto'):
-        """生成构建号
+    def generate_build_number(self, strategy='auto', previous_build=None):
+        """生成构建号并记入构建历史
+        
+        分配在构建历史数据库的写锁内完成，多个构建同时申请也不会得到相同的构建号。
         
         Args:
             strategy: 构建号生成策略
                 - 'auto': 自动生成（YYYYMMDDXXX格式）
                 - 'increment': 基于上次构建号递增
                 - 'timestamp': 基于时间戳
+            previous_build: 记录在历史中的前一个构建号
         
         Returns:
-            str: 新的构建号
+            tuple: (历史记录编号, 新的构建号)
         """
         if strategy == 'auto':
-            # YYYYMMDDXXX格式
-            now = datetime.now()
-            date_part = now.strftime('%Y%m%d')
-            
-            # 查找当天已有的构建号
-            history = self.load_build_history()
-            today_builds = [
-                build for build in history.get('builds', [])
-                if build.get('build_number', '').startswith(date_part)
-            ]
-            
-            if today_builds:
-                # 获取当天最大的序号
-                max_seq = 0
-                for build in today_builds:
-                    build_num = build.get('build_number', '')
-                    if len(build_num) >= 11:
-                        try:
-                            seq = int(build_num[-3:])
-                            max_seq = max(max_seq, seq)
-                        except ValueError:
-                            continue
-                next_seq = max_seq + 1
-            else:
-                next_seq = 1
-                
-            return f"{date_part}{next_seq:03d}"
+            # YYYYMMDDXXX格式，序号为当天已有的最大序号 + 1
+            date_part = datetime.now().strftime('%Y%m%d')
+            return self.history.allocate_daily(date_part, previous_build, strategy)
             
         elif strategy == 'increment':
-            # 基于上次构建号递增
-            history = self.load_build_history()
-            builds = history.get('builds', [])
+            # 基于上次构建号递增，没有历史或解析失败时回退到auto格式的当天第一个构建号
+            date_part = datetime.now().strftime('%Y%m%d')
+            return self.history.allocate_increment(previous_build, lambda: f"{date_part}001", strategy)
             
-            if builds:
-                last_build = builds[-1]
-                last_build_num = last_build.get('build_number', '20250620001')
-                try:
-                    return str(int(last_build_num) + 1)
-                except ValueError:
-                    # 如果解析失败，回退到auto策略
-                    return self.generate_build_number('auto')
-            else:
-                return self.generate_build_number('auto')
-                
         elif strategy == 'timestamp':
             # 基于时间戳
-            return str(int(datetime.now().timestamp()))
+            build_number = str(int(datetime.now().timestamp()))
+            return self.history.record(build_number, previous_build, strategy), build_number
             
         else:
             raise ValueError(f"不支持的构建号生成策略: {strategy}")
@@ -151,37 +108,23 @@ class BuildNumberUpdater:
         # 获取当前构建号
         current_build = config.get('version', {}).get('build', '20250620001')
         
-        # 生成或使用指定的新构建号
+        # 生成或使用指定的新构建号（同时记录构建历史）
         if new_build_number:
             build_number = str(new_build_number)
+            record_id = self.history.record(build_number, current_build, strategy)
         else:
-            build_number = self.generate_build_number(strategy)
+            record_id, build_number = self.generate_build_number(strategy, previous_build=current_build)
         
         # 更新配置
         if 'version' not in config:
             config['version'] = {}
         config['version']['build'] = build_number
         
-        # 保存配置
+        # 保存配置，失败时撤销刚分配的历史记录
         if not self.save_version_config(config):
+            self.history.discard(record_id)
             return False, None
         
-        # 记录构建历史
-        history = self.load_build_history()
-        build_record = {
-            'build_number': build_number,
-            'previous_build': current_build,
-            'timestamp': datetime.now().isoformat(),
-            'strategy': strategy
-        }
-        history['builds'].append(build_record)
-        
-        # 保持历史记录不超过100条
-        if len(history['builds']) > 100:
-            history['builds'] = history['builds'][-100:]
-        
-        self.save_build_history(history)
-        
         print(f"√ 构建号已更新: {current_build} -> {build_number}")
         return True, build_number
     
@@ -194,32 +137,34 @@ class BuildNumberUpdater:
         Returns:
             tuple: (是否成功, 回滚后的构建号)
         """
-        history = self.load_build_history()
-        builds = history.get('builds', [])
+        config = self.load_version_config()
+        if not config:
+            return False, None
         
-        if len(builds) < steps:
+        # 查找回滚目标（此时还不修改历史）
+        target_build = self.history.rollback_target(steps)
+        if target_build is None:
             print(f"错误: 构建历史不足，无法回滚 {steps} 步")
             return False, None
-        
-        # 获取回滚目标
-        target_build = builds[-(steps + 1)]
         target_build_number = target_build['build_number']
         
-        # 更新配置
-        config = self.load_version_config()
-        if not config:
-            return False, None
-            
+        # 先更新配置，保存失败时构建历史保持不变
         if 'version' not in config:
             config['version'] = {}
+        current_build = config['version'].get('build')
         config['version']['build'] = target_build_number
         
         if not self.save_version_config(config):
             return False, None
         
-        # 更新历史记录（移除回滚的记录）
-        history['builds'] = builds[:-steps]
-        self.save_build_history(history)
+        # 再移除回滚的记录，失败时恢复配置中的构建号
+        try:
+            self.history.truncate_after(target_build['id'])
+        except Exception as e:
+            print(f"错误: 更新构建历史失败: {e}")
+            config['version']['build'] = current_build
+            self.save_version_config(config)
+            return False, None
         
         print(f"√ 构建号已回滚 {steps} 步: -> {target_build_number}")
         return True, target_build_number
@@ -230,8 +175,7 @@ class BuildNumberUpdater:
         Args:
             limit: 显示的记录数量限制
         """
-        history = self.load_build_history()
-        builds = history.get('builds', [])
+        builds = self.load_build_history(limit)['builds']
         
         if not builds:
             print("没有构建历史记录")
@@ -242,7 +186,7 @@ class BuildNumberUpdater:
         print(f"{'序号':<4} {'构建号':<12} {'时间':<20} {'策略':<10} {'前一版本':<12}")
         print("-" * 80)
         
-        for i, build in enumerate(builds[-limit:], 1):
+        for i, build in enumerate(builds, 1):
             timestamp = build.get('timestamp', '')
             if timestamp:
                 try:
@@ -253,8 +197,8 @@ class BuildNumberUpdater:
             else:
                 time_str = 'Unknown'
                 
-            print(f"{i:<4} {build.get('build_number', ''):<12} {time_str:<20} "
-                  f"{build.get('strategy', 'unknown'):<10} {build.get('previous_build', ''):<12}")
+            print(f"{i:<4} {build.get('build_number') or '':<12} {time_str:<20} "
+                  f"{build.get('strategy') or 'unknown':<10} {build.get('previous_build') or '':<12}")
     
     def get_current_build_info(self):
         """获取当前构建信息"""
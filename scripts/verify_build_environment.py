@@ -6,6 +6,7 @@
 
 import os
 import sys
+import argparse
 import subprocess
 import json
 import platform
@@ -14,6 +15,8 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from toolchain_probe import ToolchainProbe, get_toolchain_probe
+
 class PlatformType(Enum):
     ANDROID = "android"
     IOS = "ios"
@@ -48,19 +51,25 @@ class PlatformEnvironment:
         return self.overall_status in [CheckResult.PASS, CheckResult.WARNING]
 
 class BuildEnvironmentVerifier:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.current_os = platform.system().lower()
         self.project_root = Path(__file__).parent.parent
         self.results: Dict[PlatformType, PlatformEnvironment] = {}
+        # 探测结果在磁盘上缓存（键包含 PATH、SDK 目录和工具文件信息），--no-cache 时每次重新探测
+        self.probe = get_toolchain_probe(self.project_root) if use_cache else ToolchainProbe(self.project_root, use_cache=False)
+        
+    def probe_commands(self) -> List[str]:
+        """各项检查用到的探测命令（互不依赖，可以并发执行）"""
+        commands = ["flutter --version", "flutter doctor --machine", "java -version", "flutter config --list"]
+        if self.current_os == "darwin":
+            commands.append("xcodebuild -version")
+        return commands
         
     def run_command(self, command: str, capture_output: bool = True) -> Tuple[bool, str]:
-        """运行命令并返回结果"""
+        """运行命令并返回结果（需要输出的探测命令经由缓存执行）"""
         try:
             if capture_output:
-                result = subprocess.run(
-                    command, shell=True, capture_output=True, text=True, 
-                    timeout=30, encoding='utf-8', errors='ignore'
-                )
+                result = self.probe.run(command, timeout=30)
                 return result.returncode == 0, result.stdout.strip()
             else:
                 result = subprocess.run(command, shell=True, timeout=30)
@@ -229,6 +238,9 @@ class BuildEnvironmentVerifier:
         print("🔍 开始验证构建环境...")
         print("=" * 60)
         
+        # 并发执行所有探测，之后各项检查直接使用结果
+        self.probe.prefetch(self.probe_commands(), timeout=30)
+        
         # 检查Flutter基础环境
         flutter_checks = self.check_flutter_environment()
         print("\n📱 Flutter基础环境:")
@@ -256,11 +268,16 @@ class BuildEnvironmentVerifier:
             
             print(f"  📊 平台状态: {platform_env.overall_status.value}")
         
+        print(f"\n⚡ {self.probe.summary()}")
         return self.results
 
 def main():
     """主函数"""
-    verifier = BuildEnvironmentVerifier()
+    parser = argparse.ArgumentParser(description='构建环境验证')
+    parser.add_argument('--no-cache', action='store_true', help='忽略工具链探测缓存，重新探测')
+    args = parser.parse_args()
+    
+    verifier = BuildEnvironmentVerifier(use_cache=not args.no_cache)
     
     try:
         # 验证所有平台
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+平台版本号写入引擎
+在同一进程中导入 scripts/platform/update_*_version.py，先为所有平台规划好要修改的文件及内容转换，
+再按文件并行执行：每个文件只读取一次（多个平台修改同一文件时依次应用转换），
+内容未变化的文件不写入，变化的文件通过临时文件原子替换
+"""
+
+import os
+import sys
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'platform'))
+
+from rewrite_transaction import FileRewrite
+from update_android_version import plan_android_version
+from update_ios_version import plan_ios_version
+from update_linux_version import plan_linux_version
+from update_macos_version import plan_macos_version
+from update_ohos_version import plan_ohos_version
+from update_windows_version import plan_windows_version
+
+Edit = Tuple[Path, Callable[[str], str]]
+
+# 平台 -> 显示名称（也是输出顺序）
+PLATFORM_LABELS = OrderedDict([
+    ('android', 'Android'),
+    ('ios', 'iOS'),
+    ('ohos', '鸿蒙OS'),
+    ('web', 'Web'),
+    ('windows', 'Windows'),
+    ('macos', 'macOS'),
+    ('linux', 'Linux'),
+])
+
+
+def render_web_manifest(content: str, version_info: dict) -> str:
+    """返回更新版本后的web/manifest.json内容（版本已一致时原样返回，不重新格式化）"""
+    manifest = json.loads(content)
+    if manifest.get('version') == version_info['version'] and manifest.get('version_name') == version_info['version_name']:
+        return content
+    manifest['version'] = version_info['version']
+    manifest['version_name'] = version_info['version_name']
+    return json.dumps(manifest, indent=2, ensure_ascii=False)
+
+
+def plan_web_version(project_root, version_info: dict) -> Tuple[List[Edit], List[str]]:
+    manifest_path = Path(project_root) / 'web' / 'manifest.json'
+    if not manifest_path.exists():
+        return [], [f"Web manifest文件不存在: {manifest_path}"]
+    return [(manifest_path, lambda content: render_web_manifest(content, version_info))], []
+
+
+def plan_platform_edits(project_root, platforms: Dict[str, dict]) -> Dict[str, Tuple[List[Edit], List[str]]]:
+    """按 generate_version_info 生成的各平台版本信息规划所有修改：平台 -> (edits, errors)"""
+    android = platforms['android']
+    ios = platforms['ios']
+    ohos = platforms['ohos']
+    windows = platforms['windows']
+    macos = platforms['macos']
+    linux = platforms['linux']
+    return OrderedDict([
+        ('android', plan_android_version(project_root, android['versionName'], int(android['versionCode']))),
+        ('ios', plan_ios_version(project_root, str(ios['CFBundleShortVersionString']), str(ios['CFBundleVersion']))),
+        ('ohos', plan_ohos_version(project_root, {
+            'versionName': ohos['versionName'],
+            'versionCode': int(ohos['versionCode']),
+        })),
+        ('web', plan_web_version(project_root, platforms['web'])),
+        ('windows', plan_windows_version(project_root, windows['FileVersion'], windows['ProductVersion'],
+                                         windows.get('MSIXVersion', windows['FileVersion']))),
+        ('macos', plan_macos_version(project_root, str(macos['CFBundleShortVersionString']), str(macos['CFBundleVersion']))),
+        ('linux', plan_linux_version(project_root, str(linux['APP_VERSION_MAJOR']), str(linux['APP_VERSION_MINOR']),
+                                     str(linux['APP_VERSION_PATCH']), str(linux['APP_BUILD_NUMBER']))),
+    ])
+
+
+def _apply_file(path: Path, transforms: List[Tuple[str, Callable[[str], str]]]) -> Tuple[bool, List[Tuple[str, str]]]:
+    """对一个文件依次应用各平台的转换，返回 (是否写入, [(平台, 错误信息)])"""
+    try:
+        rewrite = FileRewrite(str(path))
+    except (OSError, UnicodeDecodeError) as e:
+        return False, [(platform, f"读取 {path} 失败: {e}") for platform, _ in transforms]
+
+    content = rewrite.original
+    errors = []
+    for platform, transform in transforms:
+        try:
+            content = transform(content)
+        except Exception as e:
+            errors.append((platform, f"更新 {path} 失败: {e}"))
+    if content != rewrite.original:
+        rewrite.replace(0, len(rewrite.original), content)
+    try:
+        return rewrite.commit(), errors
+    except OSError as e:
+        return False, errors + [(platform, f"写入 {path} 失败: {e}") for platform, _ in transforms]
+
+
+def apply_platform_edits(planned: Dict[str, Tuple[List[Edit], List[str]]],
+                         jobs: int = 8) -> Dict[str, dict]:
+    """并行应用规划好的修改，返回 平台 -> {success, errors, changed, unchanged}"""
+    results = OrderedDict(
+        (platform, {'errors': list(errors), 'changed': [], 'unchanged': []})
+        for platform, (_, errors) in planned.items()
+    )
+
+    by_file: Dict[Path, List[Tuple[str, Callable[[str], str]]]] = OrderedDict()
+    for platform, (edits, _) in planned.items():
+        for path, transform in edits:
+            by_file.setdefault(Path(path).resolve(), []).append((platform, transform))
+
+    if by_file:
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(by_file)))) as executor:
+            outcomes = list(executor.map(lambda item: _apply_file(*item), by_file.items()))
+        for (path, transforms), (written, errors) in zip(by_file.items(), outcomes):
+            for platform, message in errors:
+                results[platform]['errors'].append(message)
+            for platform in OrderedDict.fromkeys(platform for platform, _ in transforms):
+                results[platform]['changed' if written else 'unchanged'].append(path)
+
+    for result in results.values():
+        result['success'] = not result['errors']
+    return results
@@ -10,10 +10,18 @@ import subprocess
 import argparse
 import json
 import shutil
-import gzip
+import hashlib
 from pathlib import Path
 from datetime import datetime
 
+from build_telemetry import run_instrumented_build
+from toolchain_probe import get_toolchain_probe
+from web_precompress import ENCODING_SUFFIXES, HAS_BROTLI, HAS_ZSTD, available_encodings, precompress_directory
+
+# 不计入预缓存清单的文件（Service Worker 自身、清单、Flutter 自带的 Service Worker）
+PRECACHE_EXCLUDED_FILES = {"sw.js", "precache-manifest.json", "flutter_service_worker.js"}
+PRECACHE_EXCLUDED_SUFFIXES = set(ENCODING_SUFFIXES.values()) | {".map"}
+
 class WebBuilder:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
@@ -28,6 +36,9 @@ class WebBuilder:
         """检查Web构建环境"""
         print("🔍 检查Web构建环境...")
         
+        probe = get_toolchain_probe(self.project_root)
+        probe.prefetch([['flutter', '--version'], ['flutter', 'devices'], ['node', '--version']])
+        
         # 检查Flutter
         try:
             # 在Windows上尝试不同的Flutter命令
@@ -38,9 +49,7 @@ class WebBuilder:
                 flutter_found = False
                 for cmd in flutter_commands:
                     try:
-                        result = subprocess.run([cmd, '--version'], 
-                                              capture_output=True, text=True, check=True, timeout=10,
-                                              encoding='utf-8', errors='ignore')
+                        result = probe.run([cmd, '--version'], check=True, timeout=10)
                         if result.stdout and len(result.stdout.split()) > 1:
                             flutter_version = result.stdout.split()[1]
                             print(f"✅ Flutter: {flutter_version}")
@@ -53,8 +62,7 @@ class WebBuilder:
                     print("❌ Flutter未安装或不在PATH中")
                     return False
             else:
-                result = subprocess.run(['flutter', '--version'], 
-                                      capture_output=True, text=True, check=True)
+                result = probe.run(['flutter', '--version'], check=True)
                 flutter_version = result.stdout.split()[1]
                 print(f"✅ Flutter: {flutter_version}")
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -63,8 +71,7 @@ class WebBuilder:
             
         # 检查Flutter Web支持
         try:
-            result = subprocess.run(['flutter', 'devices'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['flutter', 'devices'], check=True)
             if "Chrome" in result.stdout or "Web Server" in result.stdout:
                 print("✅ Flutter Web支持可用")
             else:
@@ -74,8 +81,7 @@ class WebBuilder:
             
         # 检查Node.js (可选，用于高级优化)
         try:
-            result = subprocess.run(['node', '--version'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['node', '--version'], check=True)
             node_version = result.stdout.strip()
             print(f"✅ Node.js: {node_version}")
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -165,16 +171,14 @@ class WebBuilder:
                 '--dart-define=flutter.inspector.structuredErrors=false'  # 禁用调试信息
             ])
             
-        # 执行构建
-        try:
-            result = subprocess.run(cmd, cwd=self.project_root, check=True)
+        # 执行构建（输出同时写入 build_logs/，各阶段耗时记入构建遥测）
+        if run_instrumented_build(cmd, "web", build_mode, self.project_root):
             print("✅ Web构建成功")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Web构建失败: {e}")
-            return False
+        print("❌ Web构建失败")
+        return False
             
-    def optimize_build(self):
+    def optimize_build(self, jobs=None):
         """优化构建产物"""
         print("⚡ 优化构建产物...")
         
@@ -183,7 +187,7 @@ class WebBuilder:
             return False
             
         # 压缩静态资源
-        self.compress_assets()
+        self.compress_assets(jobs)
         
         # 生成Service Worker
         self.generate_service_worker()
@@ -194,108 +198,156 @@ class WebBuilder:
         print("✅ 构建产物优化完成")
         return True
         
-    def compress_assets(self):
-        """压缩静态资源"""
-        print("📦 压缩静态资源...")
-        
-        # 需要压缩的文件类型
-        compress_extensions = ['.js', '.css', '.html', '.json', '.svg', '.txt']
-        
-        for file_path in self.build_dir.rglob('*'):
-            if file_path.is_file() and file_path.suffix in compress_extensions:
-                # 创建gzip压缩版本
-                gzip_path = file_path.with_suffix(file_path.suffix + '.gz')
-                
-                with open(file_path, 'rb') as f_in:
-                    with gzip.open(gzip_path, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-                        
-                # 检查压缩效果
-                original_size = file_path.stat().st_size
-                compressed_size = gzip_path.stat().st_size
-                ratio = (1 - compressed_size / original_size) * 100
-                
-                if ratio > 20:  # 压缩率超过20%才保留
-                    print(f"  📦 {file_path.name}: {original_size} → {compressed_size} ({ratio:.1f}%)")
-                else:
-                    gzip_path.unlink()  # 删除压缩效果不好的文件
+    def compress_assets(self, jobs=None):
+        """预压缩静态资源（gzip 9 级，已安装 brotli/zstandard 时同时生成 .br/.zst）"""
+        encodings = available_encodings()
+        print(f"📦 压缩静态资源（{', '.join(encodings)}）...")
+        missing = [name for name, ok in (("brotli", HAS_BROTLI), ("zstandard", HAS_ZSTD)) if not ok]
+        if missing:
+            print(f"  💡 未安装 {', '.join(missing)}，跳过对应格式（pip install {' '.join(missing)}）")
+        
+        # 内容哈希记录在构建目录之外，避免随部署包发布
+        state_path = self.project_root / ".build_cache" / "web_precompress.json"
+        results = precompress_directory(self.build_dir, state_path, encodings, jobs=jobs)
+        
+        skipped = 0
+        for relative, record in results.items():
+            if record['skipped']:
+                skipped += 1
+                continue
+            kept = [f"{encoding} {size}" for encoding, size in record['encodings'].items() if size is not None]
+            if kept:  # 压缩率超过20%才保留
+                print(f"  📦 {relative}: {record['size']} → {', '.join(kept)}")
+        if skipped:
+            print(f"  ⏭️ {skipped} 个文件内容未变化，沿用上次的压缩结果")
                     
+    def generate_precache_manifest(self):
+        """按内容哈希生成预缓存清单 [(url, revision)]，写入 precache-manifest.json
+
+        url 相对于 Service Worker 作用域；预压缩文件、Source Map、Service Worker 自身不计入。
+        """
+        entries = []
+        for file_path in sorted(self.build_dir.rglob('*')):
+            if not file_path.is_file():
+                continue
+            relative = file_path.relative_to(self.build_dir).as_posix()
+            if (relative in PRECACHE_EXCLUDED_FILES or file_path.suffix in PRECACHE_EXCLUDED_SUFFIXES
+                    or any(part.startswith('.') for part in file_path.relative_to(self.build_dir).parts)):
+                continue
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            entries.append({"url": relative, "revision": digest.hexdigest()[:16]})
+        
+        manifest_path = self.build_dir / "precache-manifest.json"
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+        return entries
+        
     def generate_service_worker(self):
-        """生成Service Worker"""
+        """生成Service Worker
+
+        预缓存清单内联到 sw.js 中，缓存键包含内容哈希：新版本只重新下载哈希变化的文件，
+        其余文件直接沿用用户已有的缓存。
+        """
         print("🔧 生成Service Worker...")
         
-        service_worker_content = '''
-// Service Worker for CharasGem PWA
-const CACHE_NAME = 'charasgem-v{version}';
-const CACHE_URLS = [
-  '/',
-  '/index.html',
-  '/main.dart.js',
-  '/flutter.js',
-  '/manifest.json',
-  '/icons/Icon-192.png',
-  '/icons/Icon-512.png'
-];
+        entries = self.generate_precache_manifest()
+        total_size = sum((self.build_dir / entry["url"]).stat().st_size for entry in entries)
+        
+        service_worker_content = """// Service Worker for CharasGem PWA（由 scripts/web_build.py 生成，请勿手动修改）
+const APP_VERSION = '__APP_VERSION__';
+const PRECACHE_NAME = 'charasgem-precache';
+const RUNTIME_CACHE_NAME = 'charasgem-runtime';
+const PRECACHE_MANIFEST = __PRECACHE_MANIFEST__;
 
-// 安装事件
+// 缓存键 = 资源地址 + 内容哈希；内容不变的资源在版本之间保持同一个缓存键
+function cacheKeyFor(entry) {
+  const url = new URL(entry.url, self.registration.scope);
+  url.searchParams.set('__rev', entry.revision);
+  return url.href;
+}
+
+const manifestByUrl = new Map(
+  PRECACHE_MANIFEST.map(entry => [new URL(entry.url, self.registration.scope).href, entry])
+);
+
+function precacheEntryFor(request) {
+  const url = new URL(request.url);
+  url.search = '';
+  url.hash = '';
+  if (request.mode === 'navigate' || url.href === self.registration.scope) {
+    return manifestByUrl.get(new URL('index.html', self.registration.scope).href);
+  }
+  return manifestByUrl.get(url.href);
+}
+
+// 安装事件：只下载缓存中还没有的（新增或内容变化的）资源
 self.addEventListener('install', event => {
-  console.log('Service Worker: Installing...');
+  console.log('Service Worker: Installing', APP_VERSION);
   event.waitUntil(
-    caches.open(CACHE_NAME)
-      .then(cache => {
-        console.log('Service Worker: Caching files');
-        return cache.addAll(CACHE_URLS);
-      })
-      .then(() => self.skipWaiting())
+    caches.open(PRECACHE_NAME).then(cache =>
+      Promise.all(PRECACHE_MANIFEST.map(entry => {
+        const key = cacheKeyFor(entry);
+        return cache.match(key).then(cached => {
+          if (cached) {
+            return;
+          }
+          const url = new URL(entry.url, self.registration.scope).href;
+          return fetch(url, { cache: 'reload' }).then(response => {
+            if (!response.ok) {
+              throw new Error('Service Worker: Failed to precache ' + url);
+            }
+            return cache.put(key, response);
+          });
+        });
+      }))
+    ).then(() => self.skipWaiting())
   );
 });
 
-// 激活事件
+// 激活事件：删除清单中已不存在的旧版本资源和其他缓存
 self.addEventListener('activate', event => {
-  console.log('Service Worker: Activating...');
+  console.log('Service Worker: Activating', APP_VERSION);
+  const currentKeys = new Set(PRECACHE_MANIFEST.map(cacheKeyFor));
   event.waitUntil(
-    caches.keys().then(cacheNames => {
-      return Promise.all(
-        cacheNames.map(cacheName => {
-          if (cacheName !== CACHE_NAME) {
-            console.log('Service Worker: Deleting old cache:', cacheName);
-            return caches.delete(cacheName);
-          }
-        })
-      );
-    }).then(() => self.clients.claim())
+    caches.keys().then(cacheNames => Promise.all(
+      cacheNames
+        .filter(cacheName => cacheName !== PRECACHE_NAME && cacheName !== RUNTIME_CACHE_NAME)
+        .map(cacheName => caches.delete(cacheName))
+    )).then(() => caches.open(PRECACHE_NAME)).then(cache =>
+      cache.keys().then(requests => Promise.all(
+        requests
+          .filter(request => !currentKeys.has(request.url))
+          .map(request => cache.delete(request))
+      ))
+    ).then(() => self.clients.claim())
   );
 });
 
-// 获取事件
+// 获取事件：清单中的资源优先使用预缓存，其他同源 GET 请求使用网络并写入运行时缓存
 self.addEventListener('fetch', event => {
+  if (event.request.method !== 'GET') {
+    return;
+  }
+  const entry = precacheEntryFor(event.request);
+  if (entry) {
+    event.respondWith(
+      caches.open(PRECACHE_NAME)
+        .then(cache => cache.match(cacheKeyFor(entry)))
+        .then(response => response || fetch(event.request))
+    );
+    return;
+  }
   event.respondWith(
-    caches.match(event.request)
-      .then(response => {
-        // 缓存命中，返回缓存的资源
-        if (response) {
-          return response;
-        }
-        
-        // 缓存未命中，从网络获取
-        return fetch(event.request).then(response => {
-          // 检查是否是有效响应
-          if (!response || response.status !== 200 || response.type !== 'basic') {
-            return response;
-          }
-          
-          // 克隆响应
-          const responseToCache = response.clone();
-          
-          // 添加到缓存
-          caches.open(CACHE_NAME)
-            .then(cache => {
-              cache.put(event.request, responseToCache);
-            });
-          
-          return response;
-        });
-      })
+    fetch(event.request).then(response => {
+      if (response && response.status === 200 && response.type === 'basic') {
+        const responseToCache = response.clone();
+        caches.open(RUNTIME_CACHE_NAME).then(cache => cache.put(event.request, responseToCache));
+      }
+      return response;
+    }).catch(() => caches.match(event.request))
   );
 });
 
@@ -309,6 +361,7 @@ self.addEventListener('sync', event => {
 function doBackgroundSync() {
   // 实现后台同步逻辑
   console.log('Service Worker: Background sync');
+  return Promise.resolve();
 }
 
 // 推送通知
@@ -317,8 +370,8 @@ self.addEventListener('push', event => {
     const data = event.data.json();
     const options = {
       body: data.body,
-      icon: '/icons/Icon-192.png',
-      badge: '/icons/Icon-96.png',
+      icon: 'icons/Icon-192.png',
+      badge: 'icons/Icon-96.png',
       vibrate: [100, 50, 100],
       data: data.data
     };
@@ -334,16 +387,19 @@ self.addEventListener('notificationclick', event => {
   event.notification.close();
   
   event.waitUntil(
-    clients.openWindow(event.notification.data.url || '/')
+    clients.openWindow((event.notification.data && event.notification.data.url) || self.registration.scope)
   );
 });
-'''.format(version=self.get_version_info()[0])
+"""
+        service_worker_content = (service_worker_content
+                                  .replace('__APP_VERSION__', self.get_version_info()[0])
+                                  .replace('__PRECACHE_MANIFEST__', json.dumps(entries, indent=2)))
         
         sw_path = self.build_dir / "sw.js"
         with open(sw_path, "w", encoding="utf-8") as f:
             f.write(service_worker_content)
             
-        print("✅ Service Worker已生成")
+        print(f"✅ Service Worker已生成（预缓存 {len(entries)} 个文件，共 {total_size / 1024 / 1024:.1f} MB）")
         
     def optimize_images(self):
         """优化图片"""
@@ -513,6 +569,8 @@ def main():
                        default="zip", help="部署包类型")
     parser.add_argument("--optimize", action="store_true", 
                        help="优化构建产物")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                       help="预压缩的并行进程数（0 表示使用全部CPU核心）")
     parser.add_argument("--deploy", help="部署配置文件路径")
     parser.add_argument("--clean", action="store_true", 
                        help="构建前清理缓存")
@@ -549,7 +607,7 @@ def main():
         if success:
             # 优化构建产物
             if args.optimize:
-                builder.optimize_build()
+                builder.optimize_build(args.jobs or None)
                 
             # 创建部署包
             output_dir = builder.create_deployment_package(args.package_type)
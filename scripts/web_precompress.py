@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Web构建产物预压缩
+在进程池中并行为静态资源生成 .gz（gzip 9 级）、.br（brotli）和 .zst（zstd）预压缩文件：
+小于阈值的文件不压缩，压缩结果先在内存中与原文件比较，压缩率足够才写入；
+记录每个文件的内容哈希，内容未变且压缩文件仍在时直接跳过
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# 需要预压缩的文件类型（含 main.dart.js、canvaskit.wasm 等大文件）
+COMPRESSIBLE_EXTENSIONS = {'.js', '.mjs', '.css', '.html', '.json', '.svg', '.txt', '.wasm', '.map', '.xml', '.ttf', '.otf'}
+
+# 小于该字节数的文件不压缩（压缩收益抵不过额外的文件和协商开销）
+DEFAULT_MIN_SIZE = 1024
+
+# 压缩率超过该比例才保留压缩文件
+DEFAULT_MIN_SAVING = 0.2
+
+# 编码 -> 压缩文件后缀
+ENCODING_SUFFIXES = {
+    'gzip': '.gz',
+    'br': '.br',
+    'zstd': '.zst',
+}
+
+BROTLI_QUALITY = 11
+ZSTD_LEVEL = 19
+
+
+def available_encodings() -> List[str]:
+    """当前环境可用的压缩编码（brotli、zstd 需要安装对应的 Python 包）"""
+    encodings = ['gzip']
+    if HAS_BROTLI:
+        encodings.append('br')
+    if HAS_ZSTD:
+        encodings.append('zstd')
+    return encodings
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)  # mtime=0 保证相同内容得到相同输出
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"不支持的压缩编码: {encoding}")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(prefix='.precompress-', suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def precompress_file(path: str, encodings: Sequence[str], min_saving: float,
+                     previous: Optional[dict] = None) -> Tuple[str, dict, bool]:
+    """压缩单个文件，返回 (路径, 状态记录, 是否跳过)
+
+    状态记录为 {sha256, size, encodings: {编码: 压缩后大小，未保留时为 None}}。
+    previous 与当前内容哈希一致且记录中保留的压缩文件都还在时跳过。
+    """
+    file_path = Path(path)
+    data = file_path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+
+    if previous and previous.get('sha256') == digest and set(encodings) <= set(previous.get('encodings', {})):
+        kept = [encoding for encoding, size in previous['encodings'].items() if size is not None]
+        if all(Path(path + ENCODING_SUFFIXES[encoding]).exists() for encoding in kept):
+            return path, previous, True
+
+    record = {'sha256': digest, 'size': len(data), 'encodings': {}}
+    for encoding in encodings:
+        target = Path(path + ENCODING_SUFFIXES[encoding])
+        compressed = compress_bytes(data, encoding)
+        if len(compressed) <= len(data) * (1 - min_saving):
+            _write_atomic(target, compressed)
+            record['encodings'][encoding] = len(compressed)
+        else:
+            if target.exists():
+                target.unlink()  # 删除上次构建留下、已不再合适的压缩文件
+            record['encodings'][encoding] = None
+    return path, record, False
+
+
+def precompress_directory(root: Path, state_path: Optional[Path] = None,
+                          encodings: Optional[Sequence[str]] = None,
+                          min_size: int = DEFAULT_MIN_SIZE, min_saving: float = DEFAULT_MIN_SAVING,
+                          jobs: Optional[int] = None) -> Dict[str, dict]:
+    """预压缩 root 下的静态资源，返回 相对路径 -> {状态记录, skipped}
+
+    state_path 保存上次的内容哈希（不应位于 root 内，以免随构建产物部署）；jobs 为进程数，默认 CPU 核心数。
+    """
+    root = Path(root)
+    encodings = list(encodings or available_encodings())
+    state: Dict[str, dict] = {}
+    if state_path and Path(state_path).exists():
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+
+    candidates = []
+    for file_path in root.rglob('*'):
+        if file_path.is_file() and file_path.suffix in COMPRESSIBLE_EXTENSIONS:
+            size = file_path.stat().st_size
+            if size >= min_size:
+                candidates.append((size, file_path))
+    # 大文件先提交，避免最后只剩一个大文件在单个进程中压缩
+    candidates.sort(key=lambda item: -item[0])
+
+    results: Dict[str, dict] = {}
+    new_state: Dict[str, dict] = {}
+    jobs = jobs or os.cpu_count() or 1
+
+    def collect(path: str, record: dict, skipped: bool) -> None:
+        relative = Path(path).relative_to(root).as_posix()
+        new_state[relative] = record
+        results[relative] = dict(record, skipped=skipped)
+
+    tasks = [(str(file_path), state.get(file_path.relative_to(root).as_posix())) for _, file_path in candidates]
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            futures = [executor.submit(precompress_file, path, encodings, min_saving, previous)
+                       for path, previous in tasks]
+            for future in futures:
+                collect(*future.result())
+    else:
+        for path, previous in tasks:
+            collect(*precompress_file(path, encodings, min_saving, previous))
+
+    if state_path:
+        state_path = Path(state_path)
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(state_path, json.dumps(new_state, indent=2, sort_keys=True).encode('utf-8'))
+    return dict(sorted(results.items()))
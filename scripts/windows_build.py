@@ -14,6 +14,9 @@ import xml.etree.ElementTree as ET
 from pathlib import Path
 from datetime import datetime
 
+from build_telemetry import run_instrumented_build
+from toolchain_probe import get_toolchain_probe
+
 class WindowsBuilder:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
@@ -33,6 +36,9 @@ class WindowsBuilder:
             print("❌ Windows构建需要在Windows系统上进行")
             return False
             
+        probe = get_toolchain_probe(self.project_root)
+        probe.prefetch([['flutter', '--version'], ['where', 'msbuild'], ['signtool'], ['makeappx']])
+            
         # 检查Flutter
         try:
             # 在Windows上尝试不同的Flutter命令
@@ -40,9 +46,7 @@ class WindowsBuilder:
             flutter_found = False
             for cmd in flutter_commands:
                 try:
-                    result = subprocess.run([cmd, '--version'], 
-                                          capture_output=True, text=True, check=True, timeout=10,
-                                          encoding='utf-8', errors='ignore')
+                    result = probe.run([cmd, '--version'], check=True, timeout=10)
                     if result.stdout and len(result.stdout.split()) > 1:
                         flutter_version = result.stdout.split()[1]
                         print(f"✅ Flutter: {flutter_version}")
@@ -63,8 +67,7 @@ class WindowsBuilder:
         
         # 首先尝试从PATH中查找
         try:
-            result = subprocess.run(['where', 'msbuild'], 
-                                  capture_output=True, text=True, check=True)
+            result = probe.run(['where', 'msbuild'], check=True)
             print("✅ MSBuild可用 (PATH)")
             msbuild_found = True
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -107,8 +110,7 @@ class WindowsBuilder:
         
         # 首先尝试从PATH中查找
         try:
-            result = subprocess.run(['signtool'], 
-                                  capture_output=True, text=True)
+            result = probe.run(['signtool'])
             print("✅ SignTool可用 (PATH)")
             signtool_found = True
         except FileNotFoundError:
@@ -136,8 +138,7 @@ class WindowsBuilder:
         
         # 首先尝试从PATH中查找
         try:
-            result = subprocess.run(['makeappx'], 
-                                  capture_output=True, text=True)
+            result = probe.run(['makeappx'])
             print("✅ MakeAppx可用 (PATH)")
             makeappx_found = True
         except FileNotFoundError:
@@ -280,14 +281,12 @@ class WindowsBuilder:
         else:
             cmd.append('--release')
             
-        # 执行构建
-        try:
-            result = subprocess.run(cmd, cwd=self.project_root, check=True)
+        # 执行构建（输出同时写入 build_logs/，各阶段耗时记入构建遥测）
+        if run_instrumented_build(cmd, "windows", build_mode, self.project_root):
             print("✅ Windows构建成功")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Windows构建失败: {e}")
-            return False
+        print("❌ Windows构建失败")
+        return False
             
     def create_msix_manifest(self):
         """创建MSIX清单文件"""
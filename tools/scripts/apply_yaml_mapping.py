@@ -8,11 +8,14 @@ import json
 import yaml
 import os
 import re
-import shutil
-import datetime
+import sys
 import glob
 from collections import defaultdict, OrderedDict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from key_renamer import KeyRenamer
+from backup_store import BackupStore
+
 # File paths
 ARB_DIR = "lib/l10n"
 ZH_ARB_PATH = os.path.join(ARB_DIR, "app_zh.arb")
@@ -20,7 +23,7 @@ EN_ARB_PATH = os.path.join(ARB_DIR, "app_en.arb")
 KEY_MAPPING_PATH = os.path.join("arb_report", "key_mapping.json")
 YAML_MAPPING_PATH = os.path.join("arb_report", "key_mapping.yaml")
 CODE_DIR = "lib"
-BACKUP_DIR = f"arb_backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+BACKUP_OPERATION = "apply_yaml_mapping"
 
 def load_yaml_file(file_path):
     """Load a YAML file and return its contents."""
@@ -50,14 +53,15 @@ def save_json_file(data, file_path):
         print(f"Error saving JSON to {file_path}: {e}")
 
 def create_backup():
-    """Create backup of ARB files."""
-    os.makedirs(BACKUP_DIR, exist_ok=True)
+    """Back up ARB files into the content-addressed backup store and return the backup id."""
+    backup = BackupStore().begin(BACKUP_OPERATION)
     
     for arb_file in [ZH_ARB_PATH, EN_ARB_PATH]:
         if os.path.exists(arb_file):
-            backup_path = os.path.join(BACKUP_DIR, os.path.basename(arb_file))
-            shutil.copy2(arb_file, backup_path)
-            print(f"Backed up {arb_file} to {backup_path}")
+            backup.add(arb_file)
+            print(f"Backed up {arb_file}")
+    
+    return backup.save()
 
 def parse_yaml_mapping():
     """Parse the YAML mapping file to extract key mapping information."""
@@ -190,15 +194,15 @@ def update_code_references(key_mapping):
     dart_files = glob.glob(f"{CODE_DIR}/**/*.dart", recursive=True)
     updated_files = 0
     
-    # Define patterns to search for
-    key_patterns = [
-        (r'l10n\.([a-zA-Z0-9_]+)', r'l10n.{}'),
-        (r'AppLocalizations\.of\(context\)\.([a-zA-Z0-9_]+)', r'AppLocalizations.of(context).{}'),
-        (r'S\.of\(context\)\.([a-zA-Z0-9_]+)', r'S.of(context).{}'),
-        (r'S\.current\.([a-zA-Z0-9_]+)', r'S.current.{}'),
-        (r'context\.l10n\.([a-zA-Z0-9_]+)', r'context.l10n.{}'),
-        (r'AppLocalizations\.instance\.([a-zA-Z0-9_]+)', r'AppLocalizations.instance.{}')
-    ]
+    # Accessors to search for; all mappings are applied in one pass per file
+    renamer = KeyRenamer(key_mapping, accessors=[
+        'l10n.',
+        'AppLocalizations.of(context).',
+        'S.of(context).',
+        'S.current.',
+        'context.l10n.',
+        'AppLocalizations.instance.',
+    ])
     
     for file_path in dart_files:
         try:
@@ -212,18 +216,11 @@ def update_code_references(key_mapping):
                 print(f"Warning: Could not read file {file_path}: {str(e)}")
                 continue
         
-        original_content = content
-        
-        # Apply all key mappings
-        for old_key, new_key in key_mapping.items():
-            if old_key != new_key:  # Only update if the key changed
-                for pattern, replacement_template in key_patterns:
-                    old_pattern = pattern.replace("([a-zA-Z0-9_]+)", re.escape(old_key))
-                    new_text = replacement_template.format(new_key)
-                    content = re.sub(old_pattern, new_text, content)
+        # Apply all key mappings (unchanged keys are ignored)
+        content, replaced = renamer.rename(content)
         
         # Write the file if changed
-        if content != original_content:
+        if replaced:
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(content)
             updated_files += 1
@@ -257,7 +254,7 @@ def main():
     print("Applying YAML mapping to ARB files and code references...")
     
     # Create backup
-    create_backup()
+    backup_id = create_backup()
     
     # Parse the YAML mapping file
     key_mapping = parse_yaml_mapping()
@@ -281,7 +278,8 @@ def main():
     run_flutter_gen_l10n()
     
     print("\nYAML mapping applied successfully!")
-    print(f"Backup created in {BACKUP_DIR}")
+    print(f"Backup created: {backup_id}")
+    print(f"Restore with: python scripts/backup_store.py restore {backup_id}")
     print(f"Updated key_mapping.json with {len(key_mapping)} mappings")
     print(f"Updated ARB files with {len(zh_values)} keys")
     print("Run 'flutter analyze' to check for any issues")
@@ -8,11 +8,15 @@
 import json
 import os
 import re
+import sys
 import glob
 import difflib
 from collections import defaultdict, OrderedDict
 from itertools import combinations
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from similarity_clustering import identical_value_groups
+
 # Constants
 ARB_DIR = "lib/l10n"
 ZH_ARB_PATH = os.path.join(ARB_DIR, "app_zh.arb")
@@ -41,17 +45,7 @@ def load_arb_files():
 
 def find_identical_values(arb_data):
     """Find keys with identical values"""
-    value_to_keys = defaultdict(list)
-    
-    # Group keys by their exact values
-    for key, value in arb_data.items():
-        if not key.startswith('@'):  # Skip metadata keys
-            value_to_keys[value].append(key)
-    
-    # Filter groups to only include those with multiple keys
-    identical_values = {value: keys for value, keys in value_to_keys.items() if len(keys) > 1}
-    
-    return identical_values
+    return identical_value_groups(arb_data)
 
 def extract_words_from_key(key):
     """Extract individual words from a camelCase or snake_case key name"""
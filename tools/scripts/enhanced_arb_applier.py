@@ -6,13 +6,17 @@
 
 import os
 import re
+import sys
 import json
 import yaml
 import glob
-import shutil
 from collections import OrderedDict
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from rewrite_transaction import FileRewrite
+from backup_store import BackupStore
+
 # 配置常量
 CODE_DIR = "lib"
 ARB_DIR = "lib/l10n"
@@ -22,9 +26,10 @@ REPORT_DIR = "hardcoded_detection_report"
 BACKUP_DIR = None  # 将在运行时设置
 
 class EnhancedARBApplier:
-    def __init__(self, mapping_file_path):
+    def __init__(self, mapping_file_path, dry_run=False):
         self.mapping_file_path = mapping_file_path
-        self.backup_dir = f"arb_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.dry_run = dry_run  # 干运行：只输出代码改动的diff，不写任何文件
+        self.backup_id = None
         self.mapping_data = None
         self.zh_arb_data = OrderedDict()
         self.en_arb_data = OrderedDict()
@@ -44,15 +49,14 @@ class EnhancedARBApplier:
             raise ValueError(f"映射文件格式错误: {e}")
     
     def create_backup(self):
-        """创建备份"""
-        os.makedirs(self.backup_dir, exist_ok=True)
+        """创建备份（写入内容寻址备份库，未变化的文件不重复存储）"""
+        backup = BackupStore().begin("enhanced_arb_applier")
         
         # 备份ARB文件
         for arb_path in [ZH_ARB_PATH, EN_ARB_PATH]:
             if os.path.exists(arb_path):
-                backup_path = os.path.join(self.backup_dir, os.path.basename(arb_path))
-                shutil.copy2(arb_path, backup_path)
-                print(f"备份ARB文件: {arb_path} -> {backup_path}")
+                backup.add(arb_path)
+                print(f"备份ARB文件: {arb_path}")
         
         # 备份即将修改的代码文件
         code_files_to_backup = set()
@@ -63,14 +67,13 @@ class EnhancedARBApplier:
                         file_path = os.path.join(CODE_DIR, item_data['file'])
                         code_files_to_backup.add(file_path)
         
-        for file_path in code_files_to_backup:
+        for file_path in sorted(code_files_to_backup):
             if os.path.exists(file_path):
-                # 保持目录结构
-                rel_path = os.path.relpath(file_path, CODE_DIR)
-                backup_path = os.path.join(self.backup_dir, "code", rel_path)
-                os.makedirs(os.path.dirname(backup_path), exist_ok=True)
-                shutil.copy2(file_path, backup_path)
+                backup.add(file_path)
                 print(f"备份代码文件: {file_path}")
+        
+        self.backup_id = backup.save()
+        print(f"备份编号: {self.backup_id}")
     
     def load_arb_files(self):
         """加载现有ARB文件"""
@@ -108,7 +111,9 @@ class EnhancedARBApplier:
                 print(f"添加ARB键: {key} = \"{item_data['text_zh']}\"")
         
         # 保存更新后的ARB文件
-        if new_keys_count > 0:
+        if new_keys_count > 0 and self.dry_run:
+            print(f"[干运行] 将添加 {new_keys_count} 个新键到ARB文件")
+        elif new_keys_count > 0:
             with open(ZH_ARB_PATH, 'w', encoding='utf-8') as f:
                 json.dump(self.zh_arb_data, f, ensure_ascii=False, indent=2)
             
@@ -147,60 +152,39 @@ class EnhancedARBApplier:
         
         return replacements
     
-    def safe_replace_in_file(self, file_path, text_to_replace, replacement_key, expected_line_num):
-        """安全地在文件中执行替换"""
-        full_file_path = os.path.join(CODE_DIR, file_path)
+    def safe_replace_in_file(self, rewrite, text_to_replace, replacement_key, expected_line_num):
+        """在文件改写事务中登记一次替换（行号基于文件原始内容）"""
+        # 检查指定行是否包含目标文本
+        if expected_line_num > len(rewrite.lines):
+            return False, f"文件行数不足，期望第{expected_line_num}行"
         
-        if not os.path.exists(full_file_path):
-            return False, f"文件不存在: {file_path}"
+        target_line = rewrite.lines[expected_line_num - 1]
+        if text_to_replace not in target_line:
+            return False, f"在第{expected_line_num}行未找到文本: {text_to_replace}"
         
-        try:
-            with open(full_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            # 检查指定行是否包含目标文本
-            if expected_line_num <= len(lines):
-                target_line = lines[expected_line_num - 1]
-                if text_to_replace in target_line:
-                    # 生成替换后的代码
-                    l10n_call = f"l10n.{replacement_key}"
-                    
-                    # 智能替换：保持原有的代码结构
-                    new_line = target_line.replace(f'"{text_to_replace}"', l10n_call)
-                    new_line = new_line.replace(f"'{text_to_replace}'", l10n_call)
-                    
-                    lines[expected_line_num - 1] = new_line
-                    
-                    # 检查文件是否已导入l10n
-                    needs_import = True
-                    for line in lines[:20]:  # 检查前20行
-                        if 'app_localizations.dart' in line or 'AppLocalizations' in line:
-                            needs_import = False
-                            break
-                    
-                    # 如果需要，添加导入语句
-                    if needs_import:
-                        import_line = "import '../../../l10n/app_localizations.dart';\n"
-                        # 找到最后一个import语句之后插入
-                        insert_index = 0
-                        for i, line in enumerate(lines):
-                            if line.strip().startswith('import'):
-                                insert_index = i + 1
-                        lines.insert(insert_index, import_line)
-                        print(f"添加l10n导入到文件: {file_path}")
-                    
-                    # 写回文件
-                    with open(full_file_path, 'w', encoding='utf-8') as f:
-                        f.writelines(lines)
-                    
-                    return True, "替换成功"
-                else:
-                    return False, f"在第{expected_line_num}行未找到文本: {text_to_replace}"
-            else:
-                return False, f"文件行数不足，期望第{expected_line_num}行"
-                
-        except Exception as e:
-            return False, f"文件操作错误: {str(e)}"
+        # 生成替换后的代码
+        l10n_call = f"l10n.{replacement_key}"
+        
+        # 智能替换：保持原有的代码结构
+        line_start, line_end = rewrite.line_span(expected_line_num)
+        rewrite.replace_all(f'"{text_to_replace}"', l10n_call, line_start, line_end)
+        rewrite.replace_all(f"'{text_to_replace}'", l10n_call, line_start, line_end)
+        
+        return True, "替换成功"
+    
+    def ensure_l10n_import(self, rewrite, file_path):
+        """文件前20行没有本地化导入时，在最后一个import语句之后登记导入"""
+        for line in rewrite.lines[:20]:
+            if 'app_localizations.dart' in line or 'AppLocalizations' in line:
+                return
+        
+        import_line = "import '../../../l10n/app_localizations.dart';\n"
+        insert_index = 0
+        for i, line in enumerate(rewrite.lines):
+            if line.strip().startswith('import'):
+                insert_index = i + 1
+        rewrite.insert_before_line(insert_index + 1, import_line)
+        print(f"添加l10n导入到文件: {file_path}")
     
     def execute_replacements(self):
         """执行所有代码替换"""
@@ -220,30 +204,58 @@ class EnhancedARBApplier:
                 file_replacements[file_path] = []
             file_replacements[file_path].append(replacement)
         
-        # 逐文件执行替换
+        # 逐文件执行替换：每个文件读取一次、写入一次
         for file_path, file_replacement_list in file_replacements.items():
             print(f"\n处理文件: {file_path}")
             
-            # 按行号排序，从后往前替换避免行号变化
+            full_file_path = os.path.join(CODE_DIR, file_path)
+            try:
+                rewrite = FileRewrite(full_file_path)
+            except (OSError, UnicodeDecodeError) as e:
+                message = f"文件不存在: {file_path}" if not os.path.exists(full_file_path) else f"文件操作错误: {str(e)}"
+                self._record_failures(file_replacement_list, message)
+                continue
+            
+            # 所有替换都基于原始行号，无需考虑替换顺序
             file_replacement_list.sort(key=lambda x: x['line'], reverse=True)
             
+            succeeded = []
             for replacement in file_replacement_list:
                 success, message = self.safe_replace_in_file(
-                    replacement['file'],
+                    rewrite,
                     replacement['text'],
                     replacement['key'],
                     replacement['line']
                 )
                 
                 if success:
-                    print(f"  ✓ 替换成功: {replacement['key']}")
-                    self.replaced_count += 1
+                    succeeded.append(replacement)
                 else:
-                    print(f"  ✗ 替换失败: {replacement['key']} - {message}")
-                    self.failed_replacements.append({
-                        'replacement': replacement,
-                        'error': message
-                    })
+                    self._record_failures([replacement], message)
+            
+            if not succeeded:
+                continue
+            
+            self.ensure_l10n_import(rewrite, file_path)
+            
+            try:
+                rewrite.commit(dry_run=self.dry_run)
+            except OSError as e:
+                self._record_failures(succeeded, f"文件操作错误: {str(e)}")
+                continue
+            
+            for replacement in succeeded:
+                print(f"  ✓ {'将替换' if self.dry_run else '替换成功'}: {replacement['key']}")
+                self.replaced_count += 1
+    
+    def _record_failures(self, replacements, message):
+        """记录失败的替换"""
+        for replacement in replacements:
+            print(f"  ✗ 替换失败: {replacement['key']} - {message}")
+            self.failed_replacements.append({
+                'replacement': replacement,
+                'error': message
+            })
     
     def generate_l10n_files(self):
         """重新生成l10n文件"""
@@ -272,17 +284,24 @@ class EnhancedARBApplier:
     def generate_report(self):
         """生成应用报告"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_path = os.path.join(REPORT_DIR, f"application_report_{timestamp}.txt")
+        # 干运行只生成预览报告（未修改任何文件，也没有备份）
+        report_name = "application_preview" if self.dry_run else "application_report"
+        report_path = os.path.join(REPORT_DIR, f"{report_name}_{timestamp}.txt")
         
         with open(report_path, 'w', encoding='utf-8') as f:
-            f.write("=== ARB应用报告 ===\n")
-            f.write(f"应用时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"映射文件: {self.mapping_file_path}\n")
-            f.write(f"备份目录: {self.backup_dir}\n\n")
+            if self.dry_run:
+                f.write("=== ARB应用预览报告（干运行，未修改任何文件） ===\n")
+                f.write(f"预览时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"映射文件: {self.mapping_file_path}\n\n")
+            else:
+                f.write("=== ARB应用报告 ===\n")
+                f.write(f"应用时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"映射文件: {self.mapping_file_path}\n")
+                f.write(f"备份编号: {self.backup_id}\n\n")
             
-            f.write(f"替换统计:\n")
-            f.write(f"  - 成功替换: {self.replaced_count} 个\n")
-            f.write(f"  - 失败替换: {len(self.failed_replacements)} 个\n\n")
+            f.write("替换统计:\n")
+            f.write(f"  - {'可替换' if self.dry_run else '成功替换'}: {self.replaced_count} 个\n")
+            f.write(f"  - {'无法替换' if self.dry_run else '失败替换'}: {len(self.failed_replacements)} 个\n\n")
             
             if self.failed_replacements:
                 f.write("失败的替换:\n")
@@ -295,7 +314,7 @@ class EnhancedARBApplier:
                     f.write(f"    错误: {failed['error']}\n")
                     f.write("    " + "-"*30 + "\n")
         
-        print(f"应用报告已生成: {report_path}")
+        print(f"{'预览报告' if self.dry_run else '应用报告'}已生成: {report_path}")
         return report_path
     
     def run_application(self):
@@ -306,9 +325,10 @@ class EnhancedARBApplier:
             # 1. 加载映射文件
             self.load_mapping_file()
             
-            # 2. 创建备份
-            print("\n创建备份...")
-            self.create_backup()
+            # 2. 创建备份（干运行不修改文件，无需备份）
+            if not self.dry_run:
+                print("\n创建备份...")
+                self.create_backup()
             
             # 3. 加载ARB文件
             print("\n加载ARB文件...")
@@ -323,18 +343,30 @@ class EnhancedARBApplier:
             self.execute_replacements()
             
             # 6. 重新生成l10n文件
-            self.generate_l10n_files()
+            if not self.dry_run:
+                self.generate_l10n_files()
             
             # 7. 生成报告
-            print("\n生成应用报告...")
+            print(f"\n生成{'预览' if self.dry_run else '应用'}报告...")
             report_path = self.generate_report()
             
             # 8. 输出总结
-            print(f"\n=== 应用完成 ===")
+            if self.dry_run:
+                print("\n=== 预览完成（干运行，未修改任何文件） ===")
+                print(f"可替换: {self.replaced_count} 个")
+                print(f"无法替换: {len(self.failed_replacements)} 个")
+                print(f"将新增ARB键: {new_keys} 个")
+                print(f"预览报告: {report_path}")
+                if self.failed_replacements:
+                    print(f"\n注意：有 {len(self.failed_replacements)} 个替换无法应用，请查看报告了解详情")
+                print("\n确认无误后去掉 --dry-run 重新运行以应用修改")
+                return
+            
+            print("\n=== 应用完成 ===")
             print(f"成功替换: {self.replaced_count} 个")
             print(f"失败替换: {len(self.failed_replacements)} 个")
             print(f"新增ARB键: {new_keys} 个")
-            print(f"备份目录: {self.backup_dir}")
+            print(f"备份编号: {self.backup_id}")
             print(f"应用报告: {report_path}")
             
             if self.failed_replacements:
@@ -344,11 +376,12 @@ class EnhancedARBApplier:
             print("1. 检查生成的代码是否正确")
             print("2. 运行 flutter gen-l10n 确保本地化文件最新")
             print("3. 测试应用功能是否正常")
-            print("4. 如有问题，可从备份目录恢复文件")
+            print(f"4. 如有问题，可运行 python scripts/backup_store.py restore {self.backup_id} 恢复文件")
             
         except Exception as e:
             print(f"应用过程中发生错误: {e}")
-            print("请检查备份并手动恢复文件")
+            if self.backup_id:
+                print(f"请检查备份并手动恢复文件: python scripts/backup_store.py restore {self.backup_id}")
             raise
 
 def find_latest_mapping_file():
@@ -397,7 +430,7 @@ def main():
         print("映射文件不存在")
         return
     
-    applier = EnhancedARBApplier(mapping_file_path)
+    applier = EnhancedARBApplier(mapping_file_path, dry_run=args.dry_run)
     applier.run_application()
 
 if __name__ == "__main__":
@@ -6,12 +6,16 @@
 
 import os
 import re
+import sys
 import json
 import yaml
 import glob
 import argparse
 from collections import OrderedDict
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from rewrite_transaction import FileRewrite
+from backup_store import BackupStore
 
 # 配置常量
 CODE_DIR = "lib"
@@ -27,6 +31,7 @@ class EnhancedMappingApplier:
         self.zh_arb_data = OrderedDict()
         self.en_arb_data = OrderedDict()
         self.changes_preview = []
+        self.backup = None
         
     def load_mapping_file(self):
         """加载映射文件"""
@@ -252,17 +257,14 @@ class EnhancedMappingApplier:
         return files_changed
     
     def apply_changes_to_file(self, file_path, changes):
-        """对单个文件应用所有更改"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
+        """对单个文件应用所有更改：读取一次，所有替换基于原始内容登记，最后原子写回一次"""
+        rewrite = FileRewrite(file_path)
         
         # 检查是否需要添加导入
         needs_import = any(change['import_needed'] for change in changes)
         
         if needs_import:
-            content = self.add_l10n_import(content)
+            self.add_l10n_import(rewrite)
         
         # 应用文本替换
         for change in changes:
@@ -274,32 +276,38 @@ class EnhancedMappingApplier:
             replacement = f"{strategy['context_method']}.{arb_key}"
             
             # 执行替换
-            if original_text in content:
-                content = content.replace(f'"{original_text}"', replacement)
-                content = content.replace(f"'{original_text}'", replacement)
+            if original_text in rewrite.original:
+                rewrite.replace_all(f'"{original_text}"', replacement)
+                rewrite.replace_all(f"'{original_text}'", replacement)
                 print(f"  ✅ 替换: {original_text} -> {replacement}")
             else:
                 print(f"  ⚠️  未找到文本: {original_text}")
         
-        # 保存文件
-        if content != original_content:
+        # 保存文件（干运行时只输出diff）
+        if rewrite.changed:
             if not self.dry_run:
-                # 备份原文件
-                backup_path = f"{file_path}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    f.write(original_content)
-                
-                # 写入新内容
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                # 备份原文件（事务读入的原始内容）
+                self.backup_file(file_path, rewrite.original)
             
+            rewrite.commit(dry_run=self.dry_run)
             return True
         
         return False
     
-    def add_l10n_import(self, content):
-        """添加本地化导入到文件顶部"""
-        lines = content.split('\n')
+    def backup_file(self, file_path, content=None):
+        """把修改前的文件加入本次运行的备份（内容寻址，整次运行共用一个清单，由 flush_backup 写出）"""
+        if self.backup is None:
+            self.backup = BackupStore().begin('enhanced_multilingual_applier')
+        self.backup.add(file_path, content)
+    
+    def flush_backup(self):
+        """写出备份清单（文件内容在加入时已存入备份库，只需写一次清单）"""
+        if self.backup is not None:
+            self.backup.save()
+    
+    def add_l10n_import(self, rewrite):
+        """在改写事务中登记本地化导入（位于最后一个import语句之后）"""
+        lines = rewrite.lines
         
         # 查找导入语句的插入位置
         import_insert_index = 0
@@ -316,7 +324,7 @@ class EnhancedMappingApplier:
         l10n_import = self.generate_l10n_import()
         if any('app_localizations' in line.lower() or 'flutter_gen/gen_l10n' in line for line in lines):
             print("  📦 本地化导入已存在")
-            return content
+            return
           # 插入导入语句
         if last_import_index >= 0:
             insert_index = last_import_index + 1
@@ -324,10 +332,8 @@ class EnhancedMappingApplier:
             # 如果没有import语句，在文件开头插入
             insert_index = 0
             
-        lines.insert(insert_index, l10n_import)
+        rewrite.insert_before_line(insert_index + 1, l10n_import + '\n')
         print(f"  📦 添加导入: {l10n_import}")
-        
-        return '\n'.join(lines)
     
     def process_arb_updates(self):
         """处理ARB文件更新"""
@@ -427,13 +433,17 @@ class EnhancedMappingApplier:
         
         self.load_arb_files()
         
-        # 处理代码更改
-        code_changes = self.process_code_replacements()
-        files_changed = self.apply_code_changes(code_changes)
-        
-        # 处理ARB更新
-        zh_updates, en_updates = self.process_arb_updates()
-        arb_files_changed = self.apply_arb_changes(zh_updates, en_updates)
+        try:
+            # 处理代码更改
+            code_changes = self.process_code_replacements()
+            files_changed = self.apply_code_changes(code_changes)
+            
+            # 处理ARB更新
+            zh_updates, en_updates = self.process_arb_updates()
+            arb_files_changed = self.apply_arb_changes(zh_updates, en_updates)
+        finally:
+            # 正常结束或中途出错（包括 Ctrl-C）时都写出清单，已修改的文件均可恢复
+            self.flush_backup()
         
         # 报告结果
         print(f"\n✅ 应用完成!")
@@ -442,6 +452,8 @@ class EnhancedMappingApplier:
             print(f"📦 已添加必要的本地化导入")
         if arb_files_changed:
             print(f"🌐 已更新 {len(arb_files_changed)} 个ARB文件")
+        if self.backup is not None:
+            print(f"💾 备份编号: {self.backup.manifest_id}（恢复: python scripts/backup_store.py restore {self.backup.manifest_id}）")
         
         return True
     
@@ -455,10 +467,8 @@ class EnhancedMappingApplier:
                 self.zh_arb_data[key] = value
             
             if not self.dry_run:
-                backup_path = f"{ZH_ARB_PATH}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 if os.path.exists(ZH_ARB_PATH):
-                    with open(backup_path, 'w', encoding='utf-8') as f:
-                        json.dump(dict(self.zh_arb_data), f, ensure_ascii=False, indent=2)
+                    self.backup_file(ZH_ARB_PATH)
                 
                 with open(ZH_ARB_PATH, 'w', encoding='utf-8') as f:
                     json.dump(dict(self.zh_arb_data), f, ensure_ascii=False, indent=2)
@@ -471,10 +481,8 @@ class EnhancedMappingApplier:
                 self.en_arb_data[key] = value
             
             if not self.dry_run:
-                backup_path = f"{EN_ARB_PATH}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 if os.path.exists(EN_ARB_PATH):
-                    with open(backup_path, 'w', encoding='utf-8') as f:
-                        json.dump(dict(self.en_arb_data), f, ensure_ascii=False, indent=2)
+                    self.backup_file(EN_ARB_PATH)
                 
                 with open(EN_ARB_PATH, 'w', encoding='utf-8') as f:
                     json.dump(dict(self.en_arb_data), f, ensure_ascii=False, indent=2)
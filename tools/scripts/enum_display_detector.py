@@ -5,12 +5,15 @@
 
 import os
 import re
+import sys
 import json
-import glob
 import yaml
 from collections import defaultdict, OrderedDict
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from dart_source_index import DartSourceIndex
+
 # 配置常量
 CODE_DIR = "lib"
 ARB_DIR = "lib/l10n"
@@ -63,6 +66,9 @@ class EnumDisplayNameDetector:
         self.ensure_report_dir()
         self.arb_values = self.load_existing_arb_values()
         self.enum_definitions = {}
+        self.source_index = DartSourceIndex(roots=[CODE_DIR])
+        self.source_index.refresh()
+        self._file_lines = {}
         
     def ensure_report_dir(self):
         """确保报告目录存在"""
@@ -83,47 +89,21 @@ class EnumDisplayNameDetector:
                 print(f"Warning: Error loading {ZH_ARB_PATH}: {e}")
         return arb_values
     
+    def read_lines(self, dart_file):
+        """读取文件行（同一次检测中每个文件只读取一次）"""
+        if dart_file not in self._file_lines:
+            with open(dart_file, 'r', encoding='utf-8') as f:
+                self._file_lines[dart_file] = f.read().split('\n')
+        return self._file_lines[dart_file]
+    
     def find_enum_definitions(self):
-        """查找所有枚举定义"""
-        enum_pattern = r'enum\s+(\w+)\s*{'
-        
-        dart_files = glob.glob(os.path.join(CODE_DIR, "**/*.dart"), recursive=True)
-        
-        for dart_file in dart_files:
-            try:
-                with open(dart_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # 查找枚举定义
-                for match in re.finditer(enum_pattern, content):
-                    enum_name = match.group(1)
-                    file_path = os.path.relpath(dart_file, CODE_DIR)
-                    
-                    # 提取枚举值
-                    enum_content_start = match.end()
-                    brace_count = 1
-                    enum_content_end = enum_content_start
-                    
-                    for i, char in enumerate(content[enum_content_start:], enum_content_start):
-                        if char == '{':
-                            brace_count += 1
-                        elif char == '}':
-                            brace_count -= 1
-                            if brace_count == 0:
-                                enum_content_end = i
-                                break
-                    
-                    enum_content = content[enum_content_start:enum_content_end]
-                    enum_values = re.findall(r'(\w+)(?:\s*,|\s*;|\s*})', enum_content)
-                    
-                    self.enum_definitions[enum_name] = {
-                        'file': file_path,
-                        'values': enum_values,
-                        'content': enum_content
-                    }
-                    
-            except (UnicodeDecodeError, FileNotFoundError) as e:
-                print(f"Warning: Error reading {dart_file}: {e}")
+        """查找所有枚举定义（从增量源码索引中查询）"""
+        for enum in self.source_index.enum_definitions():
+            self.enum_definitions[enum['name']] = {
+                'file': os.path.relpath(enum['file'], CODE_DIR),
+                'values': enum['values'],
+                'content': enum['content']
+            }
     
     def analyze_enum_usage(self, enum_name, enum_info):
         """分析特定枚举的使用情况"""
@@ -142,13 +122,12 @@ class EnumDisplayNameDetector:
             f'case\\s+{enum_name}\\.\\w+',  # switch case
         ]
         
-        dart_files = glob.glob(os.path.join(CODE_DIR, "**/*.dart"), recursive=True)
+        # 只有包含中文的文件才可能产生硬编码检测结果
+        dart_files = self.source_index.files_with_cjk()
         
         for dart_file in dart_files:
             try:
-                with open(dart_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    lines = content.split('\n')
+                lines = self.read_lines(dart_file)
                 
                 file_path = os.path.relpath(dart_file, CODE_DIR)
                 
@@ -218,13 +197,12 @@ class EnumDisplayNameDetector:
         """直接模式检测"""
         results = defaultdict(list)
         
-        dart_files = glob.glob(os.path.join(CODE_DIR, "**/*.dart"), recursive=True)
+        # 只有包含中文的文件才可能产生硬编码检测结果
+        dart_files = self.source_index.files_with_cjk()
         
         for dart_file in dart_files:
             try:
-                with open(dart_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    lines = content.split('\n')
+                lines = self.read_lines(dart_file)
                 
                 file_path = os.path.relpath(dart_file, CODE_DIR)
                 
@@ -9,21 +9,22 @@
 import os
 import re
 import json
+import sys
 import yaml
-import shutil
-from datetime import datetime
 from typing import Dict, List, Any
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from backup_store import BackupStore
+
 class FinalHardcodedApplier:
     def __init__(self, mapping_file: str):
         self.mapping_file = mapping_file
         self.workspace_root = os.getcwd()
         self.zh_arb_path = os.path.join(self.workspace_root, 'lib', 'l10n', 'app_zh.arb')
         self.en_arb_path = os.path.join(self.workspace_root, 'lib', 'l10n', 'app_en.arb')
-        self.backup_dir = os.path.join(self.workspace_root, 'final_hardcoded_backup')
+        self.backup_store = BackupStore(os.path.join(self.workspace_root, 'tools', 'backups'))
         
         self.load_mapping()
-        self.ensure_backup_dir()
     
     def load_mapping(self):
         """加载映射文件"""
@@ -34,22 +35,14 @@ class FinalHardcodedApplier:
         except Exception as e:
             raise Exception(f"❌ 无法加载映射文件: {e}")
     
-    def ensure_backup_dir(self):
-        """确保备份目录存在"""
-        if not os.path.exists(self.backup_dir):
-            os.makedirs(self.backup_dir)
-    
     def create_backup(self):
-        """创建备份"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_subdir = os.path.join(self.backup_dir, f'backup_{timestamp}')
-        os.makedirs(backup_subdir)
+        """创建备份（写入内容寻址备份库），返回备份编号"""
+        backup = self.backup_store.begin('final_hardcoded_applier')
         
         # 备份ARB文件
         for arb_path in [self.zh_arb_path, self.en_arb_path]:
             if os.path.exists(arb_path):
-                backup_path = os.path.join(backup_subdir, os.path.basename(arb_path))
-                shutil.copy2(arb_path, backup_path)
+                backup.add(arb_path)
                 print(f"📄 已备份: {os.path.basename(arb_path)}")
         
         # 备份修改的Dart文件
@@ -62,12 +55,12 @@ class FinalHardcodedApplier:
                             file_path = os.path.join(self.workspace_root, data['file'])
                             if file_path not in dart_files:
                                 dart_files.add(file_path)
-                                backup_file_path = os.path.join(backup_subdir, f"{os.path.basename(file_path)}.backup")
                                 if os.path.exists(file_path):
-                                    shutil.copy2(file_path, backup_file_path)
+                                    backup.add(file_path)
         
-        print(f"📁 备份目录: {backup_subdir}")
-        return backup_subdir
+        backup_id = backup.save()
+        print(f"📁 备份编号: {backup_id}")
+        return backup_id
     
     def get_approved_items(self):
         """获取已审核通过的项目"""
@@ -225,7 +218,7 @@ class FinalHardcodedApplier:
         print(f"📊 找到 {len(approved_reuse)} 个复用项目和 {len(approved_new)} 个新建项目")
         
         # 创建备份
-        backup_dir = self.create_backup()
+        backup_id = self.create_backup()
         
         # 更新ARB文件（只处理新建的键）
         self.update_arb_files(approved_new)
@@ -250,12 +243,10 @@ class FinalHardcodedApplier:
         if success_count < total_count:
             print(f"⚠️  有 {total_count - success_count} 个项目替换失败，请手动检查")
         
-        print(f"💾 备份位置: {backup_dir}")
+        print(f"💾 备份编号: {backup_id}（恢复: python scripts/backup_store.py restore {backup_id}）")
         print("\n✅ 应用完成！请运行 'flutter gen-l10n' 重新生成本地化文件")
 
 def main():
-    import sys
-    
     if len(sys.argv) != 2:
         print("用法: python final_hardcoded_applier.py <mapping_file>")
         print("示例: python final_hardcoded_applier.py final_hardcoded_report/final_mapping_20250617_030438.yaml")
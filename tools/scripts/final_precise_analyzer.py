@@ -6,10 +6,15 @@
 
 import os
 import re
+import sys
 import json
 from pathlib import Path
 from typing import Set, Dict, List, Optional, Tuple
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from import_graph import ImportGraph
+from reference_index import ReferenceIndex
+
 class FinalPreciseAnalyzer:
     def __init__(self, project_root: str):
         self.project_root = Path(project_root).resolve()
@@ -19,6 +24,7 @@ class FinalPreciseAnalyzer:
         self.all_files: Set[str] = set()
         self.imports: Dict[str, Set[str]] = {}
         self.exports: Dict[str, Set[str]] = {}  # 新增：跟踪export
+        self.dependency_graph = ImportGraph()  # 导入与导出合并后的依赖图
         self.used_files: Set[str] = set()
         self.file_info: Dict[str, dict] = {}
         
@@ -100,6 +106,10 @@ class FinalPreciseAnalyzer:
             self.imports[rel_path] = imports
             self.exports[rel_path] = exports
         
+        self.dependency_graph = ImportGraph({
+            rel_path: self.imports[rel_path] | self.exports[rel_path] for rel_path in self.all_files
+        })
+        
         total_imports = sum(len(imports) for imports in self.imports.values())
         total_exports = sum(len(exports) for exports in self.exports.values())
         print(f"   解析 {total_imports} 个导入，{total_exports} 个导出")
@@ -221,31 +231,10 @@ class FinalPreciseAnalyzer:
                 important_count += 1
         print(f"   重要文件: {important_count}个")
         
-        # 3. 递归标记直接和间接依赖
-        changed = True
-        iteration = 0
-        
-        while changed and iteration < 50:
-            changed = False
-            iteration += 1
-            old_count = len(self.used_files)
-            
-            for used_file in list(self.used_files):
-                # 标记导入的文件
-                for imported in self.imports.get(used_file, set()):
-                    if imported not in self.used_files:
-                        self.used_files.add(imported)
-                        changed = True
-                
-                # 标记导出的文件
-                for exported in self.exports.get(used_file, set()):
-                    if exported not in self.used_files:
-                        self.used_files.add(exported)
-                        changed = True
-            
-            new_count = len(self.used_files)
-            if new_count > old_count:
-                print(f"     第{iteration}轮: +{new_count - old_count}个")
+        # 3. 遍历依赖图，标记直接和间接导入/导出的文件
+        old_count = len(self.used_files)
+        self.used_files = self.dependency_graph.reachable(self.used_files)
+        print(f"     依赖传递: +{len(self.used_files) - old_count}个")
         
         lib_used = len([f for f in self.used_files if f.startswith('lib/')])
         print(f"   最终标记: {lib_used}个lib文件")
@@ -261,33 +250,24 @@ class FinalPreciseAnalyzer:
             'likely_used_files': []
         }
         
+        # 一次读取所有文件建立倒排索引（不区分大小写）
+        reference_index = ReferenceIndex(
+            {rel_path: self.file_info[rel_path]['path_obj'] for rel_path in self.all_files},
+            case_sensitive=False,
+        )
+        
         for file_path in unused_files:
             is_likely_used = False
             reasons = []
             
             # 检查是否被字符串引用（动态导入）
-            file_name = Path(file_path).stem
-            base_name = file_name.lower()
+            # 路径形式的引用（含引号）都包含文件名，只需查找文件名
+            base_name = Path(file_path).stem.lower()
             
-            for check_file in self.all_files:
-                if check_file == file_path:
-                    continue
-                
-                try:
-                    with open(self.file_info[check_file]['path_obj'], 'r', encoding='utf-8') as f:
-                        content = f.read().lower()
-                    
-                    # 检查多种可能的引用方式
-                    if (base_name in content or 
-                        file_path.lower() in content or
-                        f"'{file_path}'" in content.lower() or
-                        f'"{file_path}"' in content.lower()):
-                        is_likely_used = True
-                        reasons.append(f"被{check_file}引用")
-                        break
-                        
-                except:
-                    continue
+            referencing_files = reference_index.files_mentioning(base_name) - {file_path}
+            if referencing_files:
+                is_likely_used = True
+                reasons.append(f"被{min(referencing_files)}引用")
             
             # 检查文件名模式（可能被动态引用）
             if self.file_info[file_path]['is_dynamic']:
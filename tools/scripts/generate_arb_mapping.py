@@ -8,9 +8,13 @@ allowing users to manually edit the mapping before applying changes.
 import json
 import os
 import re
+import sys
 import glob
 import yaml
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from similarity_clustering import identical_value_groups
 
 # Constants
 ARB_DIR = "lib/l10n"
@@ -31,17 +35,7 @@ def load_arb_files():
 
 def find_similar_keys(arb_data):
     """Find keys with identical values"""
-    value_to_keys = defaultdict(list)
-    
-    # Group keys by their values
-    for key, value in arb_data.items():
-        if not key.startswith('@'):  # Skip metadata keys
-            value_to_keys[value].append(key)
-    
-    # Filter groups to only include those with multiple keys
-    similar_keys = {value: keys for value, keys in value_to_keys.items() if len(keys) > 1}
-    
-    return similar_keys
+    return identical_value_groups(arb_data)
 
 def generate_mapping_yaml():
     """Generate a human-readable YAML mapping file"""
@@ -11,13 +11,16 @@ The YAML file can be manually edited by users to customize the mapping.
 """
 
 import os
+import sys
 import json
 import yaml
 import re
-import difflib
-from collections import defaultdict, OrderedDict
+from collections import OrderedDict
 import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from similarity_clustering import find_similar_values
+
 # Constants
 ARB_DIR = "lib/l10n"
 ZH_ARB_PATH = os.path.join(ARB_DIR, "app_zh.arb")
@@ -42,62 +45,6 @@ def load_arb_files():
     
     return zh_keys, en_keys
 
-def calculate_similarity(s1, s2):
-    """Calculate similarity between two strings"""
-    if not s1 or not s2:
-        return 0.0
-    
-    # For exact matches, return maximum similarity
-    if s1 == s2:
-        return 1.0
-    
-    # Use sequence matcher for string similarity
-    return difflib.SequenceMatcher(None, s1, s2).ratio()
-
-def find_similar_values(arb_data, similarity_threshold=0.85):
-    """Find keys with similar values and group them"""
-    # Group keys by exact same values first
-    value_to_keys = defaultdict(list)
-    for key, value in arb_data.items():
-        value_to_keys[value].append(key)
-    
-    # Find groups with identical values
-    identical_groups = [keys for value, keys in value_to_keys.items() if len(keys) > 1]
-    
-    # Find similar values
-    remaining_keys = set(arb_data.keys())
-    for group in identical_groups:
-        for key in group:
-            if key in remaining_keys:
-                remaining_keys.remove(key)
-    
-    # Calculate similarity between remaining values
-    similar_groups = []
-    while remaining_keys:
-        key = next(iter(remaining_keys))
-        remaining_keys.remove(key)
-        
-        group = [key]
-        value = arb_data[key]
-        
-        # Find similar values
-        similar_keys = []
-        for other_key in list(remaining_keys):
-            other_value = arb_data[other_key]
-            similarity = calculate_similarity(value, other_value)
-            if similarity >= similarity_threshold:
-                similar_keys.append(other_key)
-        
-        # Add similar keys to group
-        for similar_key in similar_keys:
-            group.append(similar_key)
-            remaining_keys.remove(similar_key)
-        
-        if len(group) > 1:
-            similar_groups.append(group)
-    
-    return identical_groups + similar_groups
-
 def generate_yaml_mapping():
     """Generate YAML mapping file with values from ARB files"""
     print("Loading ARB files...")
@@ -118,21 +65,27 @@ def generate_yaml_mapping():
     print("Combining similar values from both languages...")
     combined_groups = []
     
+    # Groups of one language are disjoint, so index the English group of every key
+    en_group_of = {}
+    for index, en_group in enumerate(en_groups):
+        for key in en_group:
+            en_group_of[key] = index
+    
     # First, add groups that are similar in both languages
     for zh_group in zh_groups:
-        for en_group in en_groups:
-            if len(set(zh_group) & set(en_group)) > 0:
-                # If there's an overlap, merge the groups
-                combined_group = list(set(zh_group) | set(en_group))
-                combined_groups.append(combined_group)
-                break
+        overlapping = [en_group_of[key] for key in zh_group if key in en_group_of]
+        if overlapping:
+            # If there's an overlap, merge with the first overlapping English group
+            combined_group = list(set(zh_group) | set(en_groups[min(overlapping)]))
+            combined_groups.append(combined_group)
         else:
             # If no overlap with any English group, add the Chinese group
             combined_groups.append(zh_group)
     
     # Add remaining English groups that don't overlap with any Chinese group
+    combined_keys = {key for group in combined_groups for key in group}
     for en_group in en_groups:
-        if not any(len(set(en_group) & set(group)) > 0 for group in combined_groups):
+        if not combined_keys.intersection(en_group):
             combined_groups.append(en_group)
     
     # Create the YAML mapping
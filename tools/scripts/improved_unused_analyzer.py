@@ -6,11 +6,17 @@
 
 import os
 import re
+import sys
 import json
 from pathlib import Path
 from typing import Set, Dict, List, Tuple, Optional
 from urllib.parse import unquote
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from dart_source_index import DartSourceIndex
+from import_graph import ImportGraph
+from reference_index import ReferenceIndex
+
 class ImprovedUnusedAnalyzer:
     def __init__(self, project_root: str):
         self.project_root = Path(project_root).resolve()
@@ -20,8 +26,11 @@ class ImprovedUnusedAnalyzer:
         # 存储分析结果
         self.all_files: Set[str] = set()
         self.import_relationships: Dict[str, Set[str]] = {}
+        self.import_graph = ImportGraph()
         self.used_files: Set[str] = set()
         self.file_info: Dict[str, dict] = {}
+        self.source_index = DartSourceIndex(str(self.project_root), roots=['lib', 'test'])
+        self._reference_index = None
         
         # 排除模式
         self.excluded_patterns = [
@@ -53,35 +62,37 @@ class ImprovedUnusedAnalyzer:
         """扫描所有Dart文件并收集基本信息"""
         print("🔍 扫描所有Dart文件...")
         
+        # 通过增量源码索引获取文件列表，只重新解析发生变化的文件
+        self.source_index.refresh()
+        
         # 扫描lib目录
         lib_files = 0
-        if self.lib_dir.exists():
-            for dart_file in self.lib_dir.rglob('*.dart'):
-                if not self._is_excluded_file(dart_file):
-                    rel_path = str(dart_file.relative_to(self.project_root)).replace('\\', '/')
-                    self.all_files.add(rel_path)
-                    self.file_info[rel_path] = {
-                        'size': dart_file.stat().st_size,
-                        'is_empty': dart_file.stat().st_size < 50,  # 认为小于50字节的文件为空
-                        'is_special': self._is_special_file(rel_path),
-                        'absolute_path': dart_file
-                    }
-                    lib_files += 1
-        
-        # 扫描test目录
-        test_files = 0
-        if self.test_dir.exists():
-            for dart_file in self.test_dir.rglob('*.dart'):
-                rel_path = str(dart_file.relative_to(self.project_root)).replace('\\', '/')
+        for rel_path in self.source_index.files('lib'):
+            dart_file = Path(self.source_index.abspath(rel_path))
+            if not self._is_excluded_file(dart_file):
+                size = self.source_index.get(rel_path)['size']
                 self.all_files.add(rel_path)
                 self.file_info[rel_path] = {
-                    'size': dart_file.stat().st_size,
-                    'is_empty': dart_file.stat().st_size < 50,
-                    'is_special': False,
-                    'is_test': True,
+                    'size': size,
+                    'is_empty': size < 50,  # 认为小于50字节的文件为空
+                    'is_special': self._is_special_file(rel_path),
                     'absolute_path': dart_file
                 }
-                test_files += 1
+                lib_files += 1
+        
+        # 扫描test目录
+        test_files = 0
+        for rel_path in self.source_index.files('test'):
+            size = self.source_index.get(rel_path)['size']
+            self.all_files.add(rel_path)
+            self.file_info[rel_path] = {
+                'size': size,
+                'is_empty': size < 50,
+                'is_special': False,
+                'is_test': True,
+                'absolute_path': Path(self.source_index.abspath(rel_path))
+            }
+            test_files += 1
         
         print(f"   总有效文件数: {len(self.all_files)}")
         print(f"   lib文件: {lib_files}, test文件: {test_files}")
@@ -104,64 +115,28 @@ class ImprovedUnusedAnalyzer:
             imports = self._extract_imports_improved(full_path, file_path)
             self.import_relationships[file_path] = imports
         
+        self.import_graph = ImportGraph(self.import_relationships)
+        
         print(f"   分析了 {len(self.import_relationships)} 个文件的导入关系")
         
         # 统计导入数量
-        total_imports = sum(len(imports) for imports in self.import_relationships.values())
-        print(f"   发现 {total_imports} 个导入关系")
+        print(f"   发现 {self.import_graph.edge_count} 个导入关系")
+        
+        cycles = self.import_graph.cycles()
+        if cycles:
+            print(f"   发现 {len(cycles)} 组循环导入（共 {sum(len(c) for c in cycles)} 个文件）")
     
     def _extract_imports_improved(self, file_path: Path, relative_path: str) -> Set[str]:
-        """改进的导入提取方法"""
+        """改进的导入提取方法（导入指令来自源码索引，注释已在索引解析时剔除）"""
         imports = set()
         
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except Exception as e:
-            print(f"   警告: 读取文件 {file_path} 时出错: {e}")
-            return imports
-        
-        # 移除注释和字符串字面量，避免误检测
-        content = self._remove_comments_and_strings(content)
-        
-        # 多种导入模式
-        import_patterns = [
-            r"import\s+['\"]([^'\"]+)['\"]",     # import 'path'
-            r"export\s+['\"]([^'\"]+)['\"]",     # export 'path'
-            r"part\s+['\"]([^'\"]+)['\"]",       # part 'path'
-            r"part\s+of\s+['\"]([^'\"]+)['\"]",  # part of 'path'
-        ]
-        
-        for pattern in import_patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                resolved_import = self._resolve_import_path(match, relative_path)
-                if resolved_import:
-                    imports.add(resolved_import)
+        for uri in self.source_index.get(relative_path)['imports']:
+            resolved_import = self._resolve_import_path(uri, relative_path)
+            if resolved_import:
+                imports.add(resolved_import)
         
         return imports
     
-    def _remove_comments_and_strings(self, content: str) -> str:
-        """移除注释和字符串字面量，避免在注释中的import被误检测"""
-        # 简单的注释和字符串移除（不完全精确，但足够用）
-        lines = content.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            # 移除单行注释
-            if '//' in line:
-                line = line[:line.find('//')]
-            
-            # 移除多行注释（简单处理）
-            if '/*' in line and '*/' in line:
-                start = line.find('/*')
-                end = line.find('*/', start) + 2
-                line = line[:start] + line[end:]
-            
-            cleaned_lines.append(line)
-        
-        return '\n'.join(cleaned_lines)
-    
     def _resolve_import_path(self, import_path: str, current_file: str) -> Optional[str]:
         """解析导入路径为项目内的相对路径"""
         try:
@@ -239,31 +214,12 @@ class ImprovedUnusedAnalyzer:
                 special_count += 1
         print(f"   标记 {special_count} 个特殊文件为已使用")
         
-        # 4. 递归标记被导入的文件
+        # 4. 从已使用文件出发遍历导入关系图，标记所有直接和间接导入的文件
         initial_used = len(self.used_files)
-        changed = True
-        iterations = 0
-        max_iterations = 100  # 防止无限循环
-        
-        while changed and iterations < max_iterations:
-            changed = False
-            iterations += 1
-            old_count = len(self.used_files)
-            
-            # 遍历已使用的文件，标记它们导入的文件
-            for used_file in list(self.used_files):
-                if used_file in self.import_relationships:
-                    for imported_file in self.import_relationships[used_file]:
-                        if imported_file not in self.used_files:
-                            self.used_files.add(imported_file)
-                            changed = True
-            
-            new_count = len(self.used_files)
-            if new_count > old_count:
-                print(f"     第{iterations}轮: 新增 {new_count - old_count} 个使用文件")
+        self.used_files = self.import_graph.reachable(self.used_files)
         
         final_used = len(self.used_files)
-        print(f"   经过 {iterations} 轮迭代，从 {initial_used} 增加到 {final_used} 个已使用文件")
+        print(f"   遍历导入关系图，从 {initial_used} 增加到 {final_used} 个已使用文件")
     
     def analyze_unused_files(self) -> Dict[str, List[dict]]:
         """分析未使用的文件，按优先级分类"""
@@ -304,6 +260,15 @@ class ImprovedUnusedAnalyzer:
         
         return unused_analysis
     
+    @property
+    def reference_index(self) -> ReferenceIndex:
+        """所有文件内容的单词倒排索引（首次使用时一次性构建）"""
+        if self._reference_index is None:
+            self._reference_index = ReferenceIndex(
+                {file_path: self.file_info[file_path]['absolute_path'] for file_path in self.all_files}
+            )
+        return self._reference_index
+    
     def cross_validate_sample(self, sample_files: List[str], sample_size: int = 20) -> Dict:
         """交叉验证样本文件"""
         print(f"🔬 交叉验证前{sample_size}个文件...")
@@ -319,30 +284,10 @@ class ImprovedUnusedAnalyzer:
             validation_results['checked'] += 1
             
             # 在所有文件中搜索对此文件的引用
-            is_referenced = False
-            references = []
-            
+            # 路径形式的引用（含引号）都包含文件名，只需查找文件名
             file_name = Path(file_path).stem
-            
-            for check_file in self.all_files:
-                if check_file == file_path:
-                    continue
-                
-                try:
-                    with open(self.file_info[check_file]['absolute_path'], 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # 检查多种引用方式
-                    if (file_path in content or 
-                        file_name in content or
-                        f"'{file_path}'" in content or
-                        f'"{file_path}"' in content):
-                        is_referenced = True
-                        references.append(check_file)
-                        break
-                        
-                except Exception:
-                    continue
+            references = sorted(self.reference_index.files_mentioning(file_name) - {file_path})
+            is_referenced = bool(references)
             
             if is_referenced:
                 validation_results['false_positives'] += 1
@@ -13,6 +13,9 @@ from typing import Set, Dict, List, Tuple
 import json
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from import_graph import ImportGraph
+
 class MarkdownReportGenerator:
     def __init__(self, project_root: str):
         self.project_root = Path(project_root)
@@ -29,6 +32,7 @@ class MarkdownReportGenerator:
         
         # 导入关系
         self.import_relationships: Dict[Path, Set[Path]] = {}
+        self.import_graph = ImportGraph()
         
         # 排除模式
         self.exclude_patterns = [
@@ -110,6 +114,8 @@ class MarkdownReportGenerator:
                 self.import_relationships[dart_file] = imports
             except Exception as e:
                 print(f"   ⚠️  分析文件失败: {dart_file} - {e}")
+        
+        self.import_graph = ImportGraph(self.import_relationships)
 
     def _extract_imports(self, file_path: Path) -> Set[Path]:
         """提取文件中的导入关系"""
@@ -169,15 +175,8 @@ class MarkdownReportGenerator:
         self.unused_files = self.lib_files - self.used_files
 
     def _mark_file_and_dependencies(self, file_path: Path):
-        """递归标记文件及其依赖为已使用"""
-        if file_path in self.used_files:
-            return
-        
-        self.used_files.add(file_path)
-        
-        if file_path in self.import_relationships:
-            for imported_file in self.import_relationships[file_path]:
-                self._mark_file_and_dependencies(imported_file)
+        """标记文件及其直接和间接依赖为已使用（已标记的文件不再重复遍历）"""
+        self.import_graph.reachable([file_path], visited=self.used_files)
 
     def _get_file_info(self, file_path: Path) -> Dict:
         """获取文件信息"""
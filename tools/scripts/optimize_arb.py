@@ -2,34 +2,35 @@
 import json
 import os
 import re
+import sys
 import glob
 from collections import defaultdict, OrderedDict
-import datetime
-import shutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from key_renamer import KeyRenamer
+from backup_store import BackupStore
+from similarity_clustering import containment_or_normalized_pairs
 
 # Constants
 ARB_DIR = "lib/l10n"
 ZH_ARB_PATH = os.path.join(ARB_DIR, "app_zh.arb")
 EN_ARB_PATH = os.path.join(ARB_DIR, "app_en.arb")
-BACKUP_DIR = f"arb_backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+BACKUP_OPERATION = "optimize_arb"
 CODE_DIR = "lib"
 
-# Ensure backup directory exists
-if not os.path.exists(BACKUP_DIR):
-    os.makedirs(BACKUP_DIR)
-
-print(f"Created backup directory: {BACKUP_DIR}")
-
 # Step 1: Back up ARB files
 def backup_arb_files():
-    """Create backups of ARB files"""
+    """Back up ARB files into the content-addressed backup store, return the backup id"""
+    backup = BackupStore().begin(BACKUP_OPERATION)
     for arb_file in [ZH_ARB_PATH, EN_ARB_PATH]:
         if os.path.exists(arb_file):
-            backup_path = os.path.join(BACKUP_DIR, os.path.basename(arb_file))
-            shutil.copy2(arb_file, backup_path)
-            print(f"Backed up {arb_file} to {backup_path}")
+            backup.add(arb_file)
+            print(f"Backed up {arb_file}")
         else:
             print(f"Warning: ARB file {arb_file} not found!")
+    backup_id = backup.save()
+    print(f"Backup id: {backup_id}")
+    return backup_id
 
 # Step 2: Load ARB files
 def load_arb_files():
@@ -98,14 +99,13 @@ def find_similar_keys(zh_data, en_data):
     similar_values = []
     zh_values = list(zh_value_to_keys.keys())
     
-    for i, value1 in enumerate(zh_values):
-        for value2 in zh_values[i+1:]:
-            # Simple similarity: one is contained in the other or differ by punctuation
-            if (value1 in value2 or value2 in value1) or \
-               (re.sub(r'[^\w\s]', '', value1) == re.sub(r'[^\w\s]', '', value2)):
-                keys1 = zh_value_to_keys[value1]
-                keys2 = zh_value_to_keys[value2]
-                similar_values.append((value1, value2, keys1, keys2))
+    # Simple similarity: one is contained in the other or differ by punctuation
+    # (pairs come from a substring index and normalized-form buckets, not all pairs)
+    for i, j in containment_or_normalized_pairs(zh_values):
+        value1, value2 = zh_values[i], zh_values[j]
+        keys1 = zh_value_to_keys[value1]
+        keys2 = zh_value_to_keys[value2]
+        similar_values.append((value1, value2, keys1, keys2))
     
     return identical_values, similar_values
 
@@ -260,26 +260,15 @@ def apply_optimizations(zh_data, en_data, optimizations):
 def update_code_references(key_mapping):
     """Update code references to use new keys"""
     count = 0
+    # Replace patterns: l10n.oldKey -> l10n.newKey (whole identifiers only, single pass per file)
+    renamer = KeyRenamer(key_mapping)
     for dart_file in glob.glob(os.path.join(CODE_DIR, "**/*.dart"), recursive=True):
-        updated = False
         with open(dart_file, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        new_content = content
-        
-        # Replace patterns: l10n.oldKey -> l10n.newKey
-        for old_key, new_key in key_mapping.items():
-            patterns = [
-                (f'l10n.{old_key}', f'l10n.{new_key}'),
-                (f'AppLocalizations.of(context).{old_key}', f'AppLocalizations.of(context).{new_key}')
-            ]
-            
-            for old_pattern, new_pattern in patterns:
-                if old_pattern in new_content:
-                    new_content = new_content.replace(old_pattern, new_pattern)
-                    updated = True
+        new_content, replaced = renamer.rename(content)
         
-        if updated:
+        if replaced:
             count += 1
             with open(dart_file, 'w', encoding='utf-8') as f:
                 f.write(new_content)
@@ -300,7 +289,7 @@ def main():
     print("Starting ARB file optimization...")
     
     # Step 1: Back up ARB files
-    backup_arb_files()
+    backup_id = backup_arb_files()
     
     # Step 2: Load ARB files
     zh_data, en_data = load_arb_files()
@@ -341,7 +330,8 @@ def main():
     print("Saved new ARB files")
     
     print("\nARB optimization complete!")
-    print(f"Original ARB files backed up to {BACKUP_DIR}")
+    print(f"Original ARB files backed up as {backup_id}")
+    print(f"Restore with: python scripts/backup_store.py restore {backup_id}")
     print(f"Keys removed: {len(optimizations['unused_keys'])}")
     print(f"Keys merged: {len(optimizations['keys_to_merge'])}")
     print(f"Keys renamed: {len(optimizations['keys_to_rename'])}")
@@ -5,19 +5,28 @@
 
 import os
 import re
+import sys
 import json
-import glob
 import yaml
-from collections import defaultdict, OrderedDict
+import argparse
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter, defaultdict, OrderedDict
 from datetime import datetime
 from difflib import SequenceMatcher
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from dart_source_index import DartSourceIndex
+from detection_patterns import CompiledPatternSet, SpanIndex
+from finding_stream import FindingStream
+
 # 配置常量
 CODE_DIR = "lib"
 ARB_DIR = "lib/l10n"
 ZH_ARB_PATH = os.path.join(ARB_DIR, "app_zh.arb")
 EN_ARB_PATH = os.path.join(ARB_DIR, "app_en.arb")
 REPORT_DIR = "optimized_hardcoded_report"
+STREAM_PATH = os.path.join(REPORT_DIR, "detection_stream.jsonl")
 
 # 优化的检测模式 - 更全面的正则表达式
 ENHANCED_DETECTION_PATTERNS = {
@@ -190,11 +199,146 @@ EXCLUSION_PATTERNS = [
     r'fonts/\S+',  # 字体路径
 ]
 
+# 预编译的检测模式与排除模式
+DETECTION_PATTERN_SET = CompiledPatternSet(
+    (context, pattern)
+    for context, patterns in ENHANCED_DETECTION_PATTERNS.items()
+    for pattern in patterns
+)
+EXCLUSION_REGEXES = [re.compile(pattern, re.DOTALL) for pattern in EXCLUSION_PATTERNS]
+
+# 多行Widget模式（在去除注释后的整个文件内容上匹配）
+MULTILINE_DETECTION_PATTERNS = {
+    'ui_text_widget': [
+        r'Text\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
+        r'const\s+Text\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
+        r'SelectableText\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
+    ],
+    'ui_buttons_labels': [
+        r'ElevatedButton\s*\([^}]*child:\s*Text\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
+        r'TextButton\s*\([^}]*child:\s*Text\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
+    ],
+}
+
+MULTILINE_PATTERN_SET = CompiledPatternSet(
+    ((context, pattern)
+     for context, patterns in MULTILINE_DETECTION_PATTERNS.items()
+     for pattern in patterns),
+    re.DOTALL,
+)
+LINE_COMMENT_PATTERN = re.compile(r'//.*$', re.MULTILINE)
+BLOCK_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+def clean_hardcoded_text(text):
+    """清理硬编码文本：移除变量插值和特殊符号"""
+    clean_text = re.sub(r'\$\{[^}]*\}', '', text)
+    return re.sub(r'[：:{}$\(\)]', '', clean_text).strip()
+
+def clean_arb_value(value):
+    """清理ARB值：移除占位符和特殊符号"""
+    clean_value = re.sub(r'\{[^}]*\}', '', value)
+    return re.sub(r'[：:{}$\(\)]', '', clean_value).strip()
+
+class ARBReuseMatcher:
+    """ARB复用匹配器
+    
+    ARB值只清理一次，每个值缓存一个以其为第二序列的SequenceMatcher，并建立
+    字符 -> (条目, 出现次数) 的倒排索引。查询时通过倒排索引一次性累加出与每个条目的
+    字符多重集交集（即 quick_ratio 上界），只对上界达到阈值的条目按上界从高到低计算
+    完整相似度，上界低于当前最佳结果时停止。相同的清理后文本只计算一次。
+    返回结果与按ARB顺序逐条比较、取第一个最高相似度键的线性扫描完全一致。
+    """
+    
+    def __init__(self, arb_entries):
+        self.keys = list(arb_entries.keys())
+        cleaned = [clean_arb_value(value) for value in arb_entries.values()]
+        self.lengths = [len(value) for value in cleaned]
+        self.matchers = [SequenceMatcher(None, '', value) for value in cleaned]
+        
+        self.char_postings = defaultdict(list)
+        self.exact_index = {}
+        for i, value in enumerate(cleaned):
+            for char, count in Counter(value).items():
+                self.char_postings[char].append((i, count))
+            self.exact_index.setdefault(value, i)
+        
+        self._cache = {}
+        self.stats = {'queries': 0, 'cache_hits': 0, 'ratio_calls': 0}
+    
+    def find(self, clean_text, threshold=0.7):
+        """返回 (最相似的键, 相似度)；没有达到阈值的键时返回 (None, 0)"""
+        self.stats['queries'] += 1
+        cache_key = (clean_text, threshold)
+        if cache_key in self._cache:
+            self.stats['cache_hits'] += 1
+            return self._cache[cache_key]
+        
+        result = self._find_uncached(clean_text, threshold)
+        self._cache[cache_key] = result
+        return result
+    
+    def _find_uncached(self, clean_text, threshold):
+        # 完全相同的值相似度为1.0，按顺序第一个即为结果
+        if clean_text in self.exact_index and threshold <= 1.0:
+            return self.keys[self.exact_index[clean_text]], 1.0
+        
+        # 通过倒排索引累加字符多重集交集
+        overlap = defaultdict(int)
+        for char, count in Counter(clean_text).items():
+            for i, value_count in self.char_postings.get(char, ()):
+                overlap[i] += min(count, value_count)
+        
+        text_len = len(clean_text)
+        candidates = []
+        for i, common in overlap.items():
+            bound = 2.0 * common / (text_len + self.lengths[i])
+            if bound >= threshold:
+                candidates.append((-bound, i))
+        candidates.sort()
+        
+        best_index = None
+        best_ratio = 0
+        
+        for negative_bound, i in candidates:
+            bound = -negative_bound
+            if best_index is not None:
+                if bound < best_ratio:
+                    break
+                # 相同相似度时只有ARB中更靠前的键才能替换当前结果
+                if bound == best_ratio and i > best_index:
+                    continue
+            
+            self.stats['ratio_calls'] += 1
+            matcher = self.matchers[i]
+            matcher.set_seq1(clean_text)
+            ratio = matcher.ratio()
+            if ratio < threshold or ratio == 0:
+                continue
+            if best_index is None or ratio > best_ratio or (ratio == best_ratio and i < best_index):
+                best_index = i
+                best_ratio = ratio
+        
+        if best_index is None:
+            return None, 0
+        return self.keys[best_index], best_ratio
+
+# 并行检测时每个工作进程持有的检测器实例
+_worker_detector = None
+
+def _init_worker():
+    """进程池初始化：在工作进程中加载ARB数据"""
+    global _worker_detector
+    _worker_detector = OptimizedHardcodedDetector()
+
+def _detect_file_in_worker(dart_file):
+    return _worker_detector.detect_file(dart_file)
+
 class OptimizedHardcodedDetector:
     def __init__(self):
         self.ensure_report_dir()
         self.existing_arb_keys = self.load_existing_arb_keys()
         self.existing_arb_values = self.load_existing_arb_values()
+        self.arb_reuse_matcher = ARBReuseMatcher(self.existing_arb_keys)
         self.generated_keys = set()  # 跟踪已生成的键名，避免重复
         
     def ensure_report_dir(self):
@@ -222,24 +366,8 @@ class OptimizedHardcodedDetector:
     
     def find_similar_arb_key(self, text, threshold=0.7):
         """查找相似的ARB键值，实现复用"""
-        best_match = None
-        best_ratio = 0
-        
         # 清理文本：移除变量插值和特殊符号
-        clean_text = re.sub(r'\$\{[^}]*\}', '', text)
-        clean_text = re.sub(r'[：:{}$\(\)]', '', clean_text).strip()
-        
-        for key, value in self.existing_arb_keys.items():
-            # 清理ARB值
-            clean_value = re.sub(r'\{[^}]*\}', '', value)
-            clean_value = re.sub(r'[：:{}$\(\)]', '', clean_value).strip()
-            
-            # 计算文本相似度
-            ratio = SequenceMatcher(None, clean_text, clean_value).ratio()
-            if ratio > best_ratio and ratio >= threshold:
-                best_match = key
-                best_ratio = ratio        
-        return best_match, best_ratio
+        return self.arb_reuse_matcher.find(clean_hardcoded_text(text), threshold)
     
     def generate_camelcase_key(self, text, context, file_context):
         """根据现有ARB习惯生成驼峰命名的键名"""
@@ -356,178 +484,227 @@ class OptimizedHardcodedDetector:
     
     def is_excluded_line(self, line, match_start, match_end):
         """检查匹配是否在排除模式中"""
-        for pattern in EXCLUSION_PATTERNS:
-            for match in re.finditer(pattern, line, re.DOTALL):
-                if match.start() <= match_start and match.end() >= match_end:
-                    return True
-        return False
+        return SpanIndex(EXCLUSION_REGEXES, line).covers(match_start, match_end)
     
-    def detect_hardcoded_text_with_multiline(self):
-        """增强的硬编码文本检测，支持多行匹配"""
+    def detect_hardcoded_text_with_multiline(self, jobs=1, stream=None):
+        """增强的硬编码文本检测，支持多行匹配
+        
+        jobs > 1 时各文件的检测在进程池中并行执行，新建键名仍按文件顺序在主进程中生成，
+        因此结果与串行运行完全一致。
+        
+        传入 stream (FindingStream) 时，每个文件的结果检测完即写入结果流，检查点中已完成的文件
+        直接跳过，返回按类型分组的结果流视图；否则返回内存中的 defaultdict(list)。
+        """
         results = defaultdict(list)
         
-        # 搜索所有Dart文件
-        dart_files = glob.glob(os.path.join(CODE_DIR, "**/*.dart"), recursive=True)
+        # 通过增量源码索引获取Dart文件，只读取包含中文的文件
+        source_index = DartSourceIndex(roots=[CODE_DIR])
+        source_index.refresh()
+        dart_files = source_index.files_with_cjk()
+        
+        if stream is not None:
+            if stream.completed:
+                self._restore_generated_keys(stream)
+                print(f"从检查点继续: 已完成 {len(stream.completed)} 个文件")
+            dart_files = [f for f in dart_files if not stream.is_completed(f)]
+        
+        if jobs > 1 and len(dart_files) > 1:
+            chunksize = max(1, len(dart_files) // (jobs * 4))
+            executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+            file_findings = executor.map(_detect_file_in_worker, dart_files, chunksize=chunksize)
+        else:
+            executor = None
+            file_findings = map(self.detect_file, dart_files)
         
-        for dart_file in dart_files:
-            try:
-                with open(dart_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    lines = content.split('\n')
+        try:
+            for dart_file, findings in zip(dart_files, file_findings):
+                if stream is None:
+                    self._collect_findings(findings, results)
+                else:
+                    self._assign_new_keys(findings)
+                    stream.write_file(dart_file, (dict(item, context=context) for context, item in findings))
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        
+        return results if stream is None else stream.grouped('context')
+    
+    def detect_file(self, dart_file):
+        """检测单个文件，返回按发现顺序排列的 (context, item) 列表
+        
+        需要新建的键名在此阶段尚未生成（suggested_key 为 None），由 _collect_findings 按顺序填充。
+        """
+        findings = []
+        try:
+            with open(dart_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+                lines = content.split('\n')
+            
+            # 单行检测
+            for line_num, line in enumerate(lines, 1):
+                # 跳过纯英文行和纯符号行
+                if not re.search(r'[\u4e00-\u9fff]', line):
+                    continue
                 
-                # 单行检测
-                for line_num, line in enumerate(lines, 1):
-                    # 跳过纯英文行和纯符号行
-                    if not re.search(r'[\u4e00-\u9fff]', line):
-                        continue
-                    
-                    self._process_line(line, line_num, dart_file, results)
+                self._process_line(line, line_num, dart_file, findings)
+            
+            # 多行检测（处理跨行的Widget定义）
+            self._process_multiline_patterns(content, dart_file, findings, lines)
                 
-                # 多行检测（处理跨行的Widget定义）
-                self._process_multiline_patterns(content, dart_file, results)
-                    
-            except (UnicodeDecodeError, FileNotFoundError) as e:
-                print(f"Warning: Error reading {dart_file}: {e}")
+        except (UnicodeDecodeError, FileNotFoundError) as e:
+            print(f"Warning: Error reading {dart_file}: {e}")
         
-        return results
+        return findings
+    
+    def _assign_new_keys(self, findings):
+        """为单个文件中需要新建的条目按顺序生成键名"""
+        for context, item in findings:
+            if item['suggested_key'] is None:
+                item['suggested_key'] = self.generate_camelcase_key(item['text'], context, item['file'])
+    
+    def _collect_findings(self, findings, results):
+        """将单个文件的检测结果合并到总结果，并为需要新建的条目生成键名"""
+        self._assign_new_keys(findings)
+        for context, item in findings:
+            results[context].append(item)
     
-    def _process_line(self, line, line_num, dart_file, results):
+    def _restore_generated_keys(self, stream):
+        """从已有结果流恢复已生成的键名，保证继续检测时生成的键名与一次性运行一致"""
+        for record in stream.records():
+            if not record.get('reuse_existing', False):
+                self.generated_keys.add(record['suggested_key'])
+    
+    def _process_line(self, line, line_num, dart_file, findings):
         """处理单行文本检测"""
-        for context, patterns in ENHANCED_DETECTION_PATTERNS.items():
-            for pattern in patterns:
-                for match in re.finditer(pattern, line):
-                    if match.groups():
-                        chinese_text = match.group(1)
-                        
-                        # 检查是否包含中文
-                        if not re.search(r'[\u4e00-\u9fff]', chinese_text):
-                            continue
-                        
-                        # 检查是否在排除模式中
-                        if self.is_excluded_line(line, match.start(1), match.end(1)):
-                            continue
-                        
-                        # 清理文本
-                        cleaned_text = re.sub(r'\s+', ' ', chinese_text.strip())
-                        if len(cleaned_text) == 0:
-                            continue
-                        
-                        # 检查是否需要复用现有ARB键
-                        similar_key, similarity = self.find_similar_arb_key(cleaned_text)
-                        
-                        file_path = os.path.relpath(dart_file, CODE_DIR)
-                        
-                        if similar_key and similarity >= 0.9:
-                            # 高度相似，建议复用
-                            results[context].append({
-                                'file': file_path,
-                                'line': line_num,
-                                'text': cleaned_text,
-                                'original_line': line.strip(),
-                                'suggested_key': similar_key,
-                                'reuse_existing': True,
-                                'similarity': similarity,
-                                'existing_value': self.existing_arb_keys[similar_key],
-                                'pattern_matched': pattern,
-                            })
-                        elif cleaned_text in self.existing_arb_values:
-                            # 完全匹配，跳过
-                            continue
-                        else:
-                            # 需要新建键
-                            suggested_key = self.generate_camelcase_key(cleaned_text, context, file_path)
-                            
-                            results[context].append({
-                                'file': file_path,
-                                'line': line_num,
-                                'text': cleaned_text,
-                                'original_line': line.strip(),
-                                'suggested_key': suggested_key,
-                                'reuse_existing': False,
-                                'similar_key': similar_key if similarity >= 0.6 else None,
-                                'similarity': similarity if similarity >= 0.6 else 0,
-                                'pattern_matched': pattern,
-                            })
+        # 排除模式的匹配区间每行只计算一次
+        exclusion_spans = None
+        
+        for context, pattern, match in DETECTION_PATTERN_SET.scan(line):
+            if match.groups():
+                chinese_text = match.group(1)
+                
+                # 检查是否包含中文
+                if not re.search(r'[\u4e00-\u9fff]', chinese_text):
+                    continue
+                
+                # 检查是否在排除模式中
+                if exclusion_spans is None:
+                    exclusion_spans = SpanIndex(EXCLUSION_REGEXES, line)
+                if exclusion_spans.covers(match.start(1), match.end(1)):
+                    continue
+                
+                # 清理文本
+                cleaned_text = re.sub(r'\s+', ' ', chinese_text.strip())
+                if len(cleaned_text) == 0:
+                    continue
+                
+                # 检查是否需要复用现有ARB键
+                similar_key, similarity = self.find_similar_arb_key(cleaned_text)
+                
+                file_path = os.path.relpath(dart_file, CODE_DIR)
+                
+                if similar_key and similarity >= 0.9:
+                    # 高度相似，建议复用
+                    findings.append((context, {
+                        'file': file_path,
+                        'line': line_num,
+                        'text': cleaned_text,
+                        'original_line': line.strip(),
+                        'suggested_key': similar_key,
+                        'reuse_existing': True,
+                        'similarity': similarity,
+                        'existing_value': self.existing_arb_keys[similar_key],
+                        'pattern_matched': pattern,
+                    }))
+                elif cleaned_text in self.existing_arb_values:
+                    # 完全匹配，跳过
+                    continue
+                else:
+                    # 需要新建键（键名在合并结果时按顺序生成）
+                    findings.append((context, {
+                        'file': file_path,
+                        'line': line_num,
+                        'text': cleaned_text,
+                        'original_line': line.strip(),
+                        'suggested_key': None,
+                        'reuse_existing': False,
+                        'similar_key': similar_key if similarity >= 0.6 else None,
+                        'similarity': similarity if similarity >= 0.6 else 0,
+                        'pattern_matched': pattern,
+                    }))
     
-    def _process_multiline_patterns(self, content, dart_file, results):
-        """处理跨行的Widget定义"""
+    def _process_multiline_patterns(self, content, dart_file, findings, lines=None):
+        """处理跨行的Widget定义
+        
+        lines 为 content.split('\\n') 的结果，由调用方传入以避免重复切分。
+        """
         # 移除注释以避免误匹配
-        content_no_comments = re.sub(r'//.*$', '', content, flags=re.MULTILINE)
-        content_no_comments = re.sub(r'/\*.*?\*/', '', content_no_comments, flags=re.DOTALL)
-        
-        # 多行Widget模式
-        multiline_patterns = {
-            'ui_text_widget': [
-                r'Text\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
-                r'const\s+Text\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
-                r'SelectableText\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
-            ],
-            'ui_buttons_labels': [
-                r'ElevatedButton\s*\([^}]*child:\s*Text\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
-                r'TextButton\s*\([^}]*child:\s*Text\s*\(\s*[\'\"](.*?[\u4e00-\u9fff].*?)[\'\"]',
-            ],
-        }
+        content_no_comments = LINE_COMMENT_PATTERN.sub('', content)
+        content_no_comments = BLOCK_COMMENT_PATTERN.sub('', content_no_comments)
         
-        for context, patterns in multiline_patterns.items():
-            for pattern in patterns:
-                for match in re.finditer(pattern, content_no_comments, re.DOTALL):
-                    chinese_text = match.group(1)
-                    
-                    if not re.search(r'[\u4e00-\u9fff]', chinese_text):
-                        continue
-                    
-                    # 找到行号
-                    line_num = content[:match.start()].count('\n') + 1
-                    
-                    # 清理文本
-                    cleaned_text = re.sub(r'\s+', ' ', chinese_text.strip())
-                    if len(cleaned_text) == 0:
-                        continue
-                    
-                    # 检查是否已经在单行检测中处理过
-                    file_path = os.path.relpath(dart_file, CODE_DIR)
-                    already_processed = any(
-                        item['file'] == file_path and 
-                        item['line'] == line_num and 
-                        item['text'] == cleaned_text
-                        for items in results.values()
-                        for item in items
-                    )
-                    
-                    if already_processed:
-                        continue
-                    
-                    # 处理新发现的硬编码文本
-                    similar_key, similarity = self.find_similar_arb_key(cleaned_text)
-                    
-                    if similar_key and similarity >= 0.9:
-                        results[context].append({
-                            'file': file_path,
-                            'line': line_num,
-                            'text': cleaned_text,
-                            'original_line': content.split('\n')[line_num-1].strip() if line_num <= len(content.split('\n')) else '',
-                            'suggested_key': similar_key,
-                            'reuse_existing': True,
-                            'similarity': similarity,
-                            'existing_value': self.existing_arb_keys[similar_key],
-                            'pattern_matched': pattern,
-                            'multiline_match': True,
-                        })
-                    elif cleaned_text not in self.existing_arb_values:
-                        suggested_key = self.generate_camelcase_key(cleaned_text, context, file_path)
-                        
-                        results[context].append({
-                            'file': file_path,
-                            'line': line_num,
-                            'text': cleaned_text,
-                            'original_line': content.split('\n')[line_num-1].strip() if line_num <= len(content.split('\n')) else '',
-                            'suggested_key': suggested_key,
-                            'reuse_existing': False,
-                            'similar_key': similar_key if similarity >= 0.6 else None,
-                            'similarity': similarity if similarity >= 0.6 else 0,
-                            'pattern_matched': pattern,
-                            'multiline_match': True,
-                        })
+        if lines is None:
+            lines = content.split('\n')
+        
+        # 行起始偏移表：通过二分查找把匹配位置映射为行号
+        line_starts = [0]
+        for line in lines[:-1]:
+            line_starts.append(line_starts[-1] + len(line) + 1)
+        
+        file_path = os.path.relpath(dart_file, CODE_DIR)
+        
+        # 已处理的 (文件, 行号, 文本)，包括单行检测的结果
+        seen = {(item['file'], item['line'], item['text']) for _, item in findings}
+        
+        for context, pattern, match in MULTILINE_PATTERN_SET.scan(content_no_comments):
+            chinese_text = match.group(1)
+            
+            if not re.search(r'[\u4e00-\u9fff]', chinese_text):
+                continue
+            
+            # 找到行号
+            line_num = bisect_right(line_starts, match.start())
+            
+            # 清理文本
+            cleaned_text = re.sub(r'\s+', ' ', chinese_text.strip())
+            if len(cleaned_text) == 0:
+                continue
+            
+            # 检查是否已经在单行检测中处理过
+            seen_key = (file_path, line_num, cleaned_text)
+            if seen_key in seen:
+                continue
+            
+            # 处理新发现的硬编码文本
+            similar_key, similarity = self.find_similar_arb_key(cleaned_text)
+            
+            if similar_key and similarity >= 0.9:
+                findings.append((context, {
+                    'file': file_path,
+                    'line': line_num,
+                    'text': cleaned_text,
+                    'original_line': lines[line_num-1].strip(),
+                    'suggested_key': similar_key,
+                    'reuse_existing': True,
+                    'similarity': similarity,
+                    'existing_value': self.existing_arb_keys[similar_key],
+                    'pattern_matched': pattern,
+                    'multiline_match': True,
+                }))
+                seen.add(seen_key)
+            elif cleaned_text not in self.existing_arb_values:
+                findings.append((context, {
+                    'file': file_path,
+                    'line': line_num,
+                    'text': cleaned_text,
+                    'original_line': lines[line_num-1].strip(),
+                    'suggested_key': None,
+                    'reuse_existing': False,
+                    'similar_key': similar_key if similarity >= 0.6 else None,
+                    'similarity': similarity if similarity >= 0.6 else 0,
+                    'pattern_matched': pattern,
+                    'multiline_match': True,
+                }))
+                seen.add(seen_key)
     
     def generate_optimized_reports(self, detection_results):
         """生成优化的检测报告"""
@@ -655,16 +832,20 @@ class OptimizedHardcodedDetector:
             'new_count': new_count,
         }
     
-    def run_optimized_detection(self):
-        """运行优化的检测流程"""
-        print("=== 优化硬编码文本检测器 ===")
-        print("正在执行增强检测...")
+    def run_optimized_detection(self, jobs=1, resume=False):
+        """运行优化的检测流程
         
-        # 执行检测
-        results = self.detect_hardcoded_text_with_multiline()
+        检测结果边检测边写入 REPORT_DIR 下的结果流，resume=True 时从上次中断处继续。
+        """
+        print("=== 优化硬编码文本检测器 ===")
+        print(f"正在执行增强检测... (并行进程数: {jobs})")
         
-        # 生成报告
-        report_info = self.generate_optimized_reports(results)
+        with FindingStream(STREAM_PATH, resume=resume) as stream:
+            # 执行检测
+            results = self.detect_hardcoded_text_with_multiline(jobs=jobs, stream=stream)
+            
+            # 生成报告
+            report_info = self.generate_optimized_reports(results)
         
         # 输出结果
         print(f"\n检测完成！")
@@ -683,6 +864,7 @@ class OptimizedHardcodedDetector:
         print(f"  - 汇总报告: {report_info['summary']}")
         print(f"  - 详细报告: {report_info['detail']}")
         print(f"  - 优化映射文件: {report_info['mapping']}")
+        print(f"  - 检测结果流: {STREAM_PATH}")
         
         print(f"\n优化特性:")
         print("✅ 更全面的UI文本检测模式")
@@ -694,8 +876,17 @@ class OptimizedHardcodedDetector:
         return report_info
 
 def main():
+    parser = argparse.ArgumentParser(description='优化的硬编码文本检测器')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='并行检测的进程数（0 表示使用全部CPU核心）')
+    parser.add_argument('--resume', action='store_true',
+                        help='从上次中断的检测结果流继续，跳过已完成的文件')
+    args = parser.parse_args()
+    
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    
     detector = OptimizedHardcodedDetector()
-    detector.run_optimized_detection()
+    detector.run_optimized_detection(jobs=jobs, resume=args.resume)
 
 if __name__ == "__main__":
     main()
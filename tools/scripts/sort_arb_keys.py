@@ -5,27 +5,30 @@
 
 import json
 import os
-import shutil
-import datetime
+import sys
 from collections import OrderedDict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from backup_store import BackupStore
+
 # 文件路径
 ARB_DIR = "lib/l10n"
 ZH_ARB_PATH = os.path.join(ARB_DIR, "app_zh.arb")
 EN_ARB_PATH = os.path.join(ARB_DIR, "app_en.arb")
-BACKUP_DIR = f"arb_backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_sorted"
+BACKUP_OPERATION = "sort_arb_keys"
 
 def backup_arb_files():
-    """创建ARB文件备份"""
-    os.makedirs(BACKUP_DIR, exist_ok=True)
+    """创建ARB文件备份（写入内容寻址备份库），返回备份编号"""
+    backup = BackupStore().begin(BACKUP_OPERATION)
     
     for arb_file in [ZH_ARB_PATH, EN_ARB_PATH]:
         if os.path.exists(arb_file):
-            backup_path = os.path.join(BACKUP_DIR, os.path.basename(arb_file))
-            shutil.copy2(arb_file, backup_path)
-            print(f"已备份 {arb_file} 到 {backup_path}")
+            backup.add(arb_file)
+            print(f"已备份 {arb_file}")
         else:
             print(f"警告: ARB文件 {arb_file} 不存在!")
+    
+    return backup.save()
 
 def sort_arb_file(file_path, file_name):
     """对单个ARB文件的键进行排序"""
@@ -90,7 +93,7 @@ def main():
     print("=== ARB文件键排序工具 ===")
     
     # 创建备份
-    backup_arb_files()
+    backup_id = backup_arb_files()
     
     # 对两个ARB文件进行排序
     success_count = 0
@@ -103,7 +106,7 @@ def main():
     
     print(f"\n=== 排序完成 ===")
     print(f"成功处理的文件: {success_count}/2")
-    print(f"备份目录: {BACKUP_DIR}")
+    print(f"备份编号: {backup_id}（恢复: python scripts/backup_store.py restore {backup_id}）")
     
     # 验证排序结果
     print(f"\n=== 验证排序结果 ===")
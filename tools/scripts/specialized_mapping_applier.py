@@ -5,10 +5,13 @@
 
 import os
 import re
+import sys
 import json
 import yaml
 from collections import OrderedDict
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from backup_store import BackupStore
 
 # 配置常量
 CODE_DIR = "lib"
@@ -23,6 +26,7 @@ class SpecializedMappingApplier:
         self.mapping_data = None
         self.zh_arb_data = OrderedDict()
         self.en_arb_data = OrderedDict()
+        self.backup = None
         
     def load_mapping_file(self):
         """加载复杂格式的映射文件"""
@@ -292,10 +296,11 @@ class SpecializedMappingApplier:
             # 保存文件
             if changes_made > 0 or not analysis['has_l10n_import']:
                 if not self.dry_run:
-                    # 备份原文件
-                    backup_path = f"{file_path}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    with open(backup_path, 'w', encoding='utf-8') as f:
-                        f.write(analysis['content'])
+                    # 备份原文件（写入内容寻址备份库，整次运行共用一个清单）
+                    if self.backup is None:
+                        self.backup = BackupStore().begin('specialized_mapping_applier')
+                    self.backup.add(file_path, analysis['content'])
+                    self.backup.save()
                     
                     # 写入新内容
                     with open(file_path, 'w', encoding='utf-8') as f:
@@ -323,6 +328,8 @@ class SpecializedMappingApplier:
                         json.dump(dict(self.en_arb_data), f, ensure_ascii=False, indent=2)
         
         print(f"\n✅ 处理完成！{'预览了' if self.dry_run else '修改了'} {files_changed} 个文件")
+        if self.backup is not None:
+            print(f"💾 备份编号: {self.backup.manifest_id}（恢复: python scripts/backup_store.py restore {self.backup.manifest_id}）")
         return True
     
     def run(self):
@@ -11,11 +11,15 @@ This script analyzes ARB files and generates a YAML mapping with:
 import json
 import os
 import re
+import sys
 import glob
 import difflib
 from collections import defaultdict, OrderedDict
 from itertools import combinations
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from similarity_clustering import candidate_pairs, identical_value_groups
+
 # Constants
 ARB_DIR = "lib/l10n"
 ZH_ARB_PATH = os.path.join(ARB_DIR, "app_zh.arb")
@@ -76,17 +80,7 @@ def load_arb_files():
 
 def find_similar_keys(arb_data):
     """Find keys with identical values"""
-    value_to_keys = defaultdict(list)
-    
-    # Group keys by their values
-    for key, value in arb_data.items():
-        if not key.startswith('@'):  # Skip metadata keys
-            value_to_keys[value].append(key)
-    
-    # Filter groups to only include those with multiple keys
-    similar_keys = {value: keys for value, keys in value_to_keys.items() if len(keys) > 1}
-    
-    return similar_keys
+    return identical_value_groups(arb_data)
 
 def extract_words_from_key(key):
     """Extract individual words from a camelCase or snake_case key name"""
@@ -180,8 +174,24 @@ def find_semantically_similar_keys(keys, zh_data, en_data):
     """Find keys that have similar semantic meaning beyond exact value matches"""
     similarity_groups = defaultdict(list)
     
-    # Calculate semantic similarity between key pairs
-    for key1, key2 in combinations(keys, 2):
+    # Only pairs that share a core concept or whose values may be similar in both
+    # languages can match, so collect those instead of comparing all pairs
+    concepts = [get_key_core_concept(key) for key in keys]
+    concept_members = defaultdict(list)
+    for index, (key, concept) in enumerate(zip(keys, concepts)):
+        if concept != key:
+            concept_members[concept].append(index)
+    
+    pairs = candidate_pairs([
+        [zh_data.get(key, "") for key in keys],
+        [en_data.get(key, "") for key in keys],
+    ], 0.7)
+    for members in concept_members.values():
+        pairs.update(combinations(members, 2))
+    
+    # Calculate semantic similarity between key pairs (in the same order as all pairs)
+    for i, j in sorted(pairs):
+        key1, key2 = keys[i], keys[j]
         # Skip if either key starts with @
         if key1.startswith('@') or key2.startswith('@'):
             continue
@@ -191,15 +201,16 @@ def find_semantically_similar_keys(keys, zh_data, en_data):
             continue
         
         # Get core concepts for both keys
-        concept1 = get_key_core_concept(key1)
-        concept2 = get_key_core_concept(key2)
-        
-        # Calculate string similarity between values
-        zh_similarity = difflib.SequenceMatcher(None, zh_data.get(key1, ""), zh_data.get(key2, "")).ratio()
-        en_similarity = difflib.SequenceMatcher(None, en_data.get(key1, ""), en_data.get(key2, "")).ratio()
+        concept1 = concepts[i]
+        concept2 = concepts[j]
         
         # If core concepts match or values are similar, group them
-        if (concept1 == concept2 and concept1 != key1 and concept2 != key2) or (zh_similarity > 0.7 and en_similarity > 0.7):
+        # (string similarity between values is only calculated when concepts differ)
+        same_concept = concept1 == concept2 and concept1 != key1 and concept2 != key2
+        if same_concept or (
+            difflib.SequenceMatcher(None, zh_data.get(key1, ""), zh_data.get(key2, "")).ratio() > 0.7
+            and difflib.SequenceMatcher(None, en_data.get(key1, ""), en_data.get(key2, "")).ratio() > 0.7
+        ):
             group_key = concept1 if concept1 == concept2 else f"{key1}_{key2}_similar"
             similarity_groups[group_key].append(key1)
             similarity_groups[group_key].append(key2)
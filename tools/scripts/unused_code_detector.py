@@ -12,6 +12,10 @@ from pathlib import Path
 from typing import Set, Dict, List, Tuple
 import json
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from import_graph import ImportGraph
+from reference_index import ReferenceIndex
+
 class UnusedCodeDetector:
     def __init__(self, project_root: str):
         self.project_root = Path(project_root)
@@ -21,7 +25,9 @@ class UnusedCodeDetector:
         # 存储所有文件路径和导入关系
         self.all_dart_files: Set[Path] = set()
         self.import_relationships: Dict[Path, Set[Path]] = {}
+        self.import_graph = ImportGraph()
         self.used_files: Set[Path] = set()
+        self._reference_index = None
         
         # 排除的文件模式
         self.exclude_patterns = [
@@ -75,6 +81,7 @@ class UnusedCodeDetector:
             except Exception as e:
                 print(f"   ⚠️  分析文件失败: {dart_file} - {e}")
         
+        self.import_graph = ImportGraph(self.import_relationships)
         print(f"   分析了 {len(self.import_relationships)} 个文件的导入关系")
 
     def _extract_imports(self, file_path: Path) -> Set[Path]:
@@ -140,16 +147,8 @@ class UnusedCodeDetector:
         print(f"   标记了 {len(self.used_files)} 个文件为已使用")
 
     def _mark_file_and_dependencies(self, file_path: Path) -> None:
-        """递归标记文件及其依赖为已使用"""
-        if file_path in self.used_files:
-            return
-        
-        self.used_files.add(file_path)
-        
-        # 递归标记依赖
-        if file_path in self.import_relationships:
-            for imported_file in self.import_relationships[file_path]:
-                self._mark_file_and_dependencies(imported_file)
+        """标记文件及其直接和间接依赖为已使用（已标记的文件不再重复遍历）"""
+        self.import_graph.reachable([file_path], visited=self.used_files)
 
     def find_unused_files(self) -> List[Path]:
         """找到未使用的文件"""
@@ -163,33 +162,18 @@ class UnusedCodeDetector:
         
         return sorted(unused_files)
 
+    @property
+    def reference_index(self) -> ReferenceIndex:
+        """所有Dart文件内容的单词倒排索引（首次使用时一次性构建）"""
+        if self._reference_index is None:
+            self._reference_index = ReferenceIndex({f: f for f in self.all_dart_files})
+        return self._reference_index
+
     def _is_referenced_by_string(self, file_path: Path) -> bool:
         """检查文件是否通过字符串引用（如路由、反射等）"""
+        # 相对路径形式的引用（带或不带 .dart 后缀）都包含文件名，只需查找文件名
         filename = file_path.stem  # 不带扩展名的文件名
-        relative_path = file_path.relative_to(self.project_root)
-        
-        # 搜索可能的字符串引用
-        search_patterns = [
-            filename,
-            str(relative_path).replace('\\', '/'),
-            str(relative_path.with_suffix('')).replace('\\', '/'),
-        ]
-        
-        for dart_file in self.all_dart_files:
-            if dart_file == file_path:
-                continue
-                
-            try:
-                with open(dart_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                for pattern in search_patterns:
-                    if pattern in content:
-                        return True
-            except Exception:
-                continue
-        
-        return False
+        return self.reference_index.is_mentioned(filename, exclude=file_path)
 
     def generate_report(self, unused_files: List[Path]) -> Dict:
         """生成详细报告"""
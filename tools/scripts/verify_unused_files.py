@@ -6,10 +6,14 @@
 
 import os
 import re
+import sys
 import json
 from pathlib import Path
 from typing import Set, Dict, List, Tuple
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from import_graph import ImportGraph
+
 class UnusedFilesVerifier:
     def __init__(self, project_root: str):
         self.project_root = Path(project_root)
@@ -19,6 +23,7 @@ class UnusedFilesVerifier:
         # 存储分析结果
         self.all_files = set()
         self.import_relationships = {}
+        self.import_graph = ImportGraph()
         self.used_files = set()
         self.excluded_patterns = [
             r'\.g\.dart$',      # 代码生成文件
@@ -59,6 +64,12 @@ class UnusedFilesVerifier:
                 imports = self._extract_imports(file_path)
                 self.import_relationships[file_path_str] = imports
         
+        # 只保留项目内有效文件之间的导入关系
+        self.import_graph = ImportGraph({
+            file_path: [imported for imported in imports if imported in self.all_files]
+            for file_path, imports in self.import_relationships.items()
+        })
+        
         print(f"   分析了 {len(self.import_relationships)} 个文件的导入关系")
     
     def _extract_imports(self, file_path: Path) -> List[str]:
@@ -128,21 +139,10 @@ class UnusedFilesVerifier:
             if file_path.startswith('test/'):
                 self.used_files.add(file_path)
         
-        # 递归标记被导入的文件
-        changed = True
-        iterations = 0
-        while changed and iterations < 50:  # 防止无限循环
-            changed = False
-            iterations += 1
-            
-            for file_path in list(self.used_files):
-                if file_path in self.import_relationships:
-                    for imported_file in self.import_relationships[file_path]:
-                        if imported_file in self.all_files and imported_file not in self.used_files:
-                            self.used_files.add(imported_file)
-                            changed = True
+        # 遍历导入关系图，标记直接和间接导入的文件
+        self.used_files = self.import_graph.reachable(self.used_files)
         
-        print(f"   经过 {iterations} 轮迭代，标记了 {len(self.used_files)} 个已使用文件")
+        print(f"   遍历导入关系图，标记了 {len(self.used_files)} 个已使用文件")
     
     def get_unused_files(self) -> List[str]:
         """获取未使用的文件列表"""
@@ -171,9 +171,7 @@ class UnusedFilesVerifier:
                 result['imports'] = self.import_relationships.get(file_path, [])
                 
                 # 查找导入这个文件的其他文件
-                for other_file, imports in self.import_relationships.items():
-                    if file_path in imports:
-                        result['imported_by'].append(other_file)
+                result['imported_by'] = sorted(self.import_graph.importers(file_path))
                 
                 # 判断是否可能被使用
                 result['likely_used'] = (